@@ -0,0 +1,158 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+A local mirror of the LTK files that PySheets sends to the browser, so that loading
+PySheets does not depend on GitHub, and works offline.
+
+The mirror is a folder on disk, by default `~/.cache/pysheets/ltk`, which can be changed
+with the PYSHEETS_LTK_DIR environment variable. It is filled the first time the server
+starts, from the `pyscript-ltk` package that is installed with PySheets. After that,
+it only changes when it is refreshed with `pysheets --refresh-ltk`, which downloads the
+files from GitHub.
+
+The LTK version can be pinned by setting PYSHEETS_LTK_REF to a branch, tag, or commit
+of the LTK repository. The mirror is then downloaded from GitHub at that version,
+whenever it does not have that version already. When that download fails, the mirror
+is not used, and the pinned version is loaded from GitHub instead.
+"""
+
+import importlib.metadata
+import importlib.util
+import json
+import os
+
+
+LTK_FILES = [
+    "__init__.py",
+    "jquery.py",
+    "widgets.py",
+    "pubsub.py",
+    "logger.py",
+    "ltk.js",
+    "ltk.css",
+]
+LTK_PACKAGE = "pyscript-ltk"
+LTK_URL = "https://raw.githubusercontent.com/pyscript/ltk/{ref}/ltk/{name}"
+LTK_REF = os.environ.get("PYSHEETS_LTK_REF") or None
+LTK_DEFAULT_REF = "main"
+LTK_DIR = os.environ.get("PYSHEETS_LTK_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "pysheets", "ltk")
+MANIFEST = "manifest.json"
+
+
+def get_url(ref, name):
+    """
+    Returns the GitHub URL of an LTK file at the given branch, tag, or commit.
+    """
+    return LTK_URL.format(ref=ref, name=name)
+
+
+def read_manifest(folder):
+    """
+    Returns the manifest of a mirror, which says where its files came from, or an empty dict.
+    """
+    try:
+        with open(os.path.join(folder, MANIFEST), encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def is_complete(folder):
+    """
+    Returns whether a mirror has all the LTK files.
+    """
+    return all(os.path.isfile(os.path.join(folder, name)) for name in LTK_FILES) and bool(read_manifest(folder))
+
+
+def has_version(folder, ref):
+    """
+    Returns whether a mirror has all the LTK files, at the pinned version when there is one.
+
+    Args:
+        folder (str): The folder of the mirror.
+        ref (str|None): The pinned branch, tag, or commit, or None to accept any version.
+    """
+    return is_complete(folder) and (ref is None or read_manifest(folder).get("ref") == ref)
+
+
+def write(folder, contents, source, ref=None):
+    """
+    Writes the LTK files into a mirror. Each file is written to a temporary file first,
+    and then moved into place, so servers reading the mirror never see a partial file.
+
+    Args:
+        folder (str): The folder of the mirror.
+        contents (dict): The contents of each file, by name.
+        source (str): A description of where the files came from.
+        ref (str, optional): The branch, tag, or commit the files were downloaded at.
+    """
+    os.makedirs(folder, exist_ok=True)
+    manifest = {"source": source, "ref": ref}
+    contents = dict(contents, **{MANIFEST: json.dumps(manifest, indent=4).encode("utf-8")})
+    for name, content in contents.items():
+        temporary = os.path.join(folder, f".{name}.{os.getpid()}")
+        with open(temporary, "wb") as file:
+            file.write(content)
+        os.replace(temporary, os.path.join(folder, name))
+
+
+def copy_package(folder):
+    """
+    Fills a mirror with the files of the installed `pyscript-ltk` package, without importing it.
+
+    Returns:
+        bool: Whether the package is installed and has all the LTK files.
+    """
+    spec = importlib.util.find_spec("ltk")
+    if spec is None or not spec.origin:
+        return False
+    package = os.path.dirname(spec.origin)
+    contents = {}
+    for name in LTK_FILES:
+        path = os.path.join(package, name)
+        if not os.path.isfile(path):
+            return False
+        with open(path, "rb") as file:
+            contents[name] = file.read()
+    try:
+        version = importlib.metadata.version(LTK_PACKAGE)
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    write(folder, contents, f"{LTK_PACKAGE} {version}")
+    return True
+
+
+def download(folder, ref, get):
+    """
+    Fills a mirror with the LTK files from GitHub, at the given branch, tag, or commit.
+    The mirror is only changed when all files were downloaded.
+
+    Args:
+        folder (str): The folder of the mirror.
+        ref (str): The branch, tag, or commit to download.
+        get (callable): Returns the contents of a URL as bytes, and raises an exception when that fails.
+    """
+    contents = {name: get(get_url(ref, name)) for name in LTK_FILES}
+    write(folder, contents, "github", ref)
+
+
+def ensure(folder, ref, get):
+    """
+    Makes sure a mirror has all the LTK files, at the pinned version when there is one.
+    An empty mirror is filled from the installed package, or downloaded from GitHub
+    when the package is not installed.
+
+    Args:
+        folder (str): The folder of the mirror.
+        ref (str|None): The pinned branch, tag, or commit, or None to accept any version.
+        get (callable): Returns the contents of a URL as bytes, used when downloading.
+
+    Returns:
+        dict: The manifest of the mirror.
+    """
+    if has_version(folder, ref):
+        return read_manifest(folder)
+    if ref is None and copy_package(folder):
+        return read_manifest(folder)
+    download(folder, ref or LTK_DEFAULT_REF, get)
+    return read_manifest(folder)
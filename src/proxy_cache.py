@@ -0,0 +1,225 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+An in-memory HTTP cache for the responses fetched by the `/load` proxy.
+
+Responses are kept in a least-recently-used order, and the oldest ones are evicted
+when the total size of the cached bodies exceeds a limit. Requests are cached by method,
+URL, body, and credentials, so different users and different POST requests never share
+a response. How long a response stays fresh follows its `Cache-Control` and `Expires`
+headers. Once stale, a response with an `ETag` or `Last-Modified` header is revalidated
+with a conditional request, instead of being fetched again. Only successful responses
+are cached.
+"""
+
+import collections
+import email.utils
+import hashlib
+import threading
+import time
+
+
+MAX_BYTES = 64 * 1024 * 1024
+MAX_ENTRY_BYTES = 8 * 1024 * 1024
+DEFAULT_TTL = 60
+CACHEABLE_STATUS = 200
+NOT_MODIFIED_STATUS = 304
+
+
+def make_key(method, url, body=b"", authorization=""):
+    """
+    Returns the cache key of a request.
+
+    Args:
+        method (str): The HTTP method of the request.
+        url (str): The URL of the request.
+        body (bytes|str): The body of the request, if any.
+        authorization (str): The Authorization header of the request, if any.
+
+    Returns:
+        str: A key that is different for requests that can get different responses.
+    """
+    def digest(value):
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        return hashlib.sha256(value or b"").hexdigest()
+    return f"{method.upper()} {url} {digest(body)} {digest(authorization)}"
+
+
+def parse_cache_control(header):
+    """
+    Parses a `Cache-Control` header into a dict of directives. Directives without a value map to True.
+    """
+    directives = {}
+    for part in (header or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') if value else True
+    return directives
+
+
+def get_ttl(headers, now):
+    """
+    Returns how many seconds a response stays fresh, or None if it must not be cached.
+
+    Args:
+        headers (dict): The headers of the response.
+        now (float): The current time.
+
+    Returns:
+        float|None: The number of seconds the response is fresh, possibly 0.
+    """
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+    for name in ["s-maxage", "max-age"]:
+        if name in directives:
+            try:
+                return max(0, int(directives[name]))
+            except ValueError:
+                return 0
+    if headers.get("Expires"):
+        try:
+            expires = email.utils.parsedate_to_datetime(headers["Expires"]).timestamp()
+            return max(0, expires - now)
+        except (TypeError, ValueError):
+            return 0
+    return DEFAULT_TTL
+
+
+class CacheEntry(): # pylint: disable=too-few-public-methods
+    """
+    A cached response body with the headers needed to check whether it is still fresh.
+    """
+    def __init__(self, body, headers, ttl, now):
+        self.body = body
+        self.content_type = headers.get("Content-Type")
+        self.etag = headers.get("ETag")
+        self.last_modified = headers.get("Last-Modified")
+        self.expires = now + ttl
+
+    def is_fresh(self, now):
+        """
+        Returns whether the entry can be used without asking the origin server.
+        """
+        return now < self.expires
+
+    def get_validators(self):
+        """
+        Returns the headers for a conditional request that revalidates this entry.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def can_revalidate(self):
+        """
+        Returns whether the entry can be revalidated with a conditional request.
+        """
+        return bool(self.etag or self.last_modified)
+
+
+class ProxyCache():
+    """
+    A thread-safe, size-bounded LRU cache of proxied HTTP responses.
+    """
+    def __init__(self, max_bytes=MAX_BYTES, max_entry_bytes=MAX_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.entries = collections.OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Returns the entry for a key, fresh or stale, and marks it as recently used.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def is_cacheable(self, status, headers, length=0, now=None):
+        """
+        Returns whether a response can be cached, from its status and headers, before its body is read.
+
+        Args:
+            status (int): The HTTP status of the response.
+            headers (dict): The headers of the response.
+            length (int, optional): The size of the body, or 0 when it is not known yet.
+            now (float, optional): The current time.
+        """
+        now = time.time() if now is None else now
+        ttl = get_ttl(headers, now)
+        if status != CACHEABLE_STATUS or ttl is None or length > self.max_entry_bytes:
+            return False
+        return ttl > 0 or bool(headers.get("ETag") or headers.get("Last-Modified"))
+
+    def store(self, key, status, body, headers, now=None):
+        """
+        Caches a response, unless it failed, is too large, or must not be cached.
+
+        Args:
+            key (str): The cache key of the request, from `make_key`.
+            status (int): The HTTP status of the response.
+            body (bytes): The body of the response.
+            headers (dict): The headers of the response.
+            now (float, optional): The current time.
+
+        Returns:
+            CacheEntry|None: The new entry, or None if the response was not cached.
+        """
+        now = time.time() if now is None else now
+        if not self.is_cacheable(status, headers, len(body), now):
+            self.remove(key)
+            return None
+        entry = CacheEntry(body, headers, get_ttl(headers, now), now)
+        with self.lock:
+            self.discard(key)
+            self.entries[key] = entry
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted.body)
+        return entry
+
+    def revalidated(self, key, headers, now=None):
+        """
+        Marks an entry as fresh again, after the origin server answered a conditional request
+        with "304 Not Modified".
+
+        Returns:
+            CacheEntry|None: The entry, or None if it was evicted in the meantime.
+        """
+        now = time.time() if now is None else now
+        entry = self.get(key)
+        if entry is not None:
+            ttl = get_ttl(headers, now)
+            entry.expires = now + (ttl or 0)
+            entry.etag = headers.get("ETag") or entry.etag
+            entry.last_modified = headers.get("Last-Modified") or entry.last_modified
+        return entry
+
+    def remove(self, key):
+        """
+        Removes the entry for a key, if there is one.
+        """
+        with self.lock:
+            self.discard(key)
+
+    def discard(self, key):
+        """
+        Removes the entry for a key, if there is one. The caller holds the lock.
+        """
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry.body)
@@ -0,0 +1,60 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Coalesces identical requests made by the `/load` proxy at the same time.
+
+The first request for a key leads, and fetches the response from the upstream server.
+Identical requests that arrive while it is in flight wait for it to finish, and then
+use the response it put in the cache, instead of each sending their own request upstream.
+"""
+
+import threading
+
+
+class Coalescer():
+    """
+    Keeps track of the requests in flight, so that identical requests can share one upstream fetch.
+    """
+    def __init__(self):
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.flights)
+
+    def start(self, key):
+        """
+        Starts a flight for a key, unless an identical request is already in flight.
+
+        Args:
+            key (str): The cache key of the request.
+
+        Returns:
+            bool: True when the caller leads the flight and must call `finish` when done,
+                  False when an identical request is in flight and the caller should `wait` for it.
+        """
+        with self.lock:
+            if key in self.flights:
+                return False
+            self.flights[key] = threading.Event()
+            return True
+
+    def wait(self, key, timeout):
+        """
+        Waits at most `timeout` seconds for the flight of a key to finish.
+
+        Returns:
+            bool: Whether the flight finished, or there was no flight for the key.
+        """
+        with self.lock:
+            event = self.flights.get(key)
+        return event is None or event.wait(timeout)
+
+    def finish(self, key):
+        """
+        Finishes the flight of a key, waking up the requests that wait for it. Calling it more than once is harmless.
+        """
+        with self.lock:
+            event = self.flights.pop(key, None)
+        if event is not None:
+            event.set()
@@ -0,0 +1,28 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Decides when a request to an upstream server is sent again without verifying the
+certificate of the server. Only a failed certificate check is retried that way.
+Other failures, such as timeouts or refused connections, are raised to the caller,
+so a slow or unreachable server is not contacted twice.
+"""
+
+
+def send(request, ssl_error, failed):
+    """
+    Sends a request with certificate verification, and sends it again without
+    verification only when the certificate cannot be verified.
+
+    Args:
+        request (callable): Sends the request, called with `verify=True` or `verify=False`.
+        ssl_error (type): The exception raised when the certificate cannot be verified.
+        failed (callable): Called with the error when the certificate cannot be verified.
+
+    Returns:
+        Any: The response returned by `request`.
+    """
+    try:
+        return request(verify=True)
+    except ssl_error as error:
+        failed(error)
+    return request(verify=False)
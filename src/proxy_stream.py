@@ -0,0 +1,90 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Helpers to stream the bodies of responses fetched by the `/load` proxy to the client,
+one chunk at a time, so the server never holds an entire large download in memory.
+"""
+
+import base64
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+class TooLarge(Exception):
+    """
+    Raised when a streamed body grows beyond its maximum size.
+    """
+
+
+def encode_base64(chunks):
+    """
+    Encodes a stream of byte chunks as base64, yielding the same output as encoding all
+    chunks joined together. Each chunk is encoded as soon as it arrives, except for up
+    to two bytes that are carried over to the next chunk, to stay on a 3-byte boundary.
+
+    Args:
+        chunks (iterable): The chunks of bytes to encode.
+
+    Yields:
+        bytes: The encoded chunks.
+    """
+    remainder = b""
+    for chunk in chunks:
+        chunk = remainder + chunk
+        cut = len(chunk) - len(chunk) % 3
+        remainder = chunk[cut:]
+        if cut:
+            yield base64.b64encode(chunk[:cut])
+    if remainder:
+        yield base64.b64encode(remainder)
+
+
+def limit(chunks, max_bytes):
+    """
+    Passes on a stream of byte chunks, raising `TooLarge` once more than `max_bytes` went through.
+    """
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        if size > max_bytes:
+            raise TooLarge(f"Response is larger than {max_bytes:,} bytes")
+        yield chunk
+
+
+def relay(chunks, max_bytes, max_entry_bytes, done, failed): # pylint: disable=too-many-arguments
+    """
+    Passes on a stream of byte chunks to the client, at most `max_bytes` of them, while
+    keeping a copy of a body of at most `max_entry_bytes`, as done by `collect`.
+
+    When the stream grows too large, `failed` is called with the `TooLarge` error, which
+    is then raised again. The server then drops the connection without ending the response,
+    so the client sees a failed transfer, rather than a body that was silently cut off.
+    """
+    try:
+        yield from collect(limit(chunks, max_bytes), max_entry_bytes, done)
+    except TooLarge as error:
+        failed(error)
+        raise
+
+
+def collect(chunks, max_bytes, done):
+    """
+    Passes on a stream of byte chunks, while keeping a copy of them as long as their total
+    size is at most `max_bytes`. When the stream ends, `done` is called with the complete body.
+    When the body grows too large to keep, `done` is called with None right away, while the
+    stream goes on. It is not called when the stream is abandoned before either happens.
+    """
+    body = []
+    size = 0
+    for chunk in chunks:
+        if body is not None:
+            size += len(chunk)
+            if size <= max_bytes:
+                body.append(chunk)
+            else:
+                body = None
+                done(None)
+        yield chunk
+    if body is not None:
+        done(b"".join(body))
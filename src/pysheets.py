@@ -6,33 +6,41 @@ It sets up the Flask app, defines error handlers, and provides various routes fo
 """
 
 import base64
+import concurrent.futures
 import json
 import os
-import subprocess
+import re
 import time
 import traceback
 
 import requests
+import requests.adapters
 
+from flask import abort
 from flask import Flask
 from flask import render_template
 from flask import redirect
 from flask import request
+from flask import Response
+from flask import send_file
 
 import ai
+import ltk_mirror
+import proxy_cache
+import proxy_coalesce
+import proxy_ssl
+import proxy_stream
+import serve
+import static_assets
+import version_check
 
 from static import constants
 
-try:
-    command = ["pip", "show", "pysheets-app"]
-    lines = subprocess.check_output(command).decode("utf-8").split("\n")
-    version_lines = [line for line in lines if line.startswith("Version:")]
-    VERSION = version_lines[0].split(" ")[1].strip()
-except Exception as e:   # pylint: disable=broad-except
-    VERSION = str(e)
+VERSION = version_check.get_installed_version()
 
 static_folder = os.path.join(os.path.dirname(__file__), "static")
 app = Flask(__name__, static_folder=static_folder)
+assets = static_assets.AssetIndex(static_folder)
 
 
 @app.after_request
@@ -95,16 +103,18 @@ FILES = """
     "static/selection.py" = "selection.py"
     "static/storage.py" = "storage.py"
     "static/history.py" = "history.py"
+    "static/graph.py" = "graph.py"
     "static/html_maker.py" = "html_maker.py"
+    "static/viewport.py" = "viewport.py"
     "static/views/spreadsheet.py" = "views/spreadsheet.py"
     "static/views/cell.py" = "views/cell.py"
-    "https://raw.githubusercontent.com/pyscript/ltk/main/ltk/jquery.py" = "ltk/jquery.py"
-    "https://raw.githubusercontent.com/pyscript/ltk/main/ltk/widgets.py" = "ltk/widgets.py"
-    "https://raw.githubusercontent.com/pyscript/ltk/main/ltk/pubsub.py" = "ltk/pubsub.py"
-    "https://raw.githubusercontent.com/pyscript/ltk/main/ltk/__init__.py" = "ltk/__init__.py"
-    "https://raw.githubusercontent.com/pyscript/ltk/main/ltk/logger.py" = "ltk/logger.py"
-    "https://raw.githubusercontent.com/pyscript/ltk/main/ltk/ltk.js" = "ltk/ltk.js"
-    "https://raw.githubusercontent.com/pyscript/ltk/main/ltk/ltk.css" = "ltk/ltk.css"
+    "ltk/jquery.py" = "ltk/jquery.py"
+    "ltk/widgets.py" = "ltk/widgets.py"
+    "ltk/pubsub.py" = "ltk/pubsub.py"
+    "ltk/__init__.py" = "ltk/__init__.py"
+    "ltk/logger.py" = "ltk/logger.py"
+    "ltk/ltk.js" = "ltk/ltk.js"
+    "ltk/ltk.css" = "ltk/ltk.css"
 """
 PYSCRIPT_OFFLINE = """
     <link rel="stylesheet" href="pyscript/core.css">
@@ -120,6 +130,23 @@ OFFLINE = "offline"
 HOSTING = ONLINE
 
 
+def fingerprint_files(files):
+    """
+    Adds the version of each static file to its URL in a PyScript files manifest,
+    so that browsers can cache those files until they change.
+    """
+    files = re.sub(r'"static/([^"?]+)"', lambda match: f'"static/{assets.get_url(match.group(1))}"', files)
+    return re.sub(r'"ltk/([^"?]+)" =', lambda match: f'"ltk/{ltk_assets.get_url(match.group(1))}" =', files)
+
+
+@app.template_global()
+def asset_url(path):
+    """
+    Returns the URL of a static file, including its version, for use in templates.
+    """
+    return assets.get_url(path)
+
+
 @app.route("/")
 def root():
     """
@@ -133,7 +160,7 @@ def root():
     print("Packages: ", packages)
     return render_template("index.html", **{
         "loading": "Loading...",
-        "files": FILES,
+        "files": fingerprint_files(FILES),
         "version": VERSION,
         "version_pyscript": VERSION_PYSCRIPT,
         "pyscript": pyscript,
@@ -177,20 +204,18 @@ def pypi():
     return '<html><meta http-equiv="refresh" content="0; URL=https://pypi.org/project/pysheets-app" /></html>'
 
 
-@app.route("/ltk/ltk.css")
-def get_ltk_css():
-    """
-    Retrieves the latest contents of the LTK CSS file from the GitHub repository.
-    """
-    return ssl_get("https://raw.githubusercontent.com/pyscript/ltk/main/ltk/ltk.css")
-
-
-@app.route("/ltk/ltk.js")
-def get_ltk_js():
+@app.route("/ltk/<path:name>")
+def send_ltk(name):
     """
-    Retrieves the latest contents of the LTK JavaScript file from the GitHub repository.
+    Sends an LTK file from the local mirror. When the mirror could not be filled,
+    the file is retrieved from the GitHub repository instead.
     """
-    return ssl_get("https://raw.githubusercontent.com/pyscript/ltk/main/ltk/ltk.js")
+    asset = ltk_assets.get(name)
+    if asset is None:
+        if name not in ltk_mirror.LTK_FILES:
+            abort(404)
+        return ssl_get(ltk_mirror.get_url(ltk_mirror.LTK_REF or ltk_mirror.LTK_DEFAULT_REF, name))
+    return send_asset(asset)
 
 
 def get_form_data():
@@ -227,6 +252,71 @@ def complete():
     return ai.complete(prompt)
 
 
+UPSTREAM_CONNECT_TIMEOUT = 5
+UPSTREAM_READ_TIMEOUT = 60
+UPSTREAM_POOL_HOSTS = 16
+UPSTREAM_POOL_CONNECTIONS_PER_HOST = 8
+
+
+def create_session():
+    """
+    Creates the HTTP session shared by all requests to upstream servers.
+
+    The session keeps connections alive, so repeated requests to the same host reuse
+    the TCP and TLS connection. Connections are pooled for `UPSTREAM_POOL_HOSTS` hosts,
+    keeping up to `UPSTREAM_POOL_CONNECTIONS_PER_HOST` idle connections per host. Requests
+    never wait for a pooled connection, as streamed `/load` responses keep theirs checked out
+    for as long as the client reads. Once a host has that many connections in use, a request
+    opens a new connection, which is closed after use.
+
+    Returns:
+        requests.Session: The session.
+    """
+    new_session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=UPSTREAM_POOL_HOSTS,
+        pool_maxsize=UPSTREAM_POOL_CONNECTIONS_PER_HOST,
+        pool_block=False,
+    )
+    new_session.mount("https://", adapter)
+    new_session.mount("http://", adapter)
+    return new_session
+
+
+session = create_session()
+
+
+def ssl_request(method, url, data=None, headers=None, stream=False): # pylint: disable=too-many-arguments
+    """
+    Sends an HTTP request to the specified URL using an SSL connection from the shared session.
+    Only when the certificate of the server cannot be verified, the request is sent again
+    without verification. Other failures, such as timeouts, are not retried.
+
+    Args:
+        method (str): The HTTP method, "GET" or "POST".
+        url (str): The URL to send the request to.
+        data (dict, optional): The data to include in the body of a POST request.
+        headers (dict, optional): Any additional headers to include in the request.
+        stream (bool, optional): When True, the body is not read until it is iterated over.
+
+    Returns:
+        requests.Response: The response.
+
+    Raises:
+        requests.RequestException: If the request fails.
+    """
+    timeout = (UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT)
+
+    def send(verify):
+        return session.request(method, url, data=data, verify=verify, headers=headers or {},
+                               timeout=timeout, stream=stream)
+
+    def failed(ssl_error):
+        app.logger.error("ssl_request: cannot verify %s: %s", url, ssl_error)  # pylint: disable=no-member
+
+    return proxy_ssl.send(send, requests.exceptions.SSLError, failed)
+
+
 def ssl_get(url, headers=None):
     """
     Retrieves the contents of the specified URL using an SSL connection.
@@ -239,12 +329,7 @@ def ssl_get(url, headers=None):
         bytes: The content of the URL, or an error message if the request fails.
     """
     try:
-        return requests.get(url, verify=True, headers=headers or {}, timeout=2000).content
-    except Exception as ssl_error: # pylint: disable=broad-except
-        app.logger.error("ssl_get: error %s: %s", url, ssl_error)  # pylint: disable=no-member
-
-    try:
-        return requests.get(url, verify=False, headers=headers or {}, timeout=2000).content
+        return ssl_request("GET", url, headers=headers).content
     except Exception as non_ssl_error: # pylint: disable=broad-except
         app.logger.error("ssl_get: error %s: %s", url, non_ssl_error)  # pylint: disable=no-member
         return f"error: {non_ssl_error}"
@@ -263,93 +348,336 @@ def ssl_post(url, data, headers=None):
         bytes: The content of the URL response, or an error message if the request fails.
     """
     try:
-        return requests.post(url, data, verify=True, headers=headers or {}, timeout=2000).content
-    except Exception: # pylint: disable=broad-except
-        pass
-    try:
-        return requests.post(url, data, verify=False, headers=headers or {}, timeout=2000).content
+        return ssl_request("POST", url, data=data, headers=headers).content
     except Exception as post_error: # pylint: disable=broad-except
         return f"error: {post_error}"
 
 
-load_cache = {}
+def download(url):
+    """
+    Retrieves the contents of a URL, raising an exception when that fails.
+    """
+    response = ssl_request("GET", url)
+    response.raise_for_status()
+    return response.content
+
+
+def load_ltk_mirror():
+    """
+    Fills the local mirror of the LTK files when needed, and indexes it.
+    
+    Returns:
+        static_assets.AssetIndex: The LTK files in the mirror, which is empty when the mirror
+            could not be filled, or does not have the pinned version, so they are loaded from GitHub.
+    """
+    folder, ref = ltk_mirror.LTK_DIR, ltk_mirror.LTK_REF
+    try:
+        manifest = ltk_mirror.ensure(folder, ref, download)
+        print("LTK:", manifest.get("source"), manifest.get("ref") or "", "in", folder)
+    except Exception as mirror_error: # pylint: disable=broad-except
+        app.logger.error("Cannot fill the LTK mirror in %s: %s", folder, mirror_error) # pylint: disable=no-member
+    if not ltk_mirror.has_version(folder, ref):
+        message = "The LTK mirror in %s is incomplete or not at %s, loading LTK from GitHub"
+        app.logger.error(message, folder, ref or ltk_mirror.LTK_DEFAULT_REF) # pylint: disable=no-member
+        return static_assets.AssetIndex(folder, names=[])
+    return static_assets.AssetIndex(folder, names=ltk_mirror.LTK_FILES)
+
+
+ltk_assets = load_ltk_mirror()
+
+
+load_cache = proxy_cache.ProxyCache()
+load_flights = proxy_coalesce.Coalescer()
+LOAD_MAX_BYTES = int(os.environ.get("PYSHEETS_LOAD_MAX_BYTES", 1024 * 1024 * 1024))
+LOAD_BATCH_THREADS = 16
+load_batch_executor = concurrent.futures.ThreadPoolExecutor(LOAD_BATCH_THREADS, thread_name_prefix="load")
+
+
+def find_entry(key, coalesce):
+    """
+    Finds the cached response for a request. When the cache has no fresh response, and an
+    identical request is being fetched already, waits for that request to finish first.
+
+    Args:
+        key (str): The cache key of the request.
+        coalesce (bool): Whether the request can share its fetch with identical requests.
+
+    Returns:
+        tuple: The cache entry, fresh, stale, or None, and whether the caller leads the fetch
+               for this key and must call `load_flights.finish(key)` when done.
+    """
+    entry = load_cache.get(key)
+    if entry and entry.is_fresh(time.time()) or not coalesce:
+        return entry, False
+    if load_flights.start(key):
+        return entry, True
+    load_flights.wait(key, UPSTREAM_READ_TIMEOUT)
+    return load_cache.get(key), False
+
+
+def request_upstream(method, url, data, headers, key, entry): # pylint: disable=too-many-arguments
+    """
+    Sends a proxied request to the upstream server, revalidating the stale cache entry when possible.
+
+    Returns:
+        tuple: The revalidated cache entry and None, or None and the streamed response.
+
+    Raises:
+        requests.RequestException: If the request fails.
+    """
+    validators = entry.get_validators() if entry else {}
+    response = ssl_request(method, url, data=data, headers=dict(headers, **validators), stream=True)
+    if response.status_code == proxy_cache.NOT_MODIFIED_STATUS and entry:
+        response.close()
+        entry = load_cache.revalidated(key, response.headers)
+        if entry:
+            print("/load: network cache revalidated:", url)
+            return entry, None
+        response = ssl_request(method, url, data=data, headers=headers, stream=True)
+    return None, response
 
 
 @app.route("/load", methods=["GET", "POST"])
 def load():
     """
-    Retrieves the contents of a URL using an SSL connection, caching the response for up to 60 seconds.
+    Retrieves the contents of a URL using an SSL connection, acting as a caching proxy.
+
+    Successful responses are cached as long as their headers allow, by method, URL, body,
+    and credentials. Stale responses are revalidated with a conditional request when possible.
+    Failures are never cached. Identical GET requests that arrive while one of them is being
+    fetched wait for it, and share its response, instead of fetching it again. As soon as
+    the status, headers, or size show that the response will not be cached, the waiting
+    requests are released to fetch it themselves.
+
+    The body is streamed to the client in chunks as it arrives, and encoded as base64 on the fly
+    when the client asks for it, so large downloads are never held in memory. Responses larger
+    than `LOAD_MAX_BYTES`, which can be set with the PYSHEETS_LOAD_MAX_BYTES environment
+    variable, are refused. When their size is not known up front, the transfer is aborted
+    once the limit is reached, so the client sees a failed download, not a truncated one.
     
     Args:
         url (str): The URL to retrieve.
     
     Returns:
-        bytes: The content of the URL, or an error message if the request fails.
+        Response: The content of the URL, or an error message if the request fails.
     """
     app.logger.info("Load, url=%s", request.args.get(constants.URL)) # pylint: disable=no-member
     url = request.args.get(constants.URL)
-    if url in load_cache:
-        when, response = load_cache[url]
-        if time.time() - when < 60:
-            print("/load: network cache hit:", url)
-            return response
+    if request.method not in ["GET", "POST"]:
+        raise ValueError(f"Bad method {request.method}")
+    encode = request.args.get(constants.ENCODE) == "true"
+    data = get_form_data() if request.method == "POST" else None
+    authorization = request.headers.get("Authorization")
+    body = json.dumps(data, sort_keys=True) if data is not None else ""
+    key = proxy_cache.make_key(request.method, url, body, authorization or "")
+    entry, leader = find_entry(key, request.method == "GET")
+    if entry and entry.is_fresh(time.time()):
+        print("/load: network cache hit:", url)
+        return send_chunks([entry.body], encode)
     headers = {
         "User-Agent": request.headers.get("User-Agent"),
-        "Authorization": request.headers.get("Authorization"),
+        "Authorization": authorization,
     }
-    if request.method == "GET":
-        response = ssl_get(url, headers=headers)
-    elif request.method == "POST":
-        data = get_form_data()
-        response = ssl_post(url, data, headers=headers)
-    else:
-        raise ValueError(f"Bad method {request.method}")
+    streaming = False
     try:
-        if request.args.get(constants.ENCODE) == "true":
-            response = base64.b64encode(response) # send base64 encoded bytes
-    except Exception: # pylint: disable=broad-except
-        pass
-    load_cache[url] = time.time(), response
-    print("/load: network cache miss", url, type(response), len(response), response)
-    return response # send regular string
+        entry, response = request_upstream(request.method, url, data, headers, key, entry)
+        if entry:
+            return send_chunks([entry.body], encode)
+        length = int(response.headers.get("Content-Length") or 0)
+        if length > LOAD_MAX_BYTES:
+            response.close()
+            return f"error: {url} is {length:,} bytes, more than the maximum of {LOAD_MAX_BYTES:,} bytes"
+        print("/load: network cache miss", url, response.status_code, length or "unknown length")
+        if leader and not load_cache.is_cacheable(response.status_code, response.headers, length):
+            load_flights.finish(key)
+
+        def cache(content):
+            if content is not None:
+                load_cache.store(key, response.status_code, content, response.headers)
+            elif leader:
+                load_flights.finish(key)
+
+        def failed(error):
+            app.logger.error("load: %s: %s", url, error)  # pylint: disable=no-member
+
+        def close():
+            response.close()
+            if leader:
+                load_flights.finish(key)
+
+        chunks = response.iter_content(proxy_stream.CHUNK_SIZE)
+        chunks = proxy_stream.relay(chunks, LOAD_MAX_BYTES, load_cache.max_entry_bytes, cache, failed)
+        streamed = send_chunks(chunks, encode)
+        streamed.call_on_close(close)
+        streaming = True
+        return streamed
+    except Exception as load_error: # pylint: disable=broad-except
+        app.logger.error("load: error %s: %s", url, load_error)  # pylint: disable=no-member
+        return f"error: {load_error}"
+    finally:
+        if leader and not streaming:
+            load_flights.finish(key)
+
+
+def send_chunks(chunks, encode):
+    """
+    Returns a streamed response with the given chunks of bytes, encoded as base64 when the client asked for it.
+    """
+    return Response(proxy_stream.encode_base64(chunks) if encode else chunks)
+
+
+def fetch(url, headers):
+    """
+    Retrieves the complete body of a URL with a GET request, through the cache of the `/load` proxy.
+    Bodies larger than a cache entry are refused, as they are kept in memory.
+
+    Args:
+        url (str): The URL to retrieve.
+        headers (dict): The headers to send upstream.
+
+    Returns:
+        tuple: The HTTP status and the body of the response.
+
+    Raises:
+        requests.RequestException: If the request fails.
+        proxy_stream.TooLarge: If the body is too large.
+    """
+    key = proxy_cache.make_key("GET", url, "", headers.get("Authorization") or "")
+    entry, leader = find_entry(key, True)
+    try:
+        if entry and entry.is_fresh(time.time()):
+            return proxy_cache.CACHEABLE_STATUS, entry.body
+        entry, response = request_upstream("GET", url, None, headers, key, entry)
+        if entry:
+            return proxy_cache.CACHEABLE_STATUS, entry.body
+        length = int(response.headers.get("Content-Length") or 0)
+        if leader and not load_cache.is_cacheable(response.status_code, response.headers, length):
+            load_flights.finish(key)
+        if length > load_cache.max_entry_bytes:
+            response.close()
+            raise proxy_stream.TooLarge(f"Response is larger than {load_cache.max_entry_bytes:,} bytes")
+        with response:
+            chunks = response.iter_content(proxy_stream.CHUNK_SIZE)
+            body = b"".join(proxy_stream.limit(chunks, load_cache.max_entry_bytes))
+        load_cache.store(key, response.status_code, body, response.headers)
+        return response.status_code, body
+    finally:
+        if leader:
+            load_flights.finish(key)
+
+
+@app.route("/load_batch", methods=["POST"])
+def load_batch():
+    """
+    Retrieves the contents of several URLs at once, fetching them concurrently through
+    the cache of the `/load` proxy. This lets a sheet that needs many URLs load them
+    in one round trip, instead of one after the other.
+
+    Args:
+        urls (list): The URLs to retrieve, in a JSON body, at most `constants.LOAD_BATCH_MAX_URLS`.
+
+    Returns:
+        list: For each URL, in order, a dict with the url and either its status and content,
+              as base64 when the client asked for it, or an error message.
+    """
+    payload = request.get_json(force=True, silent=True)
+    urls = payload.get(constants.URLS) if isinstance(payload, dict) else None
+    if not isinstance(urls, list) or len(urls) > constants.LOAD_BATCH_MAX_URLS or \
+            not all(isinstance(url, str) for url in urls):
+        error = {"error": f"Expected a list of at most {constants.LOAD_BATCH_MAX_URLS} urls", "status": "error"}
+        return Response(json.dumps(error), status=400, mimetype="application/json")
+    encode = request.args.get(constants.ENCODE) == "true"
+    headers = {
+        "User-Agent": request.headers.get("User-Agent"),
+        "Authorization": request.headers.get("Authorization"),
+    }
+
+    def load_one(url):
+        try:
+            status, body = fetch(url, headers)
+            content = base64.b64encode(body).decode("ascii") if encode else body.decode("utf-8", "replace")
+            return {"url": url, "status": status, "content": content}
+        except Exception as load_error: # pylint: disable=broad-except
+            app.logger.error("load_batch: error %s: %s", url, load_error)  # pylint: disable=no-member
+            return {"url": url, "error": f"{load_error}"}
+
+    print("/load_batch:", len(urls), "urls")
+    return Response(json.dumps(list(load_batch_executor.map(load_one, urls))), mimetype="application/json")
+
+
+def fetch_latest_version():
+    """
+    Asks PyPI for the latest version of PySheets.
+    """
+    response = ssl_request("GET", version_check.PYPI_URL)
+    response.raise_for_status()
+    return version_check.parse_pypi(response.content)
+
+
+latest_version = version_check.LatestVersion(fetch_latest_version)
 
 
 @app.route("/version", methods=["GET"])
 def version():
     """
-    Retrieves the latest version of PySheets on PyPi.
+    Retrieves the latest version of PySheets on PyPi, from memory. It is refreshed in the background every hour.
     """
-    try:
-        import re # pylint: disable=import-outside-toplevel
-        content = ssl_get("https://pypi.org/project/pysheets-app/").decode("utf-8")
-        info_lines = content.split("\n")
-        versions = [line for line in info_lines if re.search(r'^\d+\.\d+\.\d+', line.strip())]
-        return versions[0]
-    except Exception: # pylint: disable=broad-except
-        return "0.0.0"
+    return latest_version.get()
+
+
+def send_asset(asset):
+    """
+    Sends a static file, compressed when the browser accepts it. The response has an ETag,
+    and is cached forever when the URL has the version of the file, or revalidated otherwise.
+    Conditional requests for a file that did not change are answered with "304 Not Modified".
+
+    Args:
+        asset (static_assets.Asset): The file to send.
+
+    Returns:
+        Response: The file, or an empty "304 Not Modified" response.
+    """
+    accepted = static_assets.get_accepted_encodings(request.headers.get("Accept-Encoding"))
+    encoding = asset.get_encoding(accepted)
+    if encoding:
+        response = Response(asset.get_variant(encoding), mimetype=asset.mimetype)
+        response.headers["Content-Encoding"] = encoding
+    else:
+        response = send_file(asset.path, mimetype=asset.mimetype, conditional=False, etag=False)
+    response.set_etag(asset.get_etag(encoding))
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = static_assets.get_cache_control(asset, request.args.get(static_assets.VERSION))
+    return response.make_conditional(request)
+
+
+def send_static(filename):
+    """
+    Sends a file from the "static" directory, for URLs that start with "/static/".
+    """
+    asset = assets.get(filename)
+    if asset is None:
+        abort(404)
+    return send_asset(asset)
+
+
+app.view_functions["static"] = send_static
 
 
 @app.route("/<path:path>")
 def send(path):
     """
-    Sends a file from the "static" directory.
+    Sends a file from the "static" directory, looking in "icons" and "examples" first.
     
     Args:
         path (str): The path to the static file to send.
     
-    Raises:
-        ValueError: If the requested file does not exist in the "static" directory.
-    
     Returns:
-        The contents of the requested static file.
+        The contents of the requested static file, or a 404 when it does not exist.
     """
-    try:
-        return app.send_static_file(f"icons/{path}")
-    except Exception: # pylint: disable=broad-except
-        try:
-            return app.send_static_file(f"examples/{path}")
-        except Exception: # pylint: disable=broad-except
-            return app.send_static_file(path)
+    asset = assets.find(path, ["icons", "examples", ""])
+    if asset is None:
+        abort(404)
+    return send_asset(asset)
 
 
 class TerminalColors: # pylint: disable=too-few-public-methods
@@ -370,14 +698,24 @@ class TerminalColors: # pylint: disable=too-few-public-methods
 def run_app():
     """
     Runs the PySheets application after `pip install pyscript-app` and calling `pysheets`.
+    Run `pysheets --help` to see how to choose the address, port, workers, and threads.
     """
+    options = serve.parse_options()
+    if options.refresh_ltk:
+        try:
+            ltk_mirror.download(ltk_mirror.LTK_DIR, options.ltk_ref, download)
+        except Exception as download_error: # pylint: disable=broad-except
+            raise SystemExit(f"Cannot download LTK {options.ltk_ref}: {download_error}") from download_error
+        print("Downloaded LTK", options.ltk_ref, "into", ltk_mirror.LTK_DIR)
+        return
+    assets.watch = options.debug
     print(
         'The PySheets server is running. Open this URL in your browser:',
         TerminalColors.OKGREEN,
-        'http://127.0.0.1:8081',
+        serve.get_url(options),
         TerminalColors.DEFAULT
     )
-    app.run(host='127.0.0.1', port=8081, debug=True)
+    serve.run(app, options)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,160 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Runs the PySheets server for the `pysheets` console script.
+
+By default, the app is served by gunicorn, with several worker processes that each handle
+requests on a pool of threads, so one slow upstream fetch by `/load` or `/complete` only
+occupies a single thread. When gunicorn is not installed, or not supported, such as on Windows,
+a multi-threaded Werkzeug server is used instead. Both stop gracefully on SIGTERM or Ctrl-C,
+giving requests in flight time to finish. With `--debug`, the Flask development server
+is used, with its reloader and debugger, which must never be exposed to other users.
+
+Every option can also be set with an environment variable, such as PYSHEETS_PORT.
+"""
+
+import argparse
+import os
+import signal
+import threading
+import time
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8081
+DEFAULT_WORKERS = 2
+DEFAULT_THREADS = 8
+DEFAULT_GRACEFUL_TIMEOUT = 30
+WORKER_TIMEOUT = 120
+
+
+def parse_options(args=None, environ=None):
+    """
+    Parses the command line options of the `pysheets` console script.
+
+    Args:
+        args (list, optional): The command line arguments, defaulting to `sys.argv`.
+        environ (dict, optional): The environment variables that provide the defaults.
+
+    Returns:
+        argparse.Namespace: The options, with host, port, workers, threads, graceful_timeout, and debug.
+    """
+    environ = os.environ if environ is None else environ
+    parser = argparse.ArgumentParser(prog="pysheets", description="Runs the PySheets server.")
+    parser.add_argument("--host", default=environ.get("PYSHEETS_HOST", DEFAULT_HOST),
+                        help=f"the address to bind to (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=int(environ.get("PYSHEETS_PORT", DEFAULT_PORT)),
+                        help=f"the port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--workers", type=int, default=int(environ.get("PYSHEETS_WORKERS", DEFAULT_WORKERS)),
+                        help=f"the number of worker processes (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--threads", type=int, default=int(environ.get("PYSHEETS_THREADS", DEFAULT_THREADS)),
+                        help=f"the number of request threads per worker (default: {DEFAULT_THREADS})")
+    parser.add_argument("--graceful-timeout", type=int,
+                        default=int(environ.get("PYSHEETS_GRACEFUL_TIMEOUT", DEFAULT_GRACEFUL_TIMEOUT)),
+                        help="seconds to finish requests in flight when stopping "
+                             f"(default: {DEFAULT_GRACEFUL_TIMEOUT})")
+    parser.add_argument("--debug", action="store_true", default=environ.get("PYSHEETS_DEBUG") == "true",
+                        help="run the Flask development server with its reloader and debugger")
+    parser.add_argument("--refresh-ltk", action="store_true",
+                        help="download the LTK files from GitHub into the local mirror, and exit")
+    parser.add_argument("--ltk-ref", default=environ.get("PYSHEETS_LTK_REF") or "main",
+                        help="the LTK branch, tag, or commit to download with --refresh-ltk (default: main)")
+    options = parser.parse_args(args)
+    if options.workers < 1 or options.threads < 1:
+        parser.error("--workers and --threads must be at least 1")
+    return options
+
+
+def get_bind(options):
+    """
+    Returns the address to bind to in the form gunicorn expects, with IPv6 addresses in brackets.
+    """
+    host = f"[{options.host}]" if ":" in options.host else options.host
+    return f"{host}:{options.port}"
+
+
+def get_url(options):
+    """
+    Returns the URL to open in the browser to use the server.
+    """
+    host = "127.0.0.1" if options.host in ["0.0.0.0", "::", ""] else options.host
+    host = f"[{host}]" if ":" in host else host
+    return f"http://{host}:{options.port}"
+
+
+def get_gunicorn_options(options):
+    """
+    Returns the gunicorn settings for the given options.
+
+    Workers use threads, so a request that waits on an upstream server does not block
+    the other requests handled by the same worker.
+    """
+    return {
+        "bind": get_bind(options),
+        "workers": options.workers,
+        "threads": options.threads,
+        "worker_class": "gthread",
+        "graceful_timeout": options.graceful_timeout,
+        "timeout": WORKER_TIMEOUT,
+        "accesslog": "-",
+    }
+
+
+def run(app, options):
+    """
+    Serves the app with the given options until the server is stopped.
+
+    Args:
+        app (flask.Flask): The app to serve.
+        options (argparse.Namespace): The options, from `parse_options`.
+    """
+    if options.debug:
+        app.run(host=options.host, port=options.port, debug=True)
+        return
+    try:
+        from gunicorn.app.base import BaseApplication # pylint: disable=import-outside-toplevel
+    except ImportError:
+        print("gunicorn is not available, using a single process. Install it with `pip install pysheets-app[serve]`.")
+        run_threaded(app, options)
+        return
+
+    class Server(BaseApplication): # pylint: disable=abstract-method
+        """
+        Runs the app in gunicorn, without reading gunicorn's own command line arguments.
+        """
+        def load_config(self):
+            for name, value in get_gunicorn_options(options).items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            return app
+
+    Server().run()
+
+
+def run_threaded(app, options):
+    """
+    Serves the app with a multi-threaded Werkzeug server, handling each request in its own thread.
+    On SIGTERM or Ctrl-C, the server stops accepting requests, and waits up to
+    `options.graceful_timeout` seconds for the requests in flight to finish.
+    """
+    from werkzeug.serving import make_server # pylint: disable=import-outside-toplevel
+
+    server = make_server(options.host, options.port, app, threaded=True)
+    main_thread = threading.current_thread()
+
+    def stop(signum, frame): # pylint: disable=unused-argument
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        print("Stopping the PySheets server...")
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        deadline = time.monotonic() + options.graceful_timeout
+        for thread in threading.enumerate():
+            if thread is not main_thread and thread.daemon:
+                thread.join(max(0, deadline - time.monotonic()))
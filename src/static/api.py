@@ -147,6 +147,75 @@ def is_cell_range_reference(s: str):
     return isinstance(s, str) and re.match(cell_range_reference, s)
 
 
+class CellRange():
+    """
+    A rectangular range of cells, such as "A1:Z5000", that does not list all its keys.
+
+    Membership is tested with arithmetic on the column and row of a key, so even large
+    ranges take constant memory.
+    """
+    def __init__(self, selection: str):
+        start, end = selection.split(":")
+        start_col, start_row = get_col_row_from_key(start.strip())
+        end_col, end_row = get_col_row_from_key(end.strip())
+        self.start_col, self.end_col = min(start_col, end_col), max(start_col, end_col)
+        self.start_row, self.end_row = min(start_row, end_row), max(start_row, end_row)
+
+    def __contains__(self, key: str):
+        col, row = get_col_row_from_key(key)
+        return self.start_col <= col <= self.end_col and self.start_row <= row <= self.end_row
+
+    def __iter__(self):
+        for col in range(self.start_col, self.end_col + 1):
+            column = get_column_name(col)
+            for row in range(self.start_row, self.end_row + 1):
+                yield f"{column}{row}"
+
+    def __len__(self):
+        return (self.end_col - self.start_col + 1) * (self.end_row - self.start_row + 1)
+
+    def __str__(self):
+        start = get_key_from_col_row(self.start_col, self.start_row)
+        end = get_key_from_col_row(self.end_col, self.end_row)
+        return f"{start}:{end}"
+
+    def corners(self):
+        """
+        Returns the keys of the top-left and bottom-right cells of the range.
+        """
+        return [
+            get_key_from_col_row(self.start_col, self.start_row),
+            get_key_from_col_row(self.end_col, self.end_row),
+        ]
+
+
+def get_input_values(inputs, values: dict):
+    """
+    Returns the values for the given inputs, as sent to the worker to run a cell.
+
+    Single keys that have no value yet are sent as 0. For ranges, only the cells that
+    have a value are sent, so a large range costs no more than the cells it contains.
+
+    Args:
+        inputs (iterable): The inputs of a cell, each a key or a range like "A1:Z5000".
+        values (dict): The current values of the cells in the sheet.
+
+    Returns:
+        dict: The values for the inputs, by key.
+    """
+    result = {}
+    for key in inputs:
+        if not ":" in key:
+            result[key] = values.get(key, 0)
+            continue
+        cells = CellRange(key)
+        if len(cells) < len(values):
+            result.update((key, values[key]) for key in cells if key in values)
+        else:
+            result.update((key, value) for key, value in values.items() if key in cells)
+    return result
+
+
 def find_inputs(script: str):
     """
     Finds all the input cell references in the given Python script.
@@ -154,13 +223,14 @@ def find_inputs(script: str):
     This function uses the `ast` module to parse the script and visit each node in
     the abstract syntax tree. It identifies any names that represent cell references
     and any constant values that represent cell range references, and adds them to a set of
-    input cell references.
+    input cell references. Ranges are kept as one normalized range, such as "A1:Z5000",
+    rather than expanded into all of their keys.
     
     Args:
         script (str): The Python script to analyze.
     
     Returns:
-        list: A list of all the input cell references found in the script.
+        list: A list of all the input cell references and ranges found in the script.
     """
     import ast # pylint: disable=import-outside-toplevel
 
@@ -169,9 +239,8 @@ def find_inputs(script: str):
         A class that visits the nodes of a Python script's abstract syntax tree
         (AST) to find all the input cell references in the script.
         """
-        inputs = set()
-
         def __init__(self, script):
+            self.inputs = set()
             self.visit(ast.parse(script))
 
         def add_input(self, s):
@@ -188,14 +257,7 @@ def find_inputs(script: str):
         def visit_Constant(self, node): # pylint: disable=invalid-name
             """ Visit an ast.Constant node """
             if is_cell_range_reference(node.value):
-                start, end = node.value.split(":")
-                start = start.strip()
-                end = end.strip()
-                start_col, start_row = get_col_row_from_key(start)
-                end_col, end_row = get_col_row_from_key(end)
-                for col in range(start_col, end_col + 1):
-                    for row in range(start_row, end_row + 1):
-                        self.add_input(get_key_from_col_row(col, row))
+                self.inputs.add(str(CellRange(node.value)))
             return node
 
     try:
@@ -227,6 +289,240 @@ def intercept_last_expression(script):
     return "\n".join(lines)
 
 
+class CodeCache():
+    """
+    A bounded least-recently-used cache of compiled cell scripts.
+
+    Each entry maps the script text to the code object compiled from the script
+    after `intercept_last_expression` rewrote it, so running an unchanged script
+    again skips both parsing and compiling.
+    """
+    def __init__(self, size=1024):
+        self.size = size
+        self.codes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, script: str):
+        """
+        Returns the compiled code for a script, compiling it if it was not cached.
+
+        Args:
+            script (str): The Python script to compile.
+
+        Returns:
+            code: The code object, which assigns the last expression to `_`.
+        """
+        code = self.codes.pop(script, None)
+        if code is None:
+            self.misses += 1
+            code = compile(intercept_last_expression(script), "<string>", "exec")
+            if len(self.codes) >= self.size:
+                del self.codes[next(iter(self.codes))]
+        else:
+            self.hits += 1
+        self.codes[script] = code
+        return code
+
+    def clear(self):
+        """
+        Removes all compiled scripts and resets the statistics.
+        """
+        self.codes.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """
+        Returns the number of cached scripts, hits, and misses.
+        """
+        return {
+            "size": len(self.codes),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class Namespace(dict):
+    """
+    The globals used to execute one cell script, which look up cell values lazily.
+
+    Names assigned by the script are stored in the namespace itself. Other names are
+    looked up in the given scopes, in order, only when the script uses them. Creating
+    a namespace therefore does not depend on the number of cells in the sheet.
+    """
+    def __init__(self, *scopes):
+        super().__init__()
+        self.scopes = scopes
+
+    def __missing__(self, name):
+        for scope in self.scopes:
+            if name in scope:
+                return scope[name]
+        raise KeyError(name)
+
+
+VECTOR_RUN_MINIMUM = 8
+VECTOR_EXACT_LIMIT = 2 ** 53
+
+
+def get_vector_template(key: str, script: str):
+    """
+    Describes a formula as an arithmetic expression over cells at fixed offsets from its own cell.
+
+    Formulas copied down a column, such as `B1 * C1` in D1 and `B2 * C2` in D2, share the same template.
+
+    Args:
+        key (str): The key of the cell that contains the formula.
+        script (str): The Python script of the formula.
+
+    Returns:
+        tuple: The template, the expression with each cell reference renamed after its offset,
+            and a dict from each offset name to the referenced key. Returns None when the
+            script is not a single arithmetic expression over cells and numbers.
+    """
+    import ast # pylint: disable=import-outside-toplevel
+    try:
+        tree = ast.parse(script)
+    except SyntaxError:
+        return None
+    if len(tree.body) != 1 or not isinstance(tree.body[0], ast.Expr):
+        return None
+    operators = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.UAdd, ast.USub)
+    col, row = get_col_row_from_key(key)
+    refs = {}
+    for node in ast.walk(tree.body[0].value):
+        if isinstance(node, ast.Name):
+            if not is_cell_reference(node.id):
+                return None
+            input_col, input_row = get_col_row_from_key(node.id)
+            name = f"_{input_col - col}_{input_row - row}".replace("-", "m")
+            refs[name] = node.id
+            node.id = name
+        elif isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float):
+                return None
+        elif isinstance(node, (ast.BinOp, ast.UnaryOp)):
+            if not isinstance(node.op, operators):
+                return None
+        elif not isinstance(node, (ast.Load, ast.operator, ast.unaryop)):
+            return None
+    if not refs:
+        return None
+    expression = tree.body[0].value
+    return ast.dump(expression), expression, refs
+
+
+def find_vector_runs(cells: list, minimum: int=VECTOR_RUN_MINIMUM):
+    """
+    Finds runs of copied formulas in an ordered batch that can be evaluated as one vector operation.
+
+    A run is only valid when all its inputs are computed before the first cell of the run.
+
+    Args:
+        cells (list): A list of [key, script] pairs, with each cell after its inputs.
+        minimum (int): The smallest number of cells worth vectorizing.
+
+    Returns:
+        list: The runs, each a dict with the template `expression`, the `keys` of its cells,
+            and the `inputs` for each offset name, as a list of keys aligned with `keys`.
+    """
+    positions = {}
+    runs = {}
+    for index, (key, script) in enumerate(cells):
+        positions[key] = index
+        template = get_vector_template(key, script)
+        if template:
+            runs.setdefault(template[0], []).append((key, template[1], template[2]))
+    result = []
+    for members in runs.values():
+        if len(members) < minimum:
+            continue
+        keys = [key for key, _, _ in members]
+        first = positions[keys[0]]
+        inputs = {
+            name: [refs[name] for _, _, refs in members]
+            for name in members[0][2]
+        }
+        if all(positions.get(key, -1) < first for column in inputs.values() for key in column):
+            result.append({
+                "expression": members[0][1],
+                "keys": keys,
+                "inputs": inputs,
+            })
+    return result
+
+
+def evaluate_vector_run(run: dict, values: dict):
+    """
+    Evaluates a run of copied formulas as one NumPy vector operation.
+
+    The result matches evaluating each formula separately. Runs that would not match,
+    such as ones with non-numeric inputs, divisions by zero, or integers too large
+    to be exact in floating point, are not evaluated.
+
+    Args:
+        run (dict): A run, as returned by `find_vector_runs`.
+        values (dict): The current values of the cells.
+
+    Returns:
+        list: The value of each cell in the run, or None if the run cannot be vectorized.
+    """
+    import ast # pylint: disable=import-outside-toplevel
+    try:
+        import numpy # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+
+    columns = {}
+    for name, keys in run["inputs"].items():
+        try:
+            column = [values[key] for key in keys]
+        except KeyError:
+            return None
+        kinds = set(type(value) for value in column)
+        if kinds not in ({int}, {float}):
+            return None
+        columns[name] = numpy.array(column, dtype=numpy.float64), kinds == {int}
+
+    functions = {
+        ast.Add: numpy.add,
+        ast.Sub: numpy.subtract,
+        ast.Mult: numpy.multiply,
+        ast.Div: numpy.true_divide,
+        ast.FloorDiv: numpy.floor_divide,
+        ast.Mod: numpy.remainder,
+    }
+
+    def evaluate(node):
+        if isinstance(node, ast.Name):
+            return columns[node.id]
+        if isinstance(node, ast.Constant):
+            return numpy.float64(node.value), isinstance(node.value, int)
+        if isinstance(node, ast.UnaryOp):
+            operand, is_int = evaluate(node.operand)
+            return (-operand if isinstance(node.op, ast.USub) else operand), is_int
+        left, left_int = evaluate(node.left)
+        right, right_int = evaluate(node.right)
+        value = functions[type(node.op)](left, right)
+        is_int = left_int and right_int and not isinstance(node.op, ast.Div)
+        if is_int and numpy.any(numpy.abs(value) >= VECTOR_EXACT_LIMIT):
+            raise OverflowError("integer result is not exact")
+        return value, is_int
+
+    if any(is_int and numpy.any(numpy.abs(column) >= VECTOR_EXACT_LIMIT) for column, is_int in columns.values()):
+        return None
+    try:
+        with numpy.errstate(all="ignore"):
+            value, is_int = evaluate(run["expression"])
+    except OverflowError:
+        return None
+    if not numpy.all(numpy.isfinite(value)):
+        return None
+    value = numpy.broadcast_to(value, (len(run["keys"]),)).tolist()
+    return [int(item) for item in value] if is_int else value
+
+
 def to_js(python_object):
     """
     Converts a Python object to a JavaScript object.
@@ -275,6 +571,39 @@ def shorten(s: str, length: int):
     return f"{s[:length - 3]}{s[length - 3:] and '...'}"
 
 
+def get_sheet_data(values: dict, selection: str, headers: bool=True):
+    """
+    Returns the columns of a spreadsheet selection, as used to create a DataFrame.
+
+    Empty cells in the selection are read as 0. Ranges sent to the worker only
+    include the cells that have a value, see `get_input_values`.
+
+    Args:
+        values (dict): The values of the cells, by key.
+        selection (str): A string representing the spreadsheet selection, in the format "start_key:end_key".
+        headers (bool): If True, the first row of the selection is used as the column headers.
+
+    Returns:
+        dict: The values of each column in the selection, by header.
+    """
+    try:
+        start, end = selection.split(":")
+        start_col, start_row = get_col_row_from_key(start)
+        end_col, end_row = get_col_row_from_key(end)
+    except Exception as exc: # pylint: disable=broad-except
+        raise ValueError(f"Parameter selection must be a range like 'A1:F14', not {selection}") from exc
+
+    data = {}
+    for col in range(start_col, end_col + 1):
+        keys = [
+            f"{index_to_col(col)}{row}" for row in range(start_row, end_row + 1)
+        ]
+        column = [ values.get(key, 0) for key in keys ]
+        header = column.pop(0) if headers else f"col-{col}"
+        data[header] = column
+    return data
+
+
 class PySheets():
     """
     A class that provides a simple interface for working with spreadsheet data.
@@ -303,22 +632,7 @@ class PySheets():
         assert isinstance(headers, bool), f"Parameter headers must be a bool, not {type(headers)}"
         import pandas as pd # pylint: disable=import-outside-toplevel,import-error
 
-        try:
-            start, end = selection.split(":")
-            start_col, start_row = get_col_row_from_key(start)
-            end_col, end_row = get_col_row_from_key(end)
-        except Exception as exc: # pylint: disable=broad-except
-            raise ValueError(f"Parameter selection must be a range like 'A1:F14', not {selection}") from exc
-
-        data = {}
-        for col in range(start_col, end_col + 1):
-            keys = [
-                f"{index_to_col(col)}{row}" for row in range(start_row, end_row + 1)
-            ]
-            values = [ self._inputs.get(key, "") for key in keys ]
-            header = values.pop(0) if headers else f"col-{col}"
-            data[header] = values
-        df = pd.DataFrame.from_dict(data)
+        df = pd.DataFrame.from_dict(get_sheet_data(self._inputs, selection, headers))
         if not isinstance(df, pd.DataFrame):
             return "Error: Incomplete Data"
         return df
@@ -416,6 +730,21 @@ class PySheets():
         import urllib # pylint: disable=import-outside-toplevel
         return urllib.request.urlopen(url)
 
+    def load_urls(self, urls:list):
+        """
+        Loads data from several URLs at once. The server fetches them concurrently,
+        which is much faster than loading them one after the other with `load_url`.
+        
+        Args:
+            urls (list): The URLs to load data from.
+        
+        Returns:
+            list: The loaded data for each URL, in the same order.
+        """
+        assert isinstance(urls, list), f"Parameter urls must be a list, not {type(urls)}"
+        import worker_patch # pylint: disable=import-outside-toplevel
+        return worker_patch.load_all(urls)
+
     def load_sheet(self, url:str):
         """
         Loads data from the provided URL and attempts to read it as an Excel or CSV file.
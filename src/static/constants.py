@@ -11,6 +11,13 @@ LARGE_PREVIEW_SIZE = 3 * 1024 * 1024
 
 DEFAULT_COLUMN_WIDTH = 72
 DEFAULT_ROW_HEIGHT = 16
+CELL_PADDING_AND_BORDER = 5
+ROW_HEADER_WIDTH = 61
+COLUMN_HEADER_HEIGHT = 30
+VIEWPORT_INITIAL_WIDTH = 2000
+VIEWPORT_INITIAL_HEIGHT = 1200
+VIEWPORT_OVERSCAN_COLUMNS = 4
+VIEWPORT_OVERSCAN_ROWS = 20
 DEFAULT_FONT_FAMILY = "Arial"
 DEFAULT_FONT_SIZE = "12px"
 DEFAULT_COLOR = "rgb(0, 0, 0)"
@@ -38,6 +45,13 @@ ANIMATION_DURATION_SLOW = 1000
 ANIMATION_DURATION_VERY_SLOW = 3000
 ANIMATION_DURATION = ANIMATION_DURATION_FAST
 MAX_EDITS_PER_SYNC = 500
+PASTE_CELLS_PER_FRAME = 2000
+HISTORY_MEMORY_BUDGET = 8 * 1024 * 1024
+AUTOSAVE_MIN_DELAY = 0.5
+AUTOSAVE_MAX_DELAY = 5
+AUTOSAVE_MAX_STALENESS = 10
+AUTOSAVE_COST_FACTOR = 10
+AUTOSAVE_DELAY_PER_CELL = 0.00002
 
 ICON_HOUR_GLASS = "⏳"
 ICON_DATAFRAME = "🐼"
@@ -69,6 +83,8 @@ TOPIC_WORKER_CODE_COMPLETE = "worker.code.complete"
 TOPIC_WORKER_CODE_COMPLETION = "worker.code.completion"
 TOPIC_WORKER_FIND_INPUTS = "worker.find.inputs"
 TOPIC_WORKER_INPUTS = "worker.inputs"
+TOPIC_WORKER_RUN_BATCH = "worker.run.batch"
+TOPIC_WORKER_RESULTS = "worker.results"
 TOPIC_WORKER_WIDGET_PROXY = "worker.widget.proxy"
 TOPIC_API_SET_CELLS = "api.set_cells"
 
@@ -80,6 +96,8 @@ TOPIC_WORKER_UPLOAD = "worker.import.upload"
 TOPIC_WORKER_UPLOADED = "worker.imported.uploaded"
 
 URL = "url"
+URLS = "urls"
+LOAD_BATCH_MAX_URLS = 32
 PROMPT = "prompt"
 PYTHON_RUNTIME = "runtime"
 PYTHON_PACKAGES = "packages"
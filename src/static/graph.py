@@ -0,0 +1,473 @@
+"""
+Copyright (c) 2024 laffra - All Rights Reserved.
+
+Maintains the dependency graph between cells and schedules recalculation.
+
+The graph keeps forward edges (the inputs of a cell) and reverse edges (the
+dependents of a cell). Edges are updated incrementally whenever the inputs of
+a cell are (re)discovered. A recalculation marks a set of cells and everything
+downstream of them as dirty. Cells are then handed out in topological order,
+and only once all of their dirty inputs have finished, so that each dirty cell
+runs exactly once per edit.
+
+Inputs can be rectangular ranges, such as "A1:Z5000". Those are kept as one
+edge to a compact `api.CellRange`, rather than one edge per key in the range.
+"""
+
+import api
+
+
+class CycleError(Exception):
+    """
+    Represents a circular dependency in the cell calculation graph.
+    """
+
+
+class DependencyGraph(): # pylint: disable=too-many-public-methods
+    """
+    A directed acyclic graph of cell keys, with a dirty set used to schedule recalculation.
+
+    For each cell, the graph counts how many of its inputs are dirty. Dirty cells whose
+    count is zero, and that are not running, are kept in a ready set. Counts are updated
+    when a cell becomes dirty or clean, by visiting its dependents only, so handing out
+    the next cells costs no more than the number of edges that leave the finished ones.
+    """
+
+    def __init__(self):
+        self.inputs = {}
+        self.dependents = {}
+        self.ranges = {}
+        self.range_columns = {}
+        self.dirty = set()
+        self.running = set()
+        self.rerun = set()
+        self.counts = {}
+        self.ready = set()
+        self.resolving = set()
+
+    def clear(self):
+        """
+        Removes all edges and forgets any pending recalculation.
+        """
+        self.inputs.clear()
+        self.dependents.clear()
+        self.ranges.clear()
+        self.range_columns.clear()
+        self.dirty.clear()
+        self.running.clear()
+        self.rerun.clear()
+        self.counts.clear()
+        self.ready.clear()
+        self.resolving.clear()
+
+    def is_resolved(self, key):
+        """
+        Returns whether the inputs for the given cell are known.
+        """
+        return key in self.inputs
+
+    def get_inputs(self, key):
+        """
+        Returns the set of cell keys and ranges the given cell reads from.
+        """
+        return self.inputs.get(key, set())
+
+    def get_dependents(self, key):
+        """
+        Returns the set of cell keys that read from the given cell, directly or through a range.
+        Only the ranges that cover the column of the cell are looked at.
+        """
+        dependents = self.dependents.get(key, set())
+        if not self.range_columns:
+            return dependents
+        col, _ = api.get_col_row_from_key(key)
+        for range_key in self.range_columns.get(col, ()):
+            cells, range_dependents = self.ranges[range_key]
+            if key in cells:
+                dependents = dependents | range_dependents
+        return dependents
+
+    def get_inputs_among(self, key, keys):
+        """
+        Returns the inputs of the given cell that are in `keys`, with ranges expanded
+        only as far as they overlap with `keys`.
+
+        Args:
+            key (str): The key of the cell.
+            keys (set): The keys to look for.
+
+        Returns:
+            set: The keys in `keys` that the cell reads from.
+        """
+        found = set()
+        for input_key in self.get_inputs(key):
+            if input_key in self.ranges:
+                found.update(self.get_range_among(self.ranges[input_key][0], keys))
+            elif input_key in keys:
+                found.add(input_key)
+        return found
+
+    @staticmethod
+    def get_range_among(cells, keys):
+        """
+        Returns the keys in `keys` that are inside a range, walking whichever of the two is smaller.
+        """
+        if len(cells) < len(keys):
+            return [key for key in cells if key in keys]
+        return [key for key in keys if key in cells]
+
+    def add_edge(self, input_key, key):
+        """
+        Records that `key` reads from `input_key`, which is a key or a range.
+        """
+        if ":" in input_key:
+            if input_key not in self.ranges:
+                cells = api.CellRange(input_key)
+                self.ranges[input_key] = cells, set()
+                for col in range(cells.start_col, cells.end_col + 1):
+                    if col not in self.range_columns:
+                        self.range_columns[col] = set()
+                    self.range_columns[col].add(input_key)
+            self.ranges[input_key][1].add(key)
+        else:
+            if input_key not in self.dependents:
+                self.dependents[input_key] = set()
+            self.dependents[input_key].add(key)
+
+    def remove_edge(self, input_key, key):
+        """
+        Forgets that `key` reads from `input_key`, which is a key or a range.
+        """
+        if input_key in self.ranges:
+            cells, range_dependents = self.ranges[input_key]
+            range_dependents.discard(key)
+            if not range_dependents:
+                del self.ranges[input_key]
+                for col in range(cells.start_col, cells.end_col + 1):
+                    self.range_columns[col].discard(input_key)
+                    if not self.range_columns[col]:
+                        del self.range_columns[col]
+        elif input_key in self.dependents:
+            self.dependents[input_key].discard(key)
+
+    def set_inputs(self, key, inputs):
+        """
+        Replaces the inputs of a cell and incrementally updates the reverse edges.
+
+        An input that would close a cycle is not recorded as an edge, so the graph
+        always stays acyclic and scheduling can never deadlock. Only new inputs are
+        checked, against the cells downstream of `key`, which are found once.
+
+        Args:
+            key (str): The key of the cell.
+            inputs (iterable): The keys and ranges of the cells that the cell reads from.
+
+        Returns:
+            list: The cycle that was detected, starting and ending with `key`, or an empty list.
+        """
+        old_inputs = self.inputs.get(key, set())
+        new_inputs = set()
+        downstream = None
+        cycle = []
+        for input_key in inputs:
+            if input_key not in old_inputs:
+                if downstream is None:
+                    downstream = self.get_downstream([key])
+                if self.reaches(input_key, downstream):
+                    cycle = [key] + self.find_cycle(key, input_key)[::-1]
+                    continue
+            new_inputs.add(input_key)
+        for input_key in old_inputs - new_inputs:
+            self.remove_edge(input_key, key)
+        for input_key in new_inputs - old_inputs:
+            self.add_edge(input_key, key)
+        self.inputs[key] = new_inputs
+        self.resolving.discard(key)
+        self.set_count(key, len(self.get_inputs_among(key, self.dirty)))
+        return cycle
+
+    def resolve(self, inputs):
+        """
+        Records the inputs discovered for several running cells at once, and puts those cells
+        back in the dirty set. Cells whose inputs are discovered together, such as a pasted
+        column, can then run together in one batch.
+
+        Args:
+            inputs (dict): The keys and ranges each cell reads from, by key of the cell.
+
+        Returns:
+            dict: The cycle detected for each cell that closes one, by key of the cell.
+        """
+        cycles = {}
+        for key, cell_inputs in inputs.items():
+            cycle = self.set_inputs(key, cell_inputs)
+            if cycle:
+                cycles[key] = cycle
+        for key in inputs:
+            self.postpone(key)
+        return cycles
+
+    def reaches(self, input_key, keys):
+        """
+        Returns whether `input_key`, which is a key or a range, contains any of the given keys.
+        """
+        if ":" in input_key:
+            return bool(self.get_range_among(api.CellRange(input_key), keys))
+        return input_key in keys
+
+    def invalidate(self, key):
+        """
+        Forgets the inputs of a cell, for instance because its script changed.
+        The dependents of the cell are kept.
+        """
+        for input_key in self.inputs.pop(key, set()):
+            self.remove_edge(input_key, key)
+        self.set_count(key, 0)
+        if key in self.running:
+            self.resolving.add(key)
+
+    def remove(self, key):
+        """
+        Removes a cell from the graph, including any pending recalculation for it.
+        """
+        self.invalidate(key)
+        self.set_clean(key)
+        self.running.discard(key)
+        self.rerun.discard(key)
+        self.resolving.discard(key)
+
+    def find_cycle(self, key, input_key):
+        """
+        Finds a path along the dependents edges from `key` to `input_key`, which is
+        a key or a range. A range is reached when the path arrives at any of its cells.
+
+        Returns:
+            list: The keys on the path, ending with the key reached, or an empty list.
+        """
+        if not ":" in input_key:
+            return self.find_path(key, input_key)
+        cells = api.CellRange(input_key)
+        if key in cells:
+            return [key]
+        for other in self.get_downstream([key]):
+            if other in cells:
+                return self.find_path(key, other)
+        return []
+
+    def find_path(self, start, end):
+        """
+        Finds a path along the dependents edges from `start` to `end`.
+
+        Returns:
+            list: The keys on the path, starting with `start` and ending with `end`, or an empty list.
+        """
+        if start == end:
+            return [start]
+        parents = {start: None}
+        todo = [start]
+        while todo:
+            key = todo.pop()
+            for dependent in self.get_dependents(key):
+                if dependent in parents:
+                    continue
+                parents[dependent] = key
+                if dependent == end:
+                    path = [end]
+                    while parents[path[-1]] is not None:
+                        path.append(parents[path[-1]])
+                    path.reverse()
+                    return path
+                todo.append(dependent)
+        return []
+
+    def get_downstream(self, keys):
+        """
+        Returns the given keys plus all cells that transitively depend on them.
+        """
+        seen = set(keys)
+        todo = list(keys)
+        while todo:
+            for dependent in self.get_dependents(todo.pop()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    todo.append(dependent)
+        return seen
+
+    def sort(self, keys):
+        """
+        Sorts the given keys in topological order, inputs before dependents.
+
+        Args:
+            keys (iterable): The keys to sort.
+
+        Returns:
+            list: The keys in an order where each cell comes after all of its inputs.
+        """
+        keys = set(keys)
+        counts = {}
+        for key in keys:
+            counts[key] = len(self.get_inputs_among(key, keys))
+        order = sorted(key for key, count in counts.items() if count == 0)
+        index = 0
+        while index < len(order):
+            for dependent in sorted(self.get_dependents(order[index])):
+                if dependent in counts:
+                    counts[dependent] -= 1
+                    if counts[dependent] == 0:
+                        order.append(dependent)
+            index += 1
+        if len(order) != len(keys):
+            raise CycleError(f"Dependency cycle among {sorted(keys - set(order))}")
+        return order
+
+    def set_count(self, key, count):
+        """
+        Sets the number of dirty inputs of a cell, and updates whether it is ready.
+        """
+        if count:
+            self.counts[key] = count
+        else:
+            self.counts.pop(key, None)
+        self.update_ready(key)
+
+    def update_counts(self, key, delta):
+        """
+        Adds `delta` to the number of dirty inputs of each dependent of a cell that became dirty or clean.
+        """
+        for dependent in self.get_dependents(key):
+            self.set_count(dependent, self.counts.get(dependent, 0) + delta)
+
+    def update_ready(self, key):
+        """
+        Adds a cell to the ready set when it is dirty, not running, and has no dirty inputs, or removes it otherwise.
+        """
+        if key in self.dirty and key not in self.running and key not in self.counts:
+            self.ready.add(key)
+        else:
+            self.ready.discard(key)
+
+    def set_clean(self, key):
+        """
+        Removes a cell from the dirty set, which may make its dependents ready.
+        """
+        if key in self.dirty:
+            self.dirty.discard(key)
+            self.ready.discard(key)
+            self.update_counts(key, -1)
+
+    def mark_dirty(self, keys):
+        """
+        Marks the given cells and everything downstream of them as needing recalculation.
+
+        Cells that are currently running are scheduled to run again once they finish.
+        """
+        for key in self.get_downstream(keys):
+            if key in self.running:
+                self.rerun.add(key)
+            if key not in self.dirty:
+                self.dirty.add(key)
+                self.update_counts(key, 1)
+                self.update_ready(key)
+
+    def is_dirty(self, key):
+        """
+        Returns whether the given cell is waiting to be recalculated.
+        """
+        return key in self.dirty
+
+    def is_ready(self, key):
+        """
+        Returns whether the given dirty cell can run, meaning none of its inputs are dirty.
+        """
+        return key in self.ready
+
+    def start(self, keys):
+        """
+        Marks the given ready cells as running.
+        """
+        for key in keys:
+            self.ready.discard(key)
+            self.running.add(key)
+            if key not in self.inputs:
+                self.resolving.add(key)
+
+    def take_ready(self, accept=None):
+        """
+        Returns the dirty cells that can run now, in a stable order, and marks them as running.
+        Ready cells never read from each other, so any order is a topological order.
+
+        Args:
+            accept (callable, optional): Called with a key, returns whether to take that cell.
+        """
+        ready = sorted(key for key in self.ready if accept is None or accept(key))
+        self.start(ready)
+        return ready
+
+    def take_batch(self, can_batch):
+        """
+        Returns the largest set of dirty cells that can run back-to-back, in topological
+        order, and marks them as running.
+
+        The batch starts with the ready cells that `can_batch` accepts. A dependent joins
+        the batch once all of its dirty inputs are in the batch, and `can_batch` accepts it.
+        No batch is returned while a cell that feeds the same cells as the batch is still
+        waiting for its inputs to be discovered, as that cell may join the next batch.
+
+        Args:
+            can_batch (callable): Called with a key, returns whether that cell can be batched.
+
+        Returns:
+            list: The keys of the cells in the batch.
+        """
+        batch = sorted(key for key in self.ready if can_batch(key))
+        waiting = {}
+        index = 0
+        while index < len(batch):
+            for dependent in sorted(self.get_dependents(batch[index])):
+                if dependent not in self.dirty or dependent in self.running:
+                    continue
+                waiting[dependent] = waiting.get(dependent, self.counts.get(dependent, 0)) - 1
+                if waiting[dependent] == 0 and can_batch(dependent):
+                    batch.append(dependent)
+            index += 1
+        if self.is_resolving(batch):
+            return []
+        self.start(batch)
+        return batch
+
+    def is_resolving(self, keys=None):
+        """
+        Returns whether a running cell is still waiting for its inputs to be discovered.
+
+        Args:
+            keys (iterable, optional): When given, only running cells that feed the same
+                cells as these keys count, found through the known inputs of those cells.
+        """
+        if not self.resolving or keys is None:
+            return bool(self.resolving)
+        fed = set()
+        for key in keys:
+            fed.update(self.get_dependents(key))
+        return any(self.get_inputs_among(key, self.resolving) for key in fed)
+
+    def postpone(self, key):
+        """
+        Puts a running cell back in the dirty set, for instance after its inputs
+        were discovered and some of them turned out to be dirty.
+        """
+        self.running.discard(key)
+        self.rerun.discard(key)
+        self.resolving.discard(key)
+        self.update_ready(key)
+
+    def finish(self, key):
+        """
+        Marks a cell as recalculated, so that its dependents may run.
+        """
+        self.running.discard(key)
+        self.resolving.discard(key)
+        if key in self.rerun:
+            self.rerun.discard(key)
+            self.update_ready(key)
+        else:
+            self.set_clean(key)
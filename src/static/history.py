@@ -3,17 +3,44 @@ Copyright (c) 2024 laffra - All Rights Reserved.
 
 Manages the history of edits made to a sheet, including adding new edits, flushing changes to storage,
 and undoing the most recent edit.
+
+The history is kept within a memory budget, measured as the size of the encoded edits.
+Edits that can never be undone, such as a selection change, are not kept at all, nor shown
+in the timeline. When the
+budget is exceeded, the oldest edits are spilled to storage, and they are loaded again one
+at a time when the user undoes past the edits that are still in memory.
+
+Changes are saved after a debounce delay that adapts to the measured cost of saving and
+the size of the sheet, with an upper bound on how long changes can remain unsaved.
 """
 
 
+import json
 import ltk
 
+import constants
 import state
 import storage
 import models
 import timeline
 
 history = []
+sizes = {}
+spilled = []
+memory = 0
+budget = constants.HISTORY_MEMORY_BUDGET
+spill_count = 0
+group = None
+
+NOT_UNDOABLE = (
+    models.EmptyEdit,
+    models.SelectionChanged,
+    models.ScreenshotChanged,
+    models.PackagesChanged,
+    models.PreviewValueChanged,
+    models.PreviewDeleted,
+    models.SheetDelta,
+)
 
 
 class SingleEdit:
@@ -22,52 +49,191 @@ class SingleEdit:
     """
     def __init__(self, description):
         self.description = description
+        self.opened = False
 
     def __enter__(self):
-        add(models.EditGroup(self.description))
+        global group # pylint: disable=global-statement
+        if group is None:
+            add(models.EditGroup(self.description))
+            group = history[-1]
+            self.opened = True
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        add(models.EmptyEdit())
-        flush()  # Flush changes when exiting the context
+        global group # pylint: disable=global-statement
+        if self.opened:
+            group = None
+        schedule_flush()
+
+
+def clear():
+    """
+    Forgets all edits, including the ones spilled to storage.
+    """
+    global memory, spill_count, group # pylint: disable=global-statement
+    history.clear()
+    sizes.clear()
+    spilled.clear()
+    memory = 0
+    spill_count = 0
+    group = None
+
+
+def get_size(edit):
+    """
+    Returns the approximate memory used by an edit, as the length of its encoding.
+    """
+    return len(json.dumps(edit, default=str))
 
 
+def set_budget(size):
+    """
+    Sets the memory budget of the history, in bytes, and spills edits when it is exceeded.
+    """
+    global budget # pylint: disable=global-statement
+    budget = size
+    compact()
 
 
 def add(edit):
     """
     Adds an edit to the history and schedules a flush of the changes to storage.
     """
+    global memory # pylint: disable=global-statement
     if isinstance(edit, models.EmptyEdit):
         return
-    if history and isinstance(history[-1], models.EditGroup):
-        history[-1].add(edit)
-    else:
-        history.append(edit)
-        timeline.add_edit(edit)
+    if not isinstance(edit, NOT_UNDOABLE):
+        size = get_size(edit)
+        memory += size
+        if group is not None and history and history[-1] is group:
+            group.add(edit)
+            sizes[id(group)] = sizes.get(id(group), 0) + size
+        else:
+            history.append(edit)
+            sizes[id(edit)] = size
+            timeline.add_edit(edit)
+            compact()
 
     schedule_flush()
 
 
-flush_scheduled = False
+def resize(edit):
+    """
+    Measures an edit in the history again, after it was changed since it was added,
+    such as a paste that fills its edit one slice at a time.
+    """
+    global memory # pylint: disable=global-statement
+    if id(edit) in sizes:
+        size = get_size(edit)
+        memory += size - sizes[id(edit)]
+        sizes[id(edit)] = size
+        compact()
+
+
+def compact():
+    """
+    Spills the oldest edits to storage until the history fits in its memory budget.
+    The most recent edit always stays in memory.
+    """
+    global memory # pylint: disable=global-statement
+    while memory > budget and len(history) > 1:
+        edit = history.pop(0)
+        memory -= sizes.pop(id(edit), 0)
+        timeline.remove(edit)
+        spill(edit)
+
+
+def spill(edit):
+    """
+    Writes an edit to storage, so it can be loaded again when the user undoes it.
+    """
+    global spill_count # pylint: disable=global-statement
+    uid = state.SHEET.uid
+    if spill_count == 0:
+        storage.clear_history(uid)
+    spill_count += 1
+    spilled.append(spill_count)
+    storage.spill_edit(uid, spill_count, json.dumps(edit, default=str))
+
+
+def restore(done=None):
+    """
+    Loads the most recently spilled edit back into the history.
+
+    Args:
+        done (callable, optional): Called when the edit was loaded.
+    """
+    seq = spilled.pop()
+
+    def loaded(data):
+        global memory # pylint: disable=global-statement
+        if data:
+            edit = models.convert(json.loads(data))
+            history.insert(0, edit)
+            sizes[id(edit)] = len(data)
+            memory += len(data)
+        if done:
+            done()
+
+    storage.load_edit(state.SHEET.uid, seq, loaded)
+
+
+dirty_since = None
+save_cost = 0
+
+
+def get_flush_delay(cell_count, elapsed):
+    """
+    Returns how long to wait before saving the sheet, in seconds.
+
+    Saving is postponed for a multiple of the measured cost of a save, so saving takes only
+    a small fraction of the time, and a little longer for large sheets. The delay is restarted
+    by every edit, but changes are never left unsaved for longer than `AUTOSAVE_MAX_STALENESS`.
+
+    Args:
+        cell_count (int): The number of cells in the sheet.
+        elapsed (float): The number of seconds since the oldest unsaved edit.
+
+    Returns:
+        float: The delay in seconds.
+    """
+    delay = save_cost * constants.AUTOSAVE_COST_FACTOR + cell_count * constants.AUTOSAVE_DELAY_PER_CELL
+    delay = min(constants.AUTOSAVE_MAX_DELAY, max(constants.AUTOSAVE_MIN_DELAY, delay))
+    return max(0, min(delay, constants.AUTOSAVE_MAX_STALENESS - elapsed))
+
 
 def schedule_flush():
     """
-    Schedules a flush of the changes to storage.
+    Schedules a flush of the changes to storage, postponing any flush that was scheduled already.
+    """
+    global dirty_since # pylint: disable=global-statement
+    now = ltk.get_time()
+    if dirty_since is None:
+        dirty_since = now
+    cell_count = len(state.SHEET.cells) if state.SHEET else 0
+    ltk.schedule(flush, "flush events", get_flush_delay(cell_count, now - dirty_since))
+
+
+def flush_pending():
+    """
+    Flushes the changes to storage right away, if there are any. Used when the page is closed.
     """
-    global flush_scheduled
-    if not flush_scheduled:
-        flush_scheduled = True
-        ltk.schedule( flush, "flush events", 0)
+    if dirty_since is not None:
+        flush()
 
 
 def flush():
     """
     Flushes the changes to the storage and schedules a status update to be displayed after a short delay.
+    The cost of the save is measured, to decide how long to wait before the next one.
     """
-    global flush_scheduled
-    flush_scheduled = False
+    global dirty_since, save_cost # pylint: disable=global-statement
+    dirty_since = None
+    start = ltk.get_time()
     storage.save(state.SHEET)
+    duration = ltk.get_time() - start
+    save_cost = duration if save_cost == 0 else (save_cost + duration) / 2
+    state.console.write("autosave", f"[History] Saved changes in {duration * 1000:.0f}ms")
     ltk.schedule(show_status, "show status", 0.3)
 
 
@@ -89,9 +255,15 @@ def undo(sheet):
     Returns:
         None
     """
+    global memory # pylint: disable=global-statement
     while history:
         edit = history.pop()
+        memory -= sizes.pop(id(edit), 0)
         timeline.remove(edit)
         if edit.undo(sheet):
             schedule_flush()
+            if not history and spilled:
+                restore()
             return
+    if spilled:
+        restore(lambda: undo(sheet))
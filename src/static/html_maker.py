@@ -2,10 +2,14 @@
 Copyright (c) 2024 laffra - All Rights Reserved. 
 
 This module creates the HTML for the sheet.
+
+Only the rows and columns in the window of the given `viewport.Viewport` are
+rendered. The rows and columns outside of it are replaced by spacers.
 """
 
 import api
 import models
+import viewport
 
 
 def make_css(sheet: models.Sheet):
@@ -35,13 +39,33 @@ def make_column_label(col: int):
     return f'<div class="column-label pysheets-col-{col}" id="pysheets-col-{col}" col="{col}"">{label}</div>'
 
 
-def make_column_header(sheet: models.Sheet):
+def make_spacer(width=0, height=0):
+    """
+    Generates the HTML markup for a spacer that takes the place of rows or columns that are not rendered.
+    """
+    if width <= 0 and height <= 0:
+        return ""
+    return f'<div class="sheet-spacer" style="min-width:{width}px;height:{height}px;"></div>'
+
+
+def make_column_labels(view: viewport.Viewport):
+    """
+    Generates the HTML for the column labels in the window of the viewport.
+    """
+    return "".join(
+        [ make_spacer(width=view.get_column_left(view.first_column)) ] +
+        [ make_column_label(col) for col in range(view.first_column, view.last_column + 1) ] +
+        [ make_spacer(width=view.get_width() - view.get_column_left(view.last_column + 1)) ]
+    )
+
+
+def make_column_header(view: viewport.Viewport):
     """
     Generates the HTML for the column header of the sheet.
     """
     return "".join((
         [ '<div id="column-header" class="column-header">' ] +
-        [ make_column_label(col) for col in range(1, sheet.column_count + 1) ] +
+        [ make_column_labels(view) ] +
         [ '</div>' ]
     ))
 
@@ -59,10 +83,9 @@ def make_cell(col, row, sheet):
         str: The HTML markup for the cell.
     """
     key = api.get_key_from_col_row(col, row)
-    cell = sheet.cells.get(key, models.Cell())
-    value = cell.value or cell.script
+    value = sheet.cells.get_value(key) or sheet.cells.get_script(key)
     value = value.replace("<", "&lt;").replace(">", "&gt;") if isinstance(value, str) else value
-    styles = [f"{name}:{value}" for name, value in cell.style.items()] + [
+    styles = [f"{name}:{value}" for name, value in sheet.cells.get_style(key).items()] + [
         "padding:2px",
     ]
     style = f'style="{";".join(styles)};"' if styles else ""
@@ -84,47 +107,80 @@ def make_row_label(row: int, sheet: models.Sheet):
     return f'<div class="row-label row-{row}" {style} row="{row}">{row}</div>\n'
 
 
-def make_row_header(sheet: models.Sheet):
+def make_row_labels(sheet: models.Sheet, view: viewport.Viewport):
+    """
+    Generates the HTML markup for the row labels in the window of the viewport.
+    """
+    return "".join(
+        [ make_spacer(height=view.get_row_top(view.first_row)) ] +
+        [ make_row_label(row, sheet) for row in range(view.first_row, view.last_row + 1) ] +
+        [ make_spacer(height=view.get_height() - view.get_row_top(view.last_row + 1)) ]
+    )
+
+
+def make_row_header(sheet: models.Sheet, view: viewport.Viewport):
     """
     Generates the HTML markup for the row header of the sheet, which includes the row labels.
     
     Args:
         sheet (models.Sheet): The sheet object containing the row information.
+        view (viewport.Viewport): The viewport that decides which rows are rendered.
     
     Returns:
         str: The HTML markup for the row header.
     """
     return "".join(
         [ '\n<div id="row-header" class="row-header">' ] +
-        [ make_row_label(row, sheet) for row in range(1, sheet.row_count + 1) ] +
+        [ make_row_labels(sheet, view) ] +
         [ '</div>\n']
     )
 
 
-def make_row(row: int, sheet: models.Sheet):
+def make_row(row: int, sheet: models.Sheet, view: viewport.Viewport):
     """
     Generates the HTML markup for a row in the sheet, containing the cells for that row.
     
     Args:
         row (int): The row index, starting from 1.
         sheet (models.Sheet): The sheet object containing the row information.
+        view (viewport.Viewport): The viewport that decides which columns are rendered.
     
     Returns:
         str: The HTML markup for the row.
     """
     return "\n".join(
         [ f'\n<div id="row-{row}" class="cell-row">' ] +
-        [ make_cell(col, row, sheet) for col in range(1, sheet.column_count + 1) ] +
+        [ make_spacer(width=view.get_column_left(view.first_column)) ] +
+        [ make_cell(col, row, sheet) for col in range(view.first_column, view.last_column + 1) ] +
         [ '</div>\n' ]
     )
 
 
-def make_html(sheet: models.Sheet):
+def make_grid(sheet: models.Sheet, view: viewport.Viewport):
+    """
+    Generates the HTML markup for the rows in the window of the viewport.
+    
+    Args:
+        sheet (models.Sheet): The sheet object containing the data to be rendered.
+        view (viewport.Viewport): The viewport that decides which rows and columns are rendered.
+    
+    Returns:
+        str: The HTML markup for the rendered rows, with spacers for the rows before and after them.
+    """
+    return "".join(
+        [ make_spacer(height=view.get_row_top(view.first_row)) ] +
+        [ make_row(row, sheet, view) for row in range(view.first_row, view.last_row + 1) ] +
+        [ make_spacer(height=view.get_height() - view.get_row_top(view.last_row + 1)) ]
+    )
+
+
+def make_html(sheet: models.Sheet, view: viewport.Viewport):
     """
     Generates the HTML markup for the entire sheet, including the column header, row header, and grid of cells.
     
     Args:
         sheet (models.Sheet): The sheet object containing the data to be rendered.
+        view (viewport.Viewport): The viewport that decides which rows and columns are rendered.
     
     Returns:
         str: The HTML markup for the entire sheet.
@@ -132,10 +188,12 @@ def make_html(sheet: models.Sheet):
     return "".join(
         [
             "<div class='sheet' id='sheet' font-family:Arial; font-size: 14px;'>",
-                make_column_header(sheet),
-                make_row_header(sheet),
+                make_column_header(view),
+                make_row_header(sheet, view),
                 "<div class='sheet-grid' id='sheet-grid'>",
-                    "\n\n".join([ make_row(row, sheet) for row in range(1, sheet.row_count + 1) ]),
+                    "<div id='sheet-cells'>",
+                        make_grid(sheet, view),
+                    "</div>",
                 "</div>",
                 "<div class='blank'>",
             "</div>",
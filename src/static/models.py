@@ -13,6 +13,10 @@ try:
     import constants
 except ImportError:
     from static import constants
+try:
+    from json.encoder import encode_basestring_ascii as encode_string
+except ImportError:
+    encode_string = json.dumps
 
 
 class NoNotifications:
@@ -20,14 +24,18 @@ class NoNotifications:
 
     frozen = False
 
+    def __init__(self):
+        self.was_frozen = False
+
     def __enter__(self):
         """ Enter the context manager """
+        self.was_frozen = NoNotifications.frozen
         NoNotifications.frozen = True
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        """ Leave the context manager """
-        NoNotifications.frozen = False
+        """ Leave the context manager, keeping notifications frozen when nested in another one """
+        NoNotifications.frozen = self.was_frozen
 
 
 def freeze():
@@ -116,6 +124,70 @@ def escape(value: str):
     return json.dumps(value)
 
 
+def quote(value):
+    """
+    Encodes a field of a cell as JSON. Strings, the most common fields, are escaped
+    with the C function that `json.dumps` uses for them, when it is available.
+
+    Args:
+        value (Any): The value to encode.
+
+    Returns:
+        str: The JSON-formatted value.
+    """
+    if isinstance(value, str):
+        return encode_string(value)
+    return json.dumps(value)
+
+
+def encode_cell(buffer: list, key, value, script, prompt, style,  # pylint: disable=too-many-arguments
+                prefix="", suffix=""):
+    """
+    Encodes the fields of a cell straight into a buffer. The text before and after the fields,
+    such as the key and braces of the cell's entry in a sheet, is written along with them,
+    so that a cell with only a script takes a single string.
+
+    Args:
+        buffer (list): A list to append the encoded fields to.
+        key (str): The key of the cell.
+        value (Any): The value of the cell, only encoded when it differs from the script.
+        script (str): The script of the cell.
+        prompt (str): The AI prompt of the cell.
+        style (dict): The style of the cell, only encoded for non-default properties.
+        prefix (str): The text to write before the fields.
+        suffix (str): The text to write after the fields.
+    """
+    if value != "" and value != script:
+        buffer.append(prefix + '"value":' + quote(value) + ",")
+        prefix = ""
+    if prompt:
+        buffer.append(prefix + '"prompt":' + quote(prompt) + ",")
+        prefix = ""
+    if style:
+        if prefix:
+            buffer.append(prefix)
+            prefix = ""
+        encode_style(buffer, style)
+    buffer.append(prefix + '"key":"' + key + '","s":' + quote(script) + suffix)
+
+
+def encode_style(buffer: list, style: dict):
+    """
+    Encodes the style properties of a cell into a list of JSON-formatted strings.
+
+    Args:
+        buffer (list): A list to append the encoded style properties to.
+        style (dict): The style properties of the cell.
+    """
+    separator = '"style":{'
+    for prop, value in style.items():
+        if value != constants.DEFAULT_STYLE.get(prop):
+            buffer.append(separator + '"' + prop + '":' + quote(value))
+            separator = ","
+    if separator == ",":
+        buffer.append("},")
+
+
 def get_sheet(data, uid=None):
     """
     Attempts to decode the provided data into a Sheet object. If the data is empty,
@@ -209,10 +281,24 @@ class Model(SerializableDict):
         """
         self._listeners.append(callback)
 
+    def track(self, callback):
+        """
+        Registers a callback that is called with the model after each change to one of its
+        fields, even when notifications are frozen. This is used to save only what changed.
+
+        Args:
+            callback (callable): A function that accepts the model instance.
+        """
+        object.__setattr__(self, "_tracker", callback)
+
     def __setattr__(self, name: str, value):
         super().__setattr__(name, value)
-        if not frozen() and not name.startswith("_"):
-            self.notify_listeners({ "name": name })
+        if not name.startswith("_"):
+            tracker = getattr(self, "_tracker", None)
+            if tracker:
+                tracker(self)
+            if not frozen():
+                self.notify_listeners({ "name": name })
 
     def notify(self, listener, info):
         """
@@ -236,6 +322,266 @@ class Model(SerializableDict):
                 self.notify(listener, info)
 
 
+SHEET_DELTA_FIELDS = ["name", "selected", "screenshot", "packages", "columns", "rows"]
+SHEET_METADATA_FIELDS = ["uid", "name", "screenshot", "created_timestamp", "updated_timestamp"]
+
+
+class CellStore():
+    """
+    A compact, columnar store for the cells of a sheet.
+
+    Cells that were loaded but not used yet are kept as plain values, in one dict per
+    field, and only non-empty fields are stored. A `Cell` model is created the first
+    time a cell is accessed and kept from then on, so its listeners stay attached.
+    The store behaves like a dict from keys to `Cell` models.
+
+    The extents of the cells, the largest column and row in use, are maintained
+    as cells are added, so saving a sheet does not need to visit every cell twice.
+    """
+    def __init__(self, cells=None):
+        self.models = {}
+        self.scripts = {}
+        self.values = {}
+        self.prompts = {}
+        self.styles = {}
+        self.column_count = 0
+        self.row_count = 0
+        self.extents_stale = False
+        self.changed = set()
+        for key, cell in (cells or {}).items():
+            if isinstance(cell, Cell):
+                self.models[key] = cell
+                cell.track(self.cell_changed)
+                self.extend(key)
+            else:
+                self.load(key, cell)
+
+    def cell_changed(self, cell):
+        """
+        Records that a cell changed since the sheet was last saved.
+        """
+        self.changed.add(cell.key)
+
+    def load(self, key, cell: dict):
+        """
+        Stores a cell without creating a `Cell` model for it, using the same defaults as `Cell`.
+
+        Args:
+            key (str): The key of the cell.
+            cell (dict): The stored fields of the cell.
+        """
+        value = cell.get("value", "")
+        self.scripts[key] = cell.get("script") or cell.get("s") or value
+        self.extend(key)
+        if value != "":
+            self.values[key] = value
+        if cell.get("prompt"):
+            self.prompts[key] = cell["prompt"]
+        if cell.get("style"):
+            self.styles[key] = cell["style"]
+
+    def update(self, key, script, style, value=None):
+        """
+        Sets the script and style of a cell, without creating a `Cell` model for it.
+        This is used for bulk edits, such as a paste, where most cells are not used afterwards.
+
+        Unless a value is given, the value of a formula is cleared until the formula runs again,
+        and any other script is its own value. Cells that already have a model are updated
+        through the model, so their tracker still runs.
+
+        Args:
+            key (str): The key of the cell.
+            script (str): The new script of the cell.
+            style (dict): The new style of the cell.
+            value (Any, optional): The new value of the cell.
+        """
+        if value is None:
+            value = "" if script.startswith("=") else script
+        if key in self.models:
+            cell = self.models[key]
+            cell.script = script
+            cell.value = value
+            cell.style = style
+        else:
+            self.scripts[key] = script
+            self.values.pop(key, None)
+            self.styles.pop(key, None)
+            if value != "":
+                self.values[key] = value
+            if style:
+                self.styles[key] = style
+            self.extend(key)
+        self.changed.add(key)
+
+    def extend(self, key):
+        """
+        Grows the extents of the store to include the given key.
+        """
+        column, row = api.get_col_row_from_key(key)
+        if column > self.column_count:
+            self.column_count = column
+        if row > self.row_count:
+            self.row_count = row
+
+    def get_extents(self):
+        """
+        Returns the largest column and row in use, recomputing them only after a cell
+        on the edge of the extents was removed.
+
+        Returns:
+            tuple: The column count and the row count.
+        """
+        if self.extents_stale:
+            self.column_count = self.row_count = 0
+            self.extents_stale = False
+            for key in self:
+                self.extend(key)
+        return self.column_count, self.row_count
+
+    def get_script(self, key):
+        """
+        Returns the script of a cell, without creating its `Cell` model.
+        """
+        if key in self.models:
+            return self.models[key].script
+        return self.scripts.get(key, "")
+
+    def get_value(self, key):
+        """
+        Returns the value of a cell, without creating its `Cell` model.
+        """
+        if key in self.models:
+            return self.models[key].value
+        return self.values.get(key, "")
+
+    def get_style(self, key):
+        """
+        Returns the style of a cell, without creating its `Cell` model.
+        """
+        if key in self.models:
+            return self.models[key].style
+        return self.styles.get(key, {})
+
+    def get_prompt(self, key):
+        """
+        Returns the AI prompt of a cell, without creating its `Cell` model.
+        """
+        if key in self.models:
+            return self.models[key].prompt
+        return self.prompts.get(key, "")
+
+    def get_fields(self, key):
+        """
+        Returns the stored fields of a cell, in the format accepted by `load`.
+        """
+        return {
+            "value": self.get_value(key),
+            "s": self.get_script(key),
+            "prompt": self.get_prompt(key),
+            "style": self.get_style(key),
+        }
+
+    def __contains__(self, key):
+        return key in self.models or key in self.scripts
+
+    def __getitem__(self, key):
+        if not key in self.models:
+            if not key in self.scripts:
+                raise KeyError(key)
+            self.models[key] = Cell(
+                key=key,
+                script=self.scripts.pop(key),
+                value=self.values.pop(key, ""),
+                prompt=self.prompts.pop(key, ""),
+                style=self.styles.pop(key, None),
+            )
+            self.models[key].track(self.cell_changed)
+        return self.models[key]
+
+    def __setitem__(self, key, cell):
+        self.discard(key)
+        self.models[key] = cell
+        cell.track(self.cell_changed)
+        self.changed.add(key)
+        self.extend(key)
+
+    def __delitem__(self, key):
+        if not key in self:
+            raise KeyError(key)
+        self.discard(key)
+
+    def discard(self, key):
+        """
+        Removes a cell from the store, if it is there.
+        """
+        if key in self:
+            self.changed.add(key)
+            column, row = api.get_col_row_from_key(key)
+            if column >= self.column_count or row >= self.row_count:
+                self.extents_stale = True
+        self.models.pop(key, None)
+        self.scripts.pop(key, None)
+        self.values.pop(key, None)
+        self.prompts.pop(key, None)
+        self.styles.pop(key, None)
+
+    def __iter__(self):
+        yield from list(self.scripts)
+        yield from list(self.models)
+
+    def __len__(self):
+        return len(self.scripts) + len(self.models)
+
+    def get(self, key, default=None):
+        """
+        Returns the `Cell` model for a key, or the default if the sheet has no such cell.
+        """
+        return self[key] if key in self else default
+
+    def keys(self):
+        """
+        Returns the keys of all cells.
+        """
+        return list(self)
+
+    def items(self):
+        """
+        Returns the keys and `Cell` models of all cells, creating any models that do not exist yet.
+        """
+        return [(key, self[key]) for key in self]
+
+    def __eq__(self, other):
+        keys = other.keys() if isinstance(other, (dict, CellStore)) else None
+        return keys is not None and set(keys) == set(self)
+
+    def encode(self, buffer: list):
+        """
+        Encodes the cells that have changes into a buffer, as a sequence of JSON object entries.
+
+        Fields are written straight into the buffer, a single string for most cells, and stored
+        cells are encoded straight from their fields, without creating a `Cell` model.
+
+        Args:
+            buffer (list): A list to which the encoded cell data will be appended.
+        """
+        separator = ""
+        models = self.models
+        values = self.values
+        prompts = self.prompts
+        styles = self.styles
+        for key, script in self.scripts.items():
+            value = values.get(key, "")
+            style = styles.get(key)
+            if script or value or style:
+                encode_cell(buffer, key, value, script, prompts.get(key), style, separator + '"' + key + '":{', "}")
+                separator = ","
+        for key, cell in models.items():
+            if cell.script or cell.value or cell.style:
+                encode_cell(buffer, key, cell.value, cell.script, cell.prompt, cell.style,
+                            separator + '"' + key + '":{', "}")
+                separator = ","
+
+
 class Sheet(Model):  # pylint: disable=too-many-instance-attributes
     """
     A class representing a sheet in a spreadsheet-like application.
@@ -269,21 +615,82 @@ class Sheet(Model):  # pylint: disable=too-many-instance-attributes
         self.row_count = row_count
         self.packages = packages
         self.new = new
+        self.clear_changes()
+
+    def __setattr__(self, name: str, value):
+        if name == "cells":
+            value = self.convert_cells(value)
+        super().__setattr__(name, value)
+        if name in SHEET_DELTA_FIELDS and hasattr(self, "_changed_fields"):
+            self._changed_fields.add(name)
+
+    def clear_changes(self):
+        """
+        Forgets all changes, for instance after the sheet was saved in full.
+        """
+        self._changed_fields = set()
+        self._changed_previews = set()
+        self._preview_keys = set(self.previews)
+        self.cells.changed.clear()
+
+    def preview_changed(self, preview):
+        """
+        Records that a preview changed since the sheet was last saved.
+        """
+        self._changed_previews.add(preview.key)
+
+    def get_changes(self):
+        """
+        Collects everything that changed since the previous call, or since the sheet was loaded,
+        and forgets those changes.
+
+        Returns:
+            SheetDelta: The changes, or None if nothing changed.
+        """
+        cells = {
+            key: self.cells.get_fields(key) if key in self.cells else None
+            for key in self.cells.changed
+        }
+        fields = {
+            name: getattr(self, name)
+            for name in self._changed_fields
+        }
+        previews = {}
+        for key in self._changed_previews | (self._preview_keys - set(self.previews)):
+            if key in self.previews:
+                buffer = []
+                self.previews[key].encode_fields(buffer)
+                previews[key] = json.loads("{" + "".join(buffer) + "}")
+            else:
+                previews[key] = None
+        self.clear_changes()
+        if cells or fields or previews:
+            return SheetDelta(cells, fields, previews)
+        return None
+
+    def get_metadata(self):
+        """
+        Returns the fields needed to list the sheet, without any of its cells.
+
+        Returns:
+            dict: The metadata fields of the sheet and its number of cells.
+        """
+        metadata = { name: getattr(self, name) for name in SHEET_METADATA_FIELDS }
+        metadata["cell_count"] = len(self.cells)
+        return metadata
 
     def convert_cells(self, cells):
         """
-        Converts a dictionary of stored cell data into a dictionary of live `Cell` objects.
+        Converts a dictionary of stored cell data into a `CellStore`, which creates
+        live `Cell` objects only when they are accessed.
         
         Args:
-            cells (dict[str:dict]): A dictionary of cell keys to cell dictionaries.
+            cells (dict[str:dict]): A dictionary of cell keys to cell dictionaries or `Cell` objects.
         
         Returns:
-            dict: A dictionary where the keys are cell keys and the values are `Cell` objects.
+            CellStore: A store that maps cell keys to `Cell` objects.
         """
-        for key, cell_dict in cells.items():
-            if not isinstance(cell_dict, Cell):
-                cells[key] = Cell(**cell_dict)
-        return cells
+        return cells if isinstance(cells, CellStore) else CellStore(cells)
 
     def encode_fields(self, buffer: list):
         """
@@ -294,8 +701,13 @@ class Sheet(Model):  # pylint: disable=too-many-instance-attributes
         """
         self.encode_cells(buffer)
         self.encode_previews(buffer)
-        self.row_count = max([constants.DEFAULT_ROW_COUNT] + [cell.row for cell in self.cells.values()])
-        self.column_count = max([constants.DEFAULT_COLUMN_COUNT] + [cell.column for cell in self.cells.values()])
+        column_count, row_count = self.cells.get_extents()
+        row_count = max(constants.DEFAULT_ROW_COUNT, row_count)
+        column_count = max(constants.DEFAULT_COLUMN_COUNT, column_count)
+        if row_count != self.row_count:
+            self.row_count = row_count
+        if column_count != self.column_count:
+            self.column_count = column_count
         buffer.append(f'"created_timestamp":{json.dumps(self.created_timestamp)},')
         buffer.append(f'"updated_timestamp":{json.dumps(self.updated_timestamp)},')
         buffer.append(f'"rows":{json.dumps(self.rows)},')
@@ -320,15 +732,7 @@ class Sheet(Model):  # pylint: disable=too-many-instance-attributes
             buffer (list): A list to which the encoded cell data will be appended.
         """
         buffer.append('"cells":{')
-        needs_comma = False
-        for cell in self.cells.values():
-            if isinstance(cell, str) or not cell.has_changes():
-                continue
-            buffer.append(f"{',' if needs_comma else ''}{json.dumps(cell.key)}:")
-            buffer.append("{")
-            cell.encode_fields(buffer)
-            buffer.append("}")
-            needs_comma = True
+        self.cells.encode(buffer)
         buffer.append('},')
 
     def encode_previews(self, buffer: list):
@@ -418,6 +822,9 @@ class Sheet(Model):  # pylint: disable=too-many-instance-attributes
         """
         if not key in self.previews:
             self.previews[key] = Preview(key, **args)
+            self.previews[key].track(self.preview_changed)
+            if hasattr(self, "_changed_previews"):
+                self._changed_previews.add(key)
         return self.previews[key]
 
     def set_column_width(self, column, width):
@@ -425,6 +832,7 @@ class Sheet(Model):  # pylint: disable=too-many-instance-attributes
         Set the column width
         """
         self.columns[column] = width
+        self._changed_fields.add("columns")
         self.notify_listeners({ "name": "columns", "column": column, "width": width })
 
     def set_row_height(self, row, height):
@@ -432,6 +840,7 @@ class Sheet(Model):  # pylint: disable=too-many-instance-attributes
         Set the row height
         """
         self.rows[row] = height
+        self._changed_fields.add("rows")
         self.notify_listeners({ "name": "rows", "row": row, "height": height })
 
     def __eq__(self, other):
@@ -510,13 +919,7 @@ class Cell(Model):
         Args:
             buffer (list): A list to append the encoded fields to.
         """
-        if self.value not in ["", self.script]:
-            buffer.append(f'"value":{escape(self.value)},')
-        if self.prompt:
-            buffer.append(f'"prompt":{escape(self.prompt)},')
-        buffer.append(f'"key":"{self.key}",')
-        self.encode_style(buffer)
-        buffer.append(f'"s":{escape(self.script)}')
+        encode_cell(buffer, self.key, self.value, self.script, self.prompt, self.style)
 
     def encode_style(self, buffer: list):
         """
@@ -525,14 +928,7 @@ class Cell(Model):
         Args:
             buffer (list): A list to append the encoded style properties to.
         """
-        styles = []
-        for prop, value in self.style.items():
-            if value != constants.DEFAULT_STYLE.get(prop):
-                styles.append(f'"{prop}":{escape(value)}')
-        if styles:
-            buffer.append('"style":{')
-            buffer.append(f'{",".join(styles)}')
-            buffer.append('},')
+        encode_style(buffer, self.style)
 
     def clear(self, sheet):
         """
@@ -587,18 +983,25 @@ class EditGroup(Edit):
     """
     Represents a group of edits that can be undone as one.
     """
-    def __init__(self, description):
+    def __init__(self, description="", edits=None):
         super().__init__()
         self.description = description
-        self.edits = []
+        self.edits = [
+            edit if isinstance(edit, Edit) else convert(edit)
+            for edit in edits or []
+        ]
 
     def apply(self, sheet):
         for edit in self.edits:
             edit.apply(sheet)
+        return self
 
     def undo(self, sheet):
-        for edit in self.edits:
-            edit.undo(sheet)
+        undone = False
+        for edit in reversed(self.edits):
+            if edit.undo(sheet):
+                undone = True
+        return undone
 
     def describe(self):
         return self.description
@@ -706,10 +1109,11 @@ class ColumnChanged(Edit):
     """
     Represents an edit to change the width of a column in a Sheet.
     """
-    def __init__(self, column: int=0, width: int=0):
+    def __init__(self, column: int=0, width: int=0, _width=None):
         super().__init__()
         self.column = str(column)
-        self._width = self.width = width
+        self.width = width
+        self._width = width if _width is None else _width
 
     def apply(self, sheet: Sheet):
         self._width = sheet.columns.get(self.column, constants.DEFAULT_COLUMN_WIDTH)
@@ -728,10 +1132,11 @@ class RowChanged(Edit):
     """
     Represents an edit to change the height of a row in a Sheet.
     """
-    def __init__(self, row=0, height=0):
+    def __init__(self, row=0, height=0, _height=None):
         super().__init__()
         self.row = str(row)
-        self._height = self.height = height
+        self.height = height
+        self._height = height if _height is None else _height
 
     def apply(self, sheet: Sheet):
         self._height = sheet.rows.get(self.row, constants.DEFAULT_ROW_HEIGHT)
@@ -833,6 +1238,123 @@ class CellStyleChanged(CellChanged):
         return f"{self.key}: changed style to {self.style}"
 
 
+class RangeEdit(Edit):
+    """
+    Represents an edit to the scripts, values, and styles of a range of cells.
+
+    Range operations, such as a paste, a clear, or cells set by a worker, are recorded as one
+    `RangeEdit`, instead of one `CellChanged` edit per field per cell. Only the cells that the
+    operation touches are stored, so a few cells far apart cost no more than a few cells next
+    to each other. Each cell maps to its old and new script, value, and style. To keep large
+    edits compact, a value that is the same as the script is stored as None, and so is an empty style.
+    """
+    def __init__(self, description="", changes=None):
+        super().__init__()
+        self.description = description
+        self.changes = changes or {}
+
+    def get_keys(self):
+        """
+        Returns the keys of the cells in this edit.
+        """
+        return list(self.changes)
+
+    def capture(self, cells: CellStore, keys):
+        """
+        Records the current fields of the given cells as both the old and the new fields.
+        Cells are then changed with `set`.
+
+        Args:
+            cells (CellStore): The cells of the sheet.
+            keys (iterable): The keys of the cells the edit will change.
+
+        Returns:
+            RangeEdit: This edit.
+        """
+        changes = self.changes
+        for key in keys:
+            if key not in changes:
+                script = cells.get_script(key)
+                value = cells.get_value(key)
+                value = None if value == script else value
+                style = dict(cells.get_style(key)) or None
+                changes[key] = [script, value, style, script, value, style]
+        return self
+
+    def set(self, key, script, style, value=None):
+        """
+        Changes the new fields of a captured cell. Unless a value is given,
+        the value of a formula is empty and any other script is its own value.
+        """
+        if value is None:
+            value = "" if script.startswith("=") else script
+        self.changes[key][3:] = [script, None if value == script else value, dict(style or {}) or None]
+
+    def set_values(self, cells: CellStore, values: dict):
+        """
+        Sets the scripts of the given cells to the given values, keeping their styles,
+        as done for cells set by a worker.
+
+        Args:
+            cells (CellStore): The cells of the sheet.
+            values (dict): The new values of the cells, by key.
+
+        Returns:
+            RangeEdit: This edit.
+        """
+        self.capture(cells, values)
+        for key, value in values.items():
+            self.set(key, str(value), cells.get_style(key))
+        return self
+
+    def write(self, sheet, offset):
+        """
+        Writes the old or new fields into the cells of the sheet, without sending notifications
+        for each cell, and then notifies the sheet of all the cells that changed.
+
+        Args:
+            sheet (Sheet): The sheet to change.
+            offset (int): 0 to write the old fields, 3 to write the new fields.
+        """
+        cells = sheet.cells
+        keys = []
+        with freeze():
+            for key, fields in self.changes.items():
+                script, value, style = fields[offset:offset + 3]
+                value = script if value is None else value
+                if key in cells:
+                    if cells.get_script(key) == script and cells.get_value(key) == value and \
+                            cells.get_style(key) == (style or {}):
+                        continue
+                elif not script and value == "" and not style:
+                    continue
+                cells.update(key, script, dict(style or {}), value)
+                keys.append(key)
+        sheet.notify_listeners({ "name": "cells", "keys": keys })
+
+    def apply(self, sheet):
+        self.write(sheet, 3)
+        return self
+
+    def undo(self, sheet):
+        self.write(sheet, 0)
+        return True
+
+    def get_range(self):
+        """
+        Returns the range that encloses the cells in this edit, such as "A1:C10".
+        """
+        if not self.changes:
+            return ""
+        positions = [api.get_col_row_from_key(key) for key in self.changes]
+        start = api.get_key_from_col_row(min(column for column, _ in positions), min(row for _, row in positions))
+        end = api.get_key_from_col_row(max(column for column, _ in positions), max(row for _, row in positions))
+        return f"{start}:{end}"
+
+    def describe(self):
+        return self.description or f"{self.get_range()}: change {len(self.changes)} cells"
+
+
 class PreviewChanged(Edit):
     """
     Represents a change to a preview in a Sheet.
@@ -930,6 +1452,53 @@ class PreviewDeleted(Edit):
         return None
 
 
+class SheetDelta(Edit):
+    """
+    Represents the changes made to a sheet between two saves, stored as one record
+    in the sheet's change log.
+
+    Args:
+        cells (dict): The fields of each changed cell by key, or None for a removed cell.
+        fields (dict): The new values of changed sheet fields, such as the name.
+        previews (dict): The fields of each changed preview by key, or None for a removed preview.
+    """
+    def __init__(self, cells=None, fields=None, previews=None):
+        super().__init__()
+        self.cells = cells or {}
+        self.fields = fields or {}
+        self.previews = previews or {}
+
+    def apply(self, sheet: Sheet):
+        for key, fields in self.cells.items():
+            if fields is None:
+                sheet.cells.discard(key)
+            elif key in sheet.cells.models:
+                cell = sheet.cells[key]
+                cell.value = fields["value"]
+                cell.script = fields["s"]
+                cell.prompt = fields["prompt"]
+                cell.style = fields["style"]
+            else:
+                sheet.cells.discard(key)
+                sheet.cells.load(key, fields)
+        for name, value in self.fields.items():
+            setattr(sheet, name, value)
+        for key, fields in self.previews.items():
+            if fields is None:
+                sheet.previews.pop(key, None)
+            else:
+                preview = sheet.get_preview(key)
+                for name, value in fields.items():
+                    setattr(preview, name, value)
+        return self
+
+    def undo(self, sheet: Sheet):
+        return False
+
+    def describe(self):
+        return None
+
+
 #
 # Generate short names to compress the model types when saved
 #
@@ -948,6 +1517,9 @@ m = PreviewDeleted          # pylint: disable=invalid-name
 n = Sheet                   # pylint: disable=invalid-name
 o = Cell                    # pylint: disable=invalid-name
 p = NameChanged             # pylint: disable=invalid-name
+q = SheetDelta              # pylint: disable=invalid-name
+r = RangeEdit               # pylint: disable=invalid-name
+s = EditGroup               # pylint: disable=invalid-name
 
 
 SHORT_CLASS_NAMES = {
@@ -966,6 +1538,9 @@ SHORT_CLASS_NAMES = {
     "Sheet": "n",
     "Cell": "o",
     "NameChanged": "p",
+    "SheetDelta": "q",
+    "RangeEdit": "r",
+    "EditGroup": "s",
 }
 
 
@@ -31,6 +31,7 @@ class MultiSelection(): # pylint: disable=too-many-instance-attributes
         self.dimensions = [0, 0, 0, 0]
         self.cells = []
         self.cell1 = self.cell2 = None
+        self.pasting = False
 
         self.handler_by_shortcut = {
             "a": self.select_all,
@@ -207,26 +208,7 @@ class MultiSelection(): # pylint: disable=too-many-instance-attributes
         current = self.sheet.current
 
         def paste_done(infos, text):
-            start = ltk.get_time()
-            def find_cells(infos):
-                state.console.write("paste", f"[Paste] Loading {len(infos)} pasted cells")
-                for key, new_script, new_style in infos[:constants.MAX_EDITS_PER_SYNC]:
-                    cell_view = self.sheet.get_cell(key)
-                    cell_view.set(new_script)
-                    cell_model = cell_view.model
-                    cell_model.style = json.loads(new_style)
-                infos = infos[constants.MAX_EDITS_PER_SYNC:]
-                if infos:
-                    ltk.schedule(lambda: find_cells(infos), "handle more pasted cells")
-                else:
-                    state.console.write("paste",
-                            f"[Paste] Pasting {len(text):,} bytes took {ltk.get_time() - start:.3f}s")
-                self.sheet.select(self.sheet.current)
-
-            infos = list(infos)
-            with history.SingleEdit(f"Paste {len(infos)} cells"):
-                find_cells(infos)
-            self.sheet.reselect()
+            self.paste_cells([(str(key), str(script), str(style)) for key, script, style in infos], text)
 
         def process_clipboard(text):
             state.console.write("paste", f"[Paste] Pasting {len(text):,} bytes from the clipboard...")
@@ -253,6 +235,80 @@ class MultiSelection(): # pylint: disable=too-many-instance-attributes
             ltk.window.getClipboard(ltk.proxy(process_clipboard), not event.shiftKey)
         ltk.schedule(get_clipboard, "getting clipboard")
 
+    def paste_cells(self, infos, text):
+        """
+        Applies pasted cells to the sheet in slices of `constants.PASTE_CELLS_PER_FRAME` cells,
+        one slice per animation frame, so the page stays responsive during a large paste.
+
+        Each slice writes the scripts and styles straight into the cell store with notifications
+        frozen, and updates the rendered cells in the slice. The paste is recorded as one
+        `RangeEdit`, so it is undone as one. When all slices are applied, the sheet is updated
+        for the cells that changed. A paste can be cancelled with Escape, which keeps the cells
+        pasted so far.
+
+        Args:
+            infos (list): The key, script, and style, encoded as JSON, of each pasted cell.
+            text (str): The pasted clipboard content.
+        """
+        if not infos:
+            return
+        start = ltk.get_time()
+        cells = self.sheet.model.cells
+        viewport = self.sheet.viewport
+        edit = models.RangeEdit(f"Paste {len(infos)} cells").capture(cells, [key for key, _, _ in infos])
+        history.add(edit)
+        styles = {"{}": {}}
+        changed = []
+        self.pasting = True
+
+        def get_style(encoded):
+            if not encoded in styles:
+                styles[encoded] = models.CellStyleChanged().cleanup_style(json.loads(encoded))
+            return dict(styles[encoded])
+
+        def paste_cell(key, script, encoded):
+            style = get_style(encoded)
+            if script == cells.get_script(key) and style == (cells.get_style(key) or {}):
+                return
+            edit.set(key, script, style)
+            cells.update(key, script, style)
+            changed.append(key)
+            if api.get_col_row_from_key(key) in viewport:
+                ltk.find(f"#{key}").text(cells.get_value(key)).css(style)
+
+        def paste_slice(index):
+            if not self.pasting:
+                state.console.write("paste", f"[Paste] Cancelled after pasting {index:,} of {len(infos):,} cells")
+                finish()
+                return
+            with models.freeze():
+                for key, script, encoded in infos[index:index + constants.PASTE_CELLS_PER_FRAME]:
+                    paste_cell(key, script, encoded)
+            index += constants.PASTE_CELLS_PER_FRAME
+            if index < len(infos):
+                state.console.write("paste", f"[Paste] Pasted {index:,} of {len(infos):,} cells...",
+                    action=ltk.Button("Cancel", lambda event: self.cancel_paste()).addClass("small-button"))
+                ltk.window.requestAnimationFrame(ltk.proxy(lambda timestamp: paste_slice(index)))
+            else:
+                state.console.write("paste",
+                        f"[Paste] Pasting {len(text):,} bytes took {ltk.get_time() - start:.3f}s")
+                finish()
+
+        def finish():
+            self.pasting = False
+            history.resize(edit)
+            self.sheet.cells_changed(changed)
+            history.schedule_flush()
+
+        state.console.write("paste", f"[Paste] Pasting {len(infos):,} cells...")
+        paste_slice(0)
+
+    def cancel_paste(self):
+        """
+        Cancels a paste that is in progress. The cells that were pasted already are kept.
+        """
+        self.pasting = False
+
     def cut(self, event):
         """
         Cuts the selected cells from the sheet.
@@ -264,10 +320,20 @@ class MultiSelection(): # pylint: disable=too-many-instance-attributes
         """
         Clears the selected cells in the sheet.
         """
-        with history.SingleEdit(f"Clear {len(self.cells)} cells"):
-            for key in self.cells:
-                if key in self.sheet.model.cells:
-                    self.sheet.get_cell(key).clear()
+        cells = self.sheet.model.cells
+        keys = [key for key in self.cells if key in cells]
+        if not keys:
+            return
+        edit = models.RangeEdit(f"Clear {len(keys)} cells").capture(cells, keys)
+        for key in keys:
+            node = self.sheet.cell_nodes.get(key)
+            if node:
+                node.remove_preview()
+            ltk.find(f"#completion-{key}").remove()
+            state.console.remove(f"ai-{key}")
+            self.sheet.model.previews.pop(key, None)
+            edit.set(key, "", {}, "")
+        history.add(edit.apply(self.sheet.model))
         self.draw()
 
     def start(self, cell):
@@ -296,12 +362,12 @@ class MultiSelection(): # pylint: disable=too-many-instance-attributes
         """
         Selects all cells in the sheet and updates the selection.
         """
-        cells = self.sheet.cells.values()
+        cells = [api.get_col_row_from_key(key) for key in self.sheet.model.cells]
         if cells:
-            min_col = min(cell.column for cell in cells)
-            max_col = max(cell.column for cell in cells)
-            min_row = min(cell.row for cell in cells)
-            max_row = max(cell.row for cell in cells)
+            min_col = min(col for col, _ in cells)
+            max_col = max(col for col, _ in cells)
+            min_row = min(row for _, row in cells)
+            max_row = max(row for _, row in cells)
             self.cell1 = self.sheet.get_cell(api.get_key_from_col_row(min_col, min_row))
             self.cell2 = self.sheet.get_cell(api.get_key_from_col_row(max_col, max_row))
             self.update()
@@ -3,6 +3,21 @@ CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
 
 This module provides an interface for interacting with an IndexedDB database
 to store and retrieve data related to sheets.
+
+A sheet is stored as a full snapshot plus an append-only log of the changes made
+since that snapshot. Saving an edit appends one small record to the log. After
+`COMPACT_AFTER_CHANGES` records, or `COMPACT_AFTER_BYTES` bytes, the sheet is saved
+as a new snapshot and its log is cleared.
+
+A snapshot is stored as the encoded sheet, kept as an opaque string in its `data`
+field, next to a few metadata fields that can be read without decoding the sheet.
+Snapshots written before this format are complete JSON documents, and are still read.
+
+The metadata of every sheet is also kept in a separate, small object store, so the list
+of sheets can be shown without reading any of the snapshots.
+
+Edits that no longer fit in the memory budget of the undo history are spilled to their
+own object store, and read back, and removed, when they are undone.
 """
 
 import json
@@ -10,8 +25,13 @@ import ltk
 import models
 
 
-DB_VERSION = "4"
+DB_VERSION = "7"
 STORE_NAME = "pysheets-1"
+CHANGES_STORE_NAME = "pysheets-changes-1"
+METADATA_STORE_NAME = "pysheets-metadata-1"
+HISTORY_STORE_NAME = "pysheets-history-1"
+COMPACT_AFTER_CHANGES = 100
+COMPACT_AFTER_BYTES = 1000000
 
 
 class Database():
@@ -56,8 +76,14 @@ class Database():
         self.db = db
         if not self.db.objectStoreNames.contains(STORE_NAME):
             self.db.createObjectStore(STORE_NAME, { "keyPath": 'uid' })
-
-    def get_all(self, store, found_all):
+        if not self.db.objectStoreNames.contains(CHANGES_STORE_NAME):
+            self.db.createObjectStore(CHANGES_STORE_NAME, ltk.to_js({ "keyPath": ["uid", "seq"] }))
+        if not self.db.objectStoreNames.contains(METADATA_STORE_NAME):
+            self.db.createObjectStore(METADATA_STORE_NAME, ltk.to_js({ "keyPath": "uid" }))
+        if not self.db.objectStoreNames.contains(HISTORY_STORE_NAME):
+            self.db.createObjectStore(HISTORY_STORE_NAME, ltk.to_js({ "keyPath": ["uid", "seq"] }))
+
+    def get_all(self, store, found_all, read):
         """
         Retrieves all objects from the specified object store in the IndexedDB database
         and calls the provided `found_all` callback with the results.
@@ -65,19 +91,93 @@ class Database():
         Args:
             store (str): The name of the object store to retrieve objects from.
             found_all (callable): A callback function that will be called with retrieved objects.
+            read (callable): A function that converts each JavaScript object into a Python object.
         """
         results = []
 
         def extract_all_from_cursor(event):
             cursor = event.target.result
             if cursor:
-                results.append(models.convert(json.loads(ltk.window.JSON.stringify(cursor.value))))
+                results.append(read(cursor.value))
                 getattr(cursor, "continue")()
             else:
                 found_all(results)
 
         self.open(store).openCursor().onsuccess = ltk.proxy(extract_all_from_cursor)
 
+    def get_all_keys(self, store, found_all):
+        """
+        Retrieves the keys of all objects in the specified object store, without reading the objects.
+
+        Args:
+            store (str): The name of the object store to retrieve keys from.
+            found_all (callable): A callback function that will be called with the list of keys.
+        """
+        request = self.open(store).getAllKeys()
+        request.onerror = ltk.proxy(lambda event: found_all([]))
+        request.onsuccess = ltk.proxy(lambda event: found_all(ltk.to_py(request.result)))
+
+    def make_document(self, sheet: models.Sheet):
+        """
+        Creates the document that stores a snapshot of a sheet.
+
+        The encoded sheet is kept as one opaque string, so it is written without
+        converting it into a JavaScript object first.
+
+        Args:
+            sheet (models.Sheet): The sheet to store.
+
+        Returns:
+            object: The JavaScript document to put in the object store.
+        """
+        document = ltk.window.Object.new()
+        for name, value in sheet.get_metadata().items():
+            setattr(document, name, value)
+        document.data = models.encode(sheet)
+        return document
+
+    def get_field(self, document, name):
+        """
+        Returns the value of a field of a document, or None if the document does not have it.
+        """
+        value = getattr(document, name, None)
+        if value is None or ltk.window.isUndefined(value):
+            return None
+        return value
+
+    def read_document(self, document):
+        """
+        Decodes the sheet stored in a document.
+
+        Args:
+            document (object): The JavaScript document read from the object store.
+
+        Returns:
+            models.Sheet: The sheet.
+        """
+        data = self.get_field(document, "data")
+        if data is None:
+            return models.decode(ltk.window.JSON.stringify(document))
+        return models.decode(data)
+
+    def read_metadata(self, document):
+        """
+        Reads the metadata of a sheet from a document in the metadata store, or from a snapshot.
+        A snapshot in the legacy format has to be decoded completely to find out its number of cells.
+
+        Args:
+            document (object): The JavaScript document read from the object store.
+
+        Returns:
+            dict: The metadata fields of the sheet.
+        """
+        if self.get_field(document, "cell_count") is None:
+            return self.read_document(document).get_metadata()
+        return {
+            name: getattr(document, name)
+            for name in models.SHEET_METADATA_FIELDS + ["cell_count"]
+        }
+
     def save(self, store, document):
         """
         Saves a document to the specified object store in the IndexedDB database.
@@ -91,6 +191,80 @@ class Database():
         """
         self.open(store).put(document)
 
+    def get_changes_range(self, uid):
+        """
+        Returns the key range that covers all records in the change log of the given sheet.
+        """
+        return ltk.window.IDBKeyRange.bound(
+            ltk.to_js([uid, 0]),
+            ltk.to_js([uid, ltk.window.Number.MAX_SAFE_INTEGER]),
+        )
+
+    def append(self, store, uid, seq, data):
+        """
+        Appends a record to the change log of a sheet.
+
+        Args:
+            store (str): The name of the object store that holds the change log.
+            uid (str): The unique identifier of the sheet.
+            seq (int): The sequence number of the record, one more than the previous one.
+            data (str): The encoded change.
+        """
+        self.open(store).put(ltk.to_js({ "uid": uid, "seq": seq, "data": data }))
+
+    def load_changes(self, store, uid, onsuccess):
+        """
+        Loads the change log of a sheet, in the order the changes were made.
+
+        Args:
+            store (str): The name of the object store that holds the change log.
+            uid (str): The unique identifier of the sheet.
+            onsuccess (callable): A callback function that will be called with the list of records.
+        """
+        request = self.open(store).getAll(self.get_changes_range(uid))
+        def handler(event): # pylint: disable=unused-argument
+            onsuccess(json.loads(ltk.window.JSON.stringify(request.result)))
+        request.onerror = ltk.proxy(lambda event: onsuccess([]))
+        request.onsuccess = ltk.proxy(handler)
+
+    def take(self, store, uid, seq, onsuccess):
+        """
+        Loads a record from a log, such as the change log, and removes it, in one transaction.
+
+        Args:
+            store (str): The name of the object store that holds the log.
+            uid (str): The unique identifier of the sheet.
+            seq (int): The sequence number of the record.
+            onsuccess (callable): A callback function that will be called with the data
+                of the record, or None if there is no such record.
+        """
+        store = self.open(store)
+        key = ltk.to_js([uid, seq])
+        request = store.get(key)
+        def handler(event): # pylint: disable=unused-argument
+            found = not ltk.window.isUndefined(request.result)
+            onsuccess(request.result.data if found else None)
+        request.onerror = ltk.proxy(lambda event: onsuccess(None))
+        request.onsuccess = ltk.proxy(handler)
+        store.delete(key)
+
+    def compact(self, store, changes_store, metadata_store, document, metadata):  # pylint: disable=too-many-arguments
+        """
+        Saves a document as the new snapshot, updates its metadata, and clears its change log,
+        in one transaction.
+
+        Args:
+            store (str): The name of the object store to save the document to.
+            changes_store (str): The name of the object store that holds the change log.
+            metadata_store (str): The name of the object store that holds the metadata.
+            document (object): The document to be saved.
+            metadata (dict): The metadata of the document.
+        """
+        transaction = self.db.transaction(ltk.to_js([store, changes_store, metadata_store]), "readwrite")
+        transaction.objectStore(store).put(document)
+        transaction.objectStore(metadata_store).put(ltk.to_js(metadata))
+        transaction.objectStore(changes_store).delete(self.get_changes_range(document.uid))
+
     def load(self, store, uid, onerror, onsuccess):
         """
         Loads an object from the specified object store in the IndexedDB database.
@@ -106,7 +280,7 @@ class Database():
             if ltk.window.isUndefined(request.result):
                 onerror(event)
             else:
-                onsuccess(models.decode(ltk.window.JSON.stringify(request.result)))
+                onsuccess(self.read_document(request.result))
         request.onerror = ltk.proxy(onerror)
         request.onsuccess = ltk.proxy(handler)
 
@@ -133,28 +307,95 @@ class Sheets():
     def __init__(self, db_loaded):
         self.db = Database("PySheets", DB_VERSION, db_loaded)
         self.deleted = []
+        self.logs = {}
+        self.metadata = {}
 
     def list_sheets(self, found_all_sheets):
         """
-        Lists all sheets stored in the IndexedDB database.
+        Lists all sheets stored in the IndexedDB database, reading only their metadata.
+
+        Sheets saved before the metadata store existed are read once from their
+        snapshots, and their metadata is stored for the next time.
         
         Args:
             found_all_sheets (callable): A callback function that will be called with a
-            list of all the sheets stored in the database.
+            list of all the sheets stored in the database, without their cells.
         """
-        self.db.get_all(STORE_NAME, found_all_sheets)
+        def found_metadata(records):
+            self.metadata = { metadata["uid"]: metadata for metadata in records }
+            self.db.get_all_keys(STORE_NAME, found_keys)
+
+        def found_keys(uids):
+            if all(uid in self.metadata for uid in uids):
+                done()
+            else:
+                self.db.get_all(STORE_NAME, found_snapshots, self.db.read_metadata)
+
+        def found_snapshots(records):
+            for metadata in records:
+                if not metadata["uid"] in self.metadata:
+                    self.save_metadata(metadata)
+            done()
+
+        def done():
+            found_all_sheets([
+                models.Sheet(**{ name: metadata[name] for name in models.SHEET_METADATA_FIELDS })
+                for metadata in self.metadata.values()
+            ])
+
+        self.db.get_all(METADATA_STORE_NAME, found_metadata, self.db.read_metadata)
+
+    def save_metadata(self, metadata):
+        """
+        Saves the metadata of a sheet, unless it is unchanged since it was last saved.
+
+        Args:
+            metadata (dict): The metadata of the sheet, as returned by `models.Sheet.get_metadata`.
+        """
+        if self.metadata.get(metadata["uid"]) != metadata:
+            self.metadata[metadata["uid"]] = metadata
+            self.db.save(METADATA_STORE_NAME, ltk.to_js(metadata))
 
 
     def save(self, sheet: models.Sheet):
         """
-        Saves the provided Sheet object to the STORE_NAME object store in the IndexedDB database.
+        Saves the changes made to the provided Sheet object since it was last saved.
+
+        The changes are appended to the sheet's change log. A sheet that has no log yet
+        in this session, or whose log has grown too long, is saved as a full snapshot.
         
         Args:
             sheet (models.Sheet): The Sheet object to save.
         """
         if sheet.uid in self.deleted:
             return
-        self.db.save(STORE_NAME, ltk.window.JSON.parse(models.encode(sheet))) # need jsProxy for storage
+        log = self.logs.get(sheet.uid)
+        if log is None or log["count"] >= COMPACT_AFTER_CHANGES or log["size"] >= COMPACT_AFTER_BYTES:
+            self.snapshot(sheet)
+            return
+        changes = sheet.get_changes()
+        if changes:
+            data = models.encode(changes)
+            log["seq"] += 1
+            log["count"] += 1
+            log["size"] += len(data)
+            self.db.append(CHANGES_STORE_NAME, sheet.uid, log["seq"], data)
+            self.save_metadata(sheet.get_metadata())
+
+    def snapshot(self, sheet: models.Sheet):
+        """
+        Saves the provided Sheet object in full and clears its change log.
+
+        Args:
+            sheet (models.Sheet): The Sheet object to save.
+        """
+        if sheet.uid in self.deleted:
+            return
+        sheet.clear_changes()
+        metadata = sheet.get_metadata()
+        self.metadata[sheet.uid] = metadata
+        self.db.compact(STORE_NAME, CHANGES_STORE_NAME, METADATA_STORE_NAME, self.db.make_document(sheet), metadata)
+        self.logs[sheet.uid] = { "seq": 0, "count": 0, "size": 0 }
 
 
     def load_sheet(self, sheet_id: str, onsuccess):
@@ -168,6 +409,18 @@ class Sheets():
                 will be passed to the callback.
         """
         def found_sheet(sheet):
+            self.db.load_changes(CHANGES_STORE_NAME, sheet_id, lambda records: replay(sheet, records))
+
+        def replay(sheet, records):
+            with models.freeze():
+                for record in records:
+                    models.decode(record["data"]).apply(sheet)
+            sheet.clear_changes()
+            self.logs[sheet_id] = {
+                "seq": records[-1]["seq"] if records else 0,
+                "count": len(records),
+                "size": sum(len(record["data"]) for record in records),
+            }
             onsuccess(sheet)
 
         def new_sheet(event): # pylint: disable=unused-argument
@@ -189,8 +442,29 @@ class Sheets():
                 when the delete operation failed.
         """
         self.db.delete(STORE_NAME, sheet_id, oncomplete, onerror)
+        self.db.open(CHANGES_STORE_NAME).delete(self.db.get_changes_range(sheet_id))
+        self.db.open(METADATA_STORE_NAME).delete(sheet_id)
+        self.clear_history(sheet_id)
+        self.metadata.pop(sheet_id, None)
         self.deleted.append(sheet_id)
 
+    def spill_edit(self, uid: str, seq: int, data: str):
+        """
+        Stores an edit that was spilled from the undo history of a sheet.
+        """
+        self.db.append(HISTORY_STORE_NAME, uid, seq, data)
+
+    def load_edit(self, uid: str, seq: int, onsuccess):
+        """
+        Loads a spilled edit back and removes it from storage.
+        """
+        self.db.take(HISTORY_STORE_NAME, uid, seq, onsuccess)
+
+    def clear_history(self, uid: str):
+        """
+        Removes all spilled edits of a sheet.
+        """
+        self.db.open(HISTORY_STORE_NAME).delete(self.db.get_changes_range(uid))
 
 
 sheets = None # pylint: disable=invalid-name
@@ -255,3 +529,38 @@ def list_sheets(found_all_sheets):
             the sheet IDs that are currently stored in the IndexedDB database.
     """
     sheets.list_sheets(found_all_sheets)
+
+
+def spill_edit(uid: str, seq: int, data: str):
+    """
+    Stores an edit that was spilled from the undo history, to free memory.
+
+    Args:
+        uid (str): The unique identifier of the sheet.
+        seq (int): The sequence number of the edit, one more than the previous spilled edit.
+        data (str): The encoded edit.
+    """
+    sheets.spill_edit(uid, seq, data)
+
+
+def load_edit(uid: str, seq: int, onsuccess):
+    """
+    Loads a spilled edit back into memory, and removes it from storage.
+
+    Args:
+        uid (str): The unique identifier of the sheet.
+        seq (int): The sequence number of the edit.
+        onsuccess (callable): A callback function that will be called with the encoded edit,
+            or None if it was not found.
+    """
+    sheets.load_edit(uid, seq, onsuccess)
+
+
+def clear_history(uid: str):
+    """
+    Removes the spilled edits of a sheet, for instance those left behind by an earlier session.
+
+    Args:
+        uid (str): The unique identifier of the sheet.
+    """
+    sheets.clear_history(uid)
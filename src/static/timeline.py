@@ -308,14 +308,32 @@ class Edit(ltk.TableRow):
         self.remove()
 
 
+class RangeEdit(Edit):
+    """
+    An `Edit` widget that displays an edit to a range of cells, showing the range and
+    the number of cells, rather than the individual cells.
+    """
+    classes = [ "edit", "range-edit" ]
+
+    def __init__(self, edit):
+        Edit.__init__(self, edit)
+        count = len(edit.changes)
+        self.append(
+            ltk.TableData(
+                ltk.Span(f"{edit.get_range()} ({count:,} cells)").addClass("edit-range"),
+            )
+        )
+
+
 def add_edit(edit):
     """
     Adds an edit to the timeline view, so the user can inspect the edit history.
     """
     if isinstance(edit, (models.EmptyEdit, models.ScreenshotChanged)):
         return
+    widget = RangeEdit(edit) if isinstance(edit, models.RangeEdit) else Edit(edit)
     ltk.find(".timeline-container").prepend(
-        Edit(edit).element
+        widget.element
     )
 
 
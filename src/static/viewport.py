@@ -0,0 +1,172 @@
+"""
+Copyright (c) 2024 laffra - All Rights Reserved.
+
+Decides which rows and columns of the sheet are rendered in the DOM.
+
+Only the rows and columns that are visible in the sheet container, plus an
+overscan margin around them, are rendered. Everything before and after them
+is replaced by spacers of the same size, so the scroll range of the sheet is
+unchanged. The rendered window only moves when scrolling makes a row or column
+visible that is not rendered yet, so small scrolls do not cause any rendering.
+
+Sizes are computed from the column widths and row heights stored in the sheet,
+which only holds the sizes that differ from the default.
+"""
+
+import api
+import constants
+import models
+
+
+class Viewport():
+    """
+    Keeps track of the window of rows and columns that is rendered for a sheet.
+    """
+
+    def __init__(self, sheet: models.Sheet,
+                 overscan_columns=constants.VIEWPORT_OVERSCAN_COLUMNS,
+                 overscan_rows=constants.VIEWPORT_OVERSCAN_ROWS):
+        self.sheet = sheet
+        self.overscan_columns = overscan_columns
+        self.overscan_rows = overscan_rows
+        self.column_count = sheet.column_count
+        self.row_count = sheet.row_count
+        self.first_column = self.last_column = self.first_row = self.last_row = 0
+        self.update(0, 0, constants.VIEWPORT_INITIAL_WIDTH, constants.VIEWPORT_INITIAL_HEIGHT)
+
+    def __contains__(self, column_row):
+        column, row = column_row
+        return self.first_column <= column <= self.last_column and self.first_row <= row <= self.last_row
+
+    def get_keys(self):
+        """
+        Returns the keys of the cells in the window, row by row.
+        """
+        for row in range(self.first_row, self.last_row + 1):
+            for column in range(self.first_column, self.last_column + 1):
+                yield api.get_key_from_col_row(column, row)
+
+    def get_size(self, sizes, index, default):
+        """
+        Returns the size in pixels of a column or row, including its padding and border.
+        """
+        size = sizes.get(index, sizes.get(str(index), default))
+        return size + constants.CELL_PADDING_AND_BORDER
+
+    def get_column_width(self, column):
+        """
+        Returns the width of a column in pixels, including its padding and border.
+        """
+        return self.get_size(self.sheet.columns, column, constants.DEFAULT_COLUMN_WIDTH)
+
+    def get_row_height(self, row):
+        """
+        Returns the height of a row in pixels, including its padding and border.
+        """
+        return self.get_size(self.sheet.rows, row, constants.DEFAULT_ROW_HEIGHT)
+
+    def get_offset(self, sizes, index, default):
+        """
+        Returns the offset in pixels of a column or row, which is the total size of the ones before it.
+        """
+        offset = (index - 1) * (default + constants.CELL_PADDING_AND_BORDER)
+        for other, size in sizes.items():
+            if int(other) < index:
+                offset += size - default
+        return offset
+
+    def find_index(self, sizes, offset, count, default):
+        """
+        Returns the column or row that holds the given offset in pixels.
+        """
+        low, high = 1, max(1, count)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.get_offset(sizes, middle, default) <= offset:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def get_column_left(self, column):
+        """
+        Returns the horizontal position of a column in the grid, in pixels.
+        """
+        return self.get_offset(self.sheet.columns, column, constants.DEFAULT_COLUMN_WIDTH)
+
+    def get_row_top(self, row):
+        """
+        Returns the vertical position of a row in the grid, in pixels.
+        """
+        return self.get_offset(self.sheet.rows, row, constants.DEFAULT_ROW_HEIGHT)
+
+    def get_width(self):
+        """
+        Returns the width of all columns together, in pixels.
+        """
+        return self.get_column_left(self.column_count + 1)
+
+    def get_height(self):
+        """
+        Returns the height of all rows together, in pixels.
+        """
+        return self.get_row_top(self.row_count + 1)
+
+    def get_visible(self, left, top, width, height):
+        """
+        Returns the columns and rows that are visible in the given area of the grid.
+
+        Args:
+            left (int): The horizontal scroll position of the grid, in pixels.
+            top (int): The vertical scroll position of the grid, in pixels.
+            width (int): The width of the visible area, in pixels.
+            height (int): The height of the visible area, in pixels.
+
+        Returns:
+            tuple: The first column, last column, first row, and last row that are visible.
+        """
+        columns, rows = self.sheet.columns, self.sheet.rows
+        column_width, row_height = constants.DEFAULT_COLUMN_WIDTH, constants.DEFAULT_ROW_HEIGHT
+        return (
+            self.find_index(columns, max(0, left), self.column_count, column_width),
+            self.find_index(columns, max(0, left + width), self.column_count, column_width),
+            self.find_index(rows, max(0, top), self.row_count, row_height),
+            self.find_index(rows, max(0, top + height), self.row_count, row_height),
+        )
+
+    def update(self, left, top, width, height):
+        """
+        Moves the rendered window when part of the visible area is not rendered yet.
+
+        Args:
+            left (int): The horizontal scroll position of the grid, in pixels.
+            top (int): The vertical scroll position of the grid, in pixels.
+            width (int): The width of the visible area, in pixels.
+            height (int): The height of the visible area, in pixels.
+
+        Returns:
+            bool: True if the window moved and the grid has to be rendered again.
+        """
+        first_column, last_column, first_row, last_row = self.get_visible(left, top, width, height)
+        if (first_column, first_row) in self and (last_column, last_row) in self:
+            return False
+        self.first_column = max(1, first_column - self.overscan_columns)
+        self.last_column = min(self.column_count, last_column + self.overscan_columns)
+        self.first_row = max(1, first_row - self.overscan_rows)
+        self.last_row = min(self.row_count, last_row + self.overscan_rows)
+        return True
+
+    def extend(self, column, row):
+        """
+        Grows the sheet to include the given column and row. The window is
+        recomputed on the next call to `update`.
+
+        Returns:
+            bool: True if the sheet grew and the grid has to be rendered again.
+        """
+        if column <= self.column_count and row <= self.row_count:
+            return False
+        self.column_count = max(self.column_count, column)
+        self.row_count = max(self.row_count, row)
+        self.first_column = self.last_column = self.first_row = self.last_row = 0
+        return True
@@ -1,7 +1,11 @@
 """
-Copyright (c) 2024 laffra - All Rights Reserved. 
+Copyright (c) 2024 laffra - All Rights Reserved.
 
-Represents a cell view in the sheet, which manages the display and behavior of a single cell.
+Represents a cell in the sheet, which is split in two parts:
+ - A `CellNode` holds the evaluation state of a cell. It is created for every cell
+   that is recalculated, and does not touch the DOM.
+ - A `CellView` shows a cell in the grid. It is only created for cells that are
+   rendered on screen, or that the user interacts with.
 
 """
 
@@ -11,79 +15,59 @@ import ltk.pubsub
 import api
 import constants
 import history
+import html_maker
 import models
 import preview
 import selection
 import state
 
 
-class CycleError(Exception):
+class CellNode(): # pylint: disable=too-many-public-methods
     """
-    Represents a circular dependency in the cell calculation graph.
+    Holds the evaluation state of a single cell, and runs it in the worker.
+    The node shows its results in its view, when the cell has one.
     """
 
-
-
-class CellView(ltk.Widget): # pylint: disable=too-many-public-methods
-    """
-    Represents a cell view in the sheet, managing the display and behavior of a single cell.
-    """
-
-    observer = ltk.window.MutationObserver.new(ltk.proxy(lambda records, _: CellView.cellview_mutated(records))) # pylint: disable=unnecessary-lambda
-    observer_config = ltk.to_js({
-        "childList": True,
-        "characterData": True,
-        "attributes": True,
-        "subtree": True
-    })
-    sheet = None
-
-    def __init__(self, sheet, key: str, model: models.Cell, td=None):
+    def __init__(self, sheet, key: str, model: models.Cell):
         if "# run-with-pyodide" in model.script:
             state.run_with_pyodide()
-        self.model = model
-        super().__init__()
-        CellView.sheet= sheet
         if not key:
             raise ValueError("Missing key for cell")
-        if not self.model:
+        if not model:
             raise ValueError(f"No model for cell {key}")
-        self.model.set_key(key)
-        self.element = td or ltk.find(f"#{self.model.key}")
-        if not self.element.length:
-            ltk.window.fillSheet(model.column, model.row)
-            self.element = ltk.find(f"#{self.model.key}")
+        self.sheet = sheet
+        self.model = model
+        self.view = None
         self.running = False
-        self.needs_evaluation = "# run-on-load" in self.model.script
-        self.inputs = set()
-        self.dependents = set()
+        self.model.set_key(key)
+        self.sheet.extend_sheet(model.column, model.row)
         if self.model.script != self.model.value:
             self.set(self.model.script, evaluate=False)
         self.model.listen(self.model_changed)
-        self.observer.observe(self.element[0], self.observer_config)
-        self.on("mouseenter", self.sheet.cell_enter)
 
-    @classmethod
-    def cellview_mutated(cls, mutation_records):
+    @property
+    def inputs(self):
         """
-        One or more cellviews were mutated.
+        Returns the keys of the cells this cell reads from, as recorded in the sheet's dependency graph.
         """
-        for key in set(record.target.id for record in mutation_records):
-            if key and key in cls.sheet.cell_views:
-                cls.sheet.cell_views[key].ui_changed()
+        return self.sheet.graph.get_inputs(self.model.key)
 
-    def ui_changed(self):
+    @property
+    def dependents(self):
         """
-        Updates the cell's value and script based on changes made in the UI.
+        Returns the keys of the cells that read from this cell, as recorded in the sheet's dependency graph.
         """
-        new_value = str(self.element.attr("worker-set"))
-        if new_value not in ["None", "<undefined>"]:
-            self.set(new_value)
-            self.element.removeAttr("worker-set")
+        return self.sheet.graph.get_dependents(self.model.key)
+
+    def is_current(self):
+        """
+        Determines whether the cell is the currently selected cell.
+        """
+        return self.sheet.current is not None and self.sheet.current.node is self
 
     def model_changed(self, model, info):
         """
-        Handles updates to the cell model, updating the cell's UI.
+        Handles updates to the cell model, updating the cell's view, if it has one.
 
         Args:
             model (models.Cell): The cell model that was updated.
@@ -91,24 +75,14 @@ class CellView(ltk.Widget): # pylint: disable=too-many-public-methods
             including the name of the property that changed.
         """
         if info["name"] == "script":
+            self.sheet.graph.invalidate(self.model.key)
             self.set(model.script)
-        elif info["name"] == "value":
-            self.text(model.value)
-        elif info["name"] == "style":
-            self.css(model.style)
+        elif info["name"] == "value" and self.view:
+            self.view.text(model.value)
+        elif info["name"] == "style" and self.view:
+            self.view.css(model.style)
         self.sheet.schedule_ai()
 
-    def enter(self):
-        """
-        Draws cell arrows and raises a preview when the cell is entered.
-        """
-        selection.remove_arrows(0)
-        self.draw_cell_arrows()
-        if self.model.key in preview.previews:
-            preview.previews[self.model.key].draw_arrows()
-            element = ltk.find(f"#preview-{self.model.key}")
-            element.appendTo(element.parent()) # raise the preview to the top
-
     def set(self, script, evaluate=True):
         """
         Sets the script of the cell and evaluates it if necessary.
@@ -117,17 +91,17 @@ class CellView(ltk.Widget): # pylint: disable=too-many-public-methods
             script (str): The new script to set for the cell.
             evaluate (bool, optional): When false does evaluate the new script.
         """
-        self.inputs.clear()
         self.deactivate_preview()
         if self.model.script != script:
+            self.sheet.graph.invalidate(self.model.key)
             history.add(
                 models.CellScriptChanged(self.model.key, self.model.script, script)
                     .apply(self.sheet.model)
             )
             self.model.script = script
-        if self.sheet.current == self:
+        if self.is_current():
             self.sheet.editor.set(self.model.script)
-            self.sheet.select(self)
+            self.sheet.select(self.view)
         if not self.is_formula():
             self.sheet.cache[self.model.key] = api.convert(script)
         if evaluate:
@@ -185,7 +159,8 @@ class CellView(ltk.Widget): # pylint: disable=too-many-public-methods
                         self.model.key,
                         f"[DAG] {self.model.key}: {message}"
                     )
-        self.text(str(value))
+        if self.view:
+            self.view.text(str(value))
         if value not in [self.model.value, self.model.script]:
             history.add(
                 models.CellValueChanged(self.model.key, self.model.value, value)
@@ -194,9 +169,10 @@ class CellView(ltk.Widget): # pylint: disable=too-many-public-methods
             )
         self.notify()
         self.model.value = value
-        if self.sheet.current == self:
-            self.sheet.selection.val(self.text())
-        self.sheet.multi_selection.draw()
+        if self.view:
+            if self.is_current():
+                self.sheet.selection.val(self.view.text())
+            self.sheet.multi_selection.draw()
 
     def get_preview(self, value):
         """
@@ -217,9 +193,9 @@ class CellView(ltk.Widget): # pylint: disable=too-many-public-methods
 
         This method is called when the cell's value or other properties have been updated,
         in order to trigger re-evaluation of any cells that depend on this cell's value.
+        The dependents are recalculated by the sheet in topological order.
         """
-        for key in self.dependents:
-            self.sheet.get_cell(key).evaluate()
+        self.sheet.cell_updated(self.model.key)
 
     def worker_ready(self):
         """
@@ -229,87 +205,23 @@ class CellView(ltk.Widget): # pylint: disable=too-many-public-methods
         self.stop_running()
         self.remove_loading()
 
-    def select(self):
-        """
-        Selects the current cell, removes any existing cell arrows, saves the current
-        selection position, sets the cell script in the editor, updates the AI prompt
-        input, sets the selection text, shows the cell attributes container, sets the
-        CSS editors, and scrolls the selection into view.
-        """
-        self.remove_arrows()
-        self.sheet.editor.set(self.model.script)
-        ltk.find("#selection").text(f"Cell: {self.model.key}")
-        ltk.find("#cell-attributes-container").css("display", "block")
-        self.set_prompt()
-        self.set_css_editors()
-        selection.scroll(self)
-
-    def set_prompt(self):
-        """
-        Sets the cell's prompt.
-        """
-        prompt_editor = ltk.find("#ai-prompt")
-        if not prompt_editor.hasFocus():
-            prompt_editor.val(self.model.prompt)
-
-    def set_css_editors(self):
-        """
-        Sets the CSS editor values for the current cell based on the cell's current CSS styles.
-        """
-        font_family = self.css("font-family")
-        ltk.find("#cell-font-family").val(font_family or constants.DEFAULT_FONT_FAMILY)
-
-        font_size = round(ltk.window.parseFloat(self.css("font-size")))
-        ltk.find("#cell-font-size").val(font_size or constants.DEFAULT_FONT_SIZE)
-
-        vertical_align = self.css("vertical-align")
-        ltk.find("#cell-vertical-align").val(vertical_align or constants.DEFAULT_VERTICAL_ALIGN)
-
-        text_align = self.css("text-align").replace("start", "left")
-        ltk.find("#cell-text-align").val(text_align or constants.DEFAULT_TEXT_ALIGN)
-
-        font_style = self.css("font-style")
-        ltk.find("#cell-font-style").val(font_style or constants.DEFAULT_FONT_STYLE)
-
-        font_weight = {"400": "normal", "700": "bold"}[self.css("font-weight")]
-        ltk.find("#cell-font-weight").val(font_weight or constants.DEFAULT_FONT_WEIGHT)
-
-        color = api.rgb_to_hex(self.css("color")) or constants.DEFAULT_COLOR
-        ltk.find("#cell-color").val(color).css("background", color)
-
-        background = api.rgb_to_hex(self.css("background-color")) or constants.DEFAULT_FILL
-        ltk.find("#cell-fill").val(background).css("background", background)
-
     def clear(self):
         """
         Clears the current cell by:
-        - Resetting the cell's CSS styles to default values
         - Removing any preview and completion elements associated with the cell
-        - Clearing the cell's text and model data
-        - Removing the cell from the sheet's cache and cells dictionary
+        - Clearing the cell's model data
+        - Removing the cell from the sheet's cache, nodes, and views
         - Adding history events for the changes made to the cell
         - Notifying the sheet that the cell has been cleared
         - Reselecting the sheet to update the UI
         """
-        self.css({
-            "font-family": constants.DEFAULT_FONT_FAMILY,
-            "font-size": constants.DEFAULT_FONT_SIZE,
-            "font-style": constants.DEFAULT_FONT_STYLE,
-            "color": constants.DEFAULT_COLOR,
-            "background-color": constants.DEFAULT_FILL,
-            "vertical-align": constants.DEFAULT_VERTICAL_ALIGN,
-            "font-weight": constants.DEFAULT_FONT_WEIGHT,
-            "text-align": constants.DEFAULT_TEXT_ALIGN,
-        })
-
         ltk.find(f"#completion-{self.model.key}").remove()
         state.console.remove(f"ai-{self.model.key}")
 
-        self.text("")
         self.model.clear(self.sheet.model)
-        self.inputs.clear()
-        if self.model.key in self.sheet.cell_views:
-            del self.sheet.cell_views[self.model.key]
+        self.sheet.graph.invalidate(self.model.key)
+        self.sheet.cell_views.pop(self.model.key, None)
+        self.sheet.cell_nodes.pop(self.model.key, None)
         self.sheet.cache[self.model.key] = 0
 
         history.add(models.CellScriptChanged(key=self.model.key, script=""))
@@ -331,34 +243,23 @@ class CellView(ltk.Widget): # pylint: disable=too-many-public-methods
         """
         Activates the preview for the cell by setting the opacity of the preview element to 1.
         """
-        ltk.find(f"#preview-{self.model.key}").css("opacity", 1)
+        if self.model.key in preview.previews:
+            ltk.find(f"#preview-{self.model.key}").css("opacity", 1)
 
     def deactivate_preview(self):
         """
         Deactivates the preview for the cell by setting the opacity of the preview element to 0.5.
         """
-        ltk.find(f"#preview-{self.model.key}").css("opacity", 0.5)
-
-    def draw_cell_arrows(self):
-        """
-        Draws the arrows indicating dependencies between cells on the sheet.
-        """
-        self.draw_arrows([])
-        self.adjust_arrows()
-
-    def remove_arrows(self):
-        """
-        Removes any arrow markers that have been drawn on the sheet.
-        """
-        selection.remove_arrows()
+        if self.model.key in preview.previews:
+            ltk.find(f"#preview-{self.model.key}").css("opacity", 0.5)
 
     def report_cycle(self, seen):
         """
         Detects and reports a dependency cycle in the cell's inputs.
-        
+
         Args:
             seen (list): A list of cell keys that have been visited so far in the dependency graph.
-        
+
         This function is called when a dependency cycle is detected while drawing the cell's
         input arrows.  It appends the current cell's key to the `seen` list,
         constructs a string representation of the cycle, and writes an error message to the console.
@@ -370,100 +271,20 @@ class CellView(ltk.Widget): # pylint: disable=too-many-public-methods
             f"[ERROR] {self.model.key}: Dependency cycle detected: {cycle}"
         )
 
-    def draw_arrows(self, seen):
-        """
-        Draws the arrows indicating dependencies between this cell and other cells on the sheet.
-        """
-        if self.model.key in seen:
-            self.report_cycle(seen)
-            return
-        seen.append(self.model.key)
-        self.remove_arrows()
-        if state.mobile():
-            return
-        if not self.inputs:
-            return
-        cells = [ self.sheet.get_cell(input) for input in self.inputs ]
-        ltk.window.addArrow(self.create_marker(cells, "inputs-marker arrow", seen), self.element)
-        self.addClass("arrow")
-
-    def create_marker(self, cells, clazz, seen):
-        """
-        Creates a marker element that represents a group of cells on the sheet.
-        
-        The marker is a div element that is positioned to encompass the cells, and has a class
-        name that can be used to style it. The marker also has an event handler attached that
-        removes any arrow markers when the user moves the mouse over it.
-        
-        Args:
-            cells (list): A list of cell objects that the marker represents.
-            clazz (str): A CSS class name to apply to the marker element.
-            seen (list): A list of cell keys that have been visited so far in the dependency graph.
-        
-        Returns:
-            The created marker element.
-        """
-        if not cells:
-            return None
-        if len(cells) == 1:
-            cells[0].draw_arrows(seen)
-            return cells[0]
-        top, left, bottom, right = 10000, 10000, 0, 0
-        for cell in cells:
-            position = cell.position()
-            left = min(position.left, left)
-            top = min(position.top, top)
-            right = max(position.left + cell.outerWidth(), right)
-            bottom = max(position.top + cell.outerHeight(), bottom)
-        return (ltk.Div()
-            .addClass("marker")
-            .addClass(clazz)
-            .css("left", left)
-            .css("top", top)
-            .width(round(right - left - 4))
-            .height(round(bottom - top - 5))
-            .on("mousemove", ltk.proxy(lambda event: selection.remove_arrows()))
-            .appendTo(ltk.find(".sheet-grid"))
-        )
-
-    def adjust_arrows(self):
-        """
-        Adjusts the position of arrow lines on the sheet to account for scrolling.
-        """
-        ltk.find(".leader-line").appendTo(ltk.find("#sheet-scrollable"))
-        container = ltk.find("#sheet-container")
-        scroll_left = container.scrollLeft()
-        scroll_top = container.scrollTop()
-        for arrow_line in ltk.find_list(".leader-line"):
-            arrow_line \
-                .css("top", ltk.window.parseFloat(arrow_line.css("top")) + scroll_top - 49) \
-                .css("left", ltk.window.parseFloat(arrow_line.css("left")) + scroll_left)
-
-    def edited(self, script):
-        """
-        Updates the cell's value with the provided script when the user edited the cell.
-        
-        Args:
-            script (str): The new script to set for the cell.
-        """
-        self.set(script)
-
     def get_input_cells(self):
         """
         Returns a dictionary of input cell values for the current cell.
-        
+
         The dictionary maps the input cell keys to their current values from the sheet cache.
         This is used to provide the input values when evaluating the cell's formula or script.
+        Ranges only contribute the cells that have a value.
         """
-        return {
-            key: self.sheet.cache.get(key, 0)
-            for key in self.inputs
-        }
+        return api.get_input_values(self.inputs, self.sheet.cache)
 
     def evaluate(self):
         """
         Evaluates the cell's value based on its script or formula.
-        
+
         If the cell represents a formula, it resolves the input cells required to evaluate it.
         Otherwise, it updates the cell's value with the provided script.
         """
@@ -473,11 +294,25 @@ class CellView(ltk.Widget): # pylint: disable=too-many-public-methods
                 state.check_packages()
                 self.run_in_main()
             else:
-                self.needs_evaluation = True
-                self.resolve_inputs()
+                self.sheet.recalculate([self.model.key])
         else:
             self.update(0, self.model.script)
 
+    def run(self):
+        """
+        Runs the cell as part of a recalculation scheduled by the sheet.
+
+        The inputs of a formula are only discovered by the worker when they are not
+        known yet, which happens once after each change to the cell's script.
+        """
+        if not self.is_formula() or "# no-worker" in self.model.script:
+            self.sheet.graph.finish(self.model.key)
+            self.evaluate()
+        elif self.sheet.graph.is_resolved(self.model.key):
+            self.evaluate_with_inputs()
+        else:
+            self.resolve_inputs()
+
     def run_in_main(self):
         """
         Evaluates the cell's value in the main thread.
@@ -494,87 +329,44 @@ class CellView(ltk.Widget): # pylint: disable=too-many-public-methods
 
     def show_loading(self):
         """
-        Shows a loading indicator on the cell if the worker version is set to WORKER_LOADING.
+        Shows a loading indicator on the cell's view, if it has one.
         """
-        if state.WORKER_VERSION != constants.WORKER_LOADING:
-            return
-        text = self.text()
-        if not text.startswith(constants.ICON_HOUR_GLASS):
-            self.text(f"{constants.ICON_HOUR_GLASS} {text}")
+        if self.view:
+            self.view.show_loading()
 
     def remove_loading(self):
         """
-        Removes the loading indicator on the cell
+        Removes the loading indicator on the cell's view, if it has one.
         """
-        self.text(self.text().replace(constants.ICON_HOUR_GLASS, ""))
+        if self.view:
+            self.view.remove_loading()
 
-    def resolve_inputs(self):
+    def can_batch(self):
         """
-        Resolves the input cells required to evaluate the current cell's formula or script.
+        Determines whether the cell can run in the worker as part of a batch,
+        which requires a worker formula with known inputs.
         """
-        if self.is_running() or "# no-worker" in self.model.script:
-            return
-        self.start_running()
-        ltk.publish(
-            "Application",
-            "Worker",
-            constants.TOPIC_WORKER_FIND_INPUTS,
-            {
-                "key": self.model.key, 
-                "script": self.model.script[1:]
-            },
+        return (
+            self.is_formula()
+            and not "# no-worker" in self.model.script
+            and self.sheet.graph.is_resolved(self.model.key)
         )
-        # result will arrive in handle_inputs
 
-    def inputs_missing(self):
+    def needs_inputs(self):
         """
-        Checks if any of the input cells required to evaluate the current cell need to be evaluated.
+        Determines whether the inputs of the cell's worker formula still need to be discovered.
         """
-        missing = False
-        for key in self.inputs:
-            cell = self.sheet.get_cell(key)
-            if cell.is_formula() and not self.sheet.counts[key]:
-                cell.evaluate()
-                missing = True
-        if missing:
-            self.resolve_inputs()
-        return missing
+        return (
+            self.is_formula()
+            and not "# no-worker" in self.model.script
+            and not self.sheet.graph.is_resolved(self.model.key)
+        )
 
-    def set_inputs(self, inputs):
+    def resolve_inputs(self):
         """
-        Sets the input cells for the current cell.
-        
-        This method is typically called after resolving the input cells
-        required to evaluate the current cell.
+        Resolves the input cells required to evaluate the current cell's formula or script.
         """
-        self.running = False
-        self.inputs = inputs
-        for key in self.get_input_cells():
-            cell = self.sheet.get_cell(key)
-            cell.dependents.add(self.model.key)
-
-    def handle_inputs(self, inputs):
-        """
-        Handles the result of resolving the input cells required to evaluate
-        the current cell's formula or script.
-        
-        This method is called after the worker has found the input cells needed to
-        evaluate the current cell.  It sets the input cells, checks if any are missing,
-        and then publishes a message to the worker to run the cell's script.
-        
-        If any of the input cells are missing, this method will return without publishing
-        the message to the worker. The cell will remain in a "loading" state until the
-        missing inputs are resolved.
-        
-        If all input cells are present, this method will increment the cell's execution
-        count, mark the cell as needing worker processing, and publish a message to the
-        worker to run the cell's script.
-        """
-        if self.model.key in inputs:
-            self.report_cycle(inputs)
-        self.set_inputs(inputs)
-        if not self.inputs_missing() and self.needs_evaluation:
-            self.evaluate_with_inputs()
+        self.sheet.resolve_inputs([self.model.key])
 
     def evaluate_with_inputs(self):
         """
@@ -594,13 +386,13 @@ class CellView(ltk.Widget): # pylint: disable=too-many-public-methods
     def handle_worker_result(self, result):
         """
         Handles the result of a worker job that was run to evaluate the current cell's script.
-        
+
         This method is called after the worker has finished running the cell's script. It processes the
         result of the worker job, updating the cell's value and state accordingly.
-        
+
         If the worker job encountered an error, this method will handle the error, displaying it in the
         console and marking the line in the editor where the error occurred.
-        
+
         If the worker job completed successfully, this method will update the cell's value and notify
         any dependents of the cell that the value has changed.
         """
@@ -621,16 +413,10 @@ class CellView(ltk.Widget): # pylint: disable=too-many-public-methods
             duration = result["duration"]
             lineno = result["lineno"]
             tb = result["traceback"]
-            parts = error.split("'")
-            if len(parts) == 3 and parts[0] == "name " and parts[2] == " is not defined":
-                key = parts[1]
-                if key in self.inputs:
-                    # The worker job ran out of sequence, ignore this error for now
-                    return
             self.update(duration, error)
-            if self.sheet.current.model.key == self.model.key:
+            if self.is_current():
                 self.sheet.editor.mark_line(lineno, error)
-                self.draw_cell_arrows()
+                self.view.draw_cell_arrows()
             last_tb_lines = "\n".join(tb.split("\n")[-2:])
             state.console.write(self.model.key, f"[Error] {self.model.key}: Line {lineno}: {last_tb_lines} {tb}")
             return
@@ -638,8 +424,335 @@ class CellView(ltk.Widget): # pylint: disable=too-many-public-methods
         if isinstance(value, str):
             value = value[1:-1] if value.startswith("'") and value.endswith("'") else value
         self.update(result["duration"], value)
-        self.notify()
         self.activate_preview()
 
+    def __repr__(self):
+        return f"node[{self.model.key}]"
+
+
+class CellView(ltk.Widget): # pylint: disable=too-many-public-methods
+    """
+    Represents a cell view in the sheet, managing the display of a single cell.
+    The evaluation of the cell is done by its `CellNode`.
+    """
+
+    observer = ltk.window.MutationObserver.new(
+        ltk.proxy(lambda records, _: CellView.cellview_mutated(records)) # pylint: disable=unnecessary-lambda
+    )
+    observer_config = ltk.to_js({
+        "childList": True,
+        "characterData": True,
+        "attributes": True,
+        "subtree": True
+    })
+    sheet = None
+
+    def __init__(self, sheet, node: CellNode, td=None):
+        self.node = node
+        self.model = node.model
+        super().__init__()
+        CellView.sheet= sheet
+        node.view = self
+        self.attach(td)
+
+    def attach(self, td=None):
+        """
+        Binds the cell view to the element for its cell in the grid. The grid only renders
+        the cells that are visible, so a cell that is not rendered gets a detached element.
+
+        Args:
+            td (object, optional): The element to use, instead of looking it up in the grid.
+        """
+        self.element = td or ltk.find(f"#{self.model.key}")
+        if not self.element.length:
+            self.element = ltk.window.jQuery(html_maker.make_cell(self.model.column, self.model.row, self.sheet.model))
+        self.observer.observe(self.element[0], self.observer_config)
+        self.on("mouseenter", self.sheet.cell_enter)
+
+    def detach(self):
+        """
+        Unbinds the cell view from its node, after the cell scrolled out of view.
+        """
+        if self.node.view is self:
+            self.node.view = None
+
+    def is_rendered(self):
+        """
+        Returns True if the cell is currently rendered in the grid.
+        """
+        return (self.model.column, self.model.row) in self.sheet.viewport
+
+    def position(self):
+        """
+        Returns the position of the cell in the grid, also when the cell is not rendered.
+        """
+        if self.is_rendered():
+            return self.element.position()
+        view = self.sheet.viewport
+        return ltk.to_js({
+            "left": view.get_column_left(self.model.column),
+            "top": view.get_row_top(self.model.row),
+        })
+
+    def outerWidth(self): # pylint: disable=invalid-name
+        """
+        Returns the width of the cell including its padding and border, also when the cell is not rendered.
+        """
+        if self.is_rendered():
+            return self.element.outerWidth()
+        return self.sheet.viewport.get_column_width(self.model.column)
+
+    def outerHeight(self): # pylint: disable=invalid-name
+        """
+        Returns the height of the cell including its padding and border, also when the cell is not rendered.
+        """
+        if self.is_rendered():
+            return self.element.outerHeight()
+        return self.sheet.viewport.get_row_height(self.model.row)
+
+    @property
+    def inputs(self):
+        """
+        Returns the keys of the cells this cell reads from, as recorded in the sheet's dependency graph.
+        """
+        return self.node.inputs
+
+    @property
+    def dependents(self):
+        """
+        Returns the keys of the cells that read from this cell, as recorded in the sheet's dependency graph.
+        """
+        return self.node.dependents
+
+    @classmethod
+    def cellview_mutated(cls, mutation_records):
+        """
+        One or more cellviews were mutated.
+        """
+        for key in set(record.target.id for record in mutation_records):
+            if key and key in cls.sheet.cell_views:
+                cls.sheet.cell_views[key].ui_changed()
+
+    def ui_changed(self):
+        """
+        Updates the cell's value and script based on changes made in the UI.
+        """
+        new_value = str(self.element.attr("worker-set"))
+        if new_value not in ["None", "<undefined>"]:
+            self.set(new_value)
+            self.element.removeAttr("worker-set")
+
+    def enter(self):
+        """
+        Draws cell arrows and raises a preview when the cell is entered.
+        """
+        selection.remove_arrows(0)
+        self.draw_cell_arrows()
+        if self.model.key in preview.previews:
+            preview.previews[self.model.key].draw_arrows()
+            element = ltk.find(f"#preview-{self.model.key}")
+            element.appendTo(element.parent()) # raise the preview to the top
+
+    def set(self, script, evaluate=True):
+        """
+        Sets the script of the cell and evaluates it if necessary.
+
+        Args:
+            script (str): The new script to set for the cell.
+            evaluate (bool, optional): When false does evaluate the new script.
+        """
+        self.node.set(script, evaluate)
+
+    def edited(self, script):
+        """
+        Updates the cell's value with the provided script when the user edited the cell.
+
+        Args:
+            script (str): The new script to set for the cell.
+        """
+        self.node.set(script)
+
+    def evaluate(self):
+        """
+        Evaluates the cell's value based on its script or formula.
+        """
+        self.node.evaluate()
+
+    def is_formula(self):
+        """
+        Determines whether the cell's script is a formula.
+        """
+        return self.node.is_formula()
+
+    def select(self):
+        """
+        Selects the current cell, removes any existing cell arrows, saves the current
+        selection position, sets the cell script in the editor, updates the AI prompt
+        input, sets the selection text, shows the cell attributes container, sets the
+        CSS editors, and scrolls the selection into view.
+        """
+        self.remove_arrows()
+        self.sheet.editor.set(self.model.script)
+        ltk.find("#selection").text(f"Cell: {self.model.key}")
+        ltk.find("#cell-attributes-container").css("display", "block")
+        self.set_prompt()
+        self.set_css_editors()
+        selection.scroll(self)
+
+    def set_prompt(self):
+        """
+        Sets the cell's prompt.
+        """
+        prompt_editor = ltk.find("#ai-prompt")
+        if not prompt_editor.hasFocus():
+            prompt_editor.val(self.model.prompt)
+
+    def set_css_editors(self):
+        """
+        Sets the CSS editor values for the current cell based on the cell's current CSS styles.
+        """
+        font_family = self.css("font-family")
+        ltk.find("#cell-font-family").val(font_family or constants.DEFAULT_FONT_FAMILY)
+
+        font_size = round(ltk.window.parseFloat(self.css("font-size")))
+        ltk.find("#cell-font-size").val(font_size or constants.DEFAULT_FONT_SIZE)
+
+        vertical_align = self.css("vertical-align")
+        ltk.find("#cell-vertical-align").val(vertical_align or constants.DEFAULT_VERTICAL_ALIGN)
+
+        text_align = self.css("text-align").replace("start", "left")
+        ltk.find("#cell-text-align").val(text_align or constants.DEFAULT_TEXT_ALIGN)
+
+        font_style = self.css("font-style")
+        ltk.find("#cell-font-style").val(font_style or constants.DEFAULT_FONT_STYLE)
+
+        font_weight = {"400": "normal", "700": "bold"}[self.css("font-weight")]
+        ltk.find("#cell-font-weight").val(font_weight or constants.DEFAULT_FONT_WEIGHT)
+
+        color = api.rgb_to_hex(self.css("color")) or constants.DEFAULT_COLOR
+        ltk.find("#cell-color").val(color).css("background", color)
+
+        background = api.rgb_to_hex(self.css("background-color")) or constants.DEFAULT_FILL
+        ltk.find("#cell-fill").val(background).css("background", background)
+
+    def clear(self):
+        """
+        Clears the current cell by resetting the cell's CSS styles to default values,
+        clearing its text, and then clearing the cell's node.
+        """
+        self.css({
+            "font-family": constants.DEFAULT_FONT_FAMILY,
+            "font-size": constants.DEFAULT_FONT_SIZE,
+            "font-style": constants.DEFAULT_FONT_STYLE,
+            "color": constants.DEFAULT_COLOR,
+            "background-color": constants.DEFAULT_FILL,
+            "vertical-align": constants.DEFAULT_VERTICAL_ALIGN,
+            "font-weight": constants.DEFAULT_FONT_WEIGHT,
+            "text-align": constants.DEFAULT_TEXT_ALIGN,
+        })
+        self.text("")
+        self.node.clear()
+
+    def draw_cell_arrows(self):
+        """
+        Draws the arrows indicating dependencies between cells on the sheet.
+        """
+        self.draw_arrows([])
+        self.adjust_arrows()
+
+    def remove_arrows(self):
+        """
+        Removes any arrow markers that have been drawn on the sheet.
+        """
+        selection.remove_arrows()
+
+    def draw_arrows(self, seen):
+        """
+        Draws the arrows indicating dependencies between this cell and other cells on the sheet.
+        """
+        if self.model.key in seen:
+            self.node.report_cycle(seen)
+            return
+        seen.append(self.model.key)
+        self.remove_arrows()
+        if state.mobile():
+            return
+        if not self.inputs:
+            return
+        keys = []
+        for key in self.inputs:
+            keys.extend(api.CellRange(key).corners() if ":" in key else [key])
+        cells = [ self.sheet.get_cell(key) for key in keys ]
+        ltk.window.addArrow(self.create_marker(cells, "inputs-marker arrow", seen), self.element)
+        self.addClass("arrow")
+
+    def create_marker(self, cells, clazz, seen):
+        """
+        Creates a marker element that represents a group of cells on the sheet.
+
+        The marker is a div element that is positioned to encompass the cells, and has a class
+        name that can be used to style it. The marker also has an event handler attached that
+        removes any arrow markers when the user moves the mouse over it.
+
+        Args:
+            cells (list): A list of cell objects that the marker represents.
+            clazz (str): A CSS class name to apply to the marker element.
+            seen (list): A list of cell keys that have been visited so far in the dependency graph.
+
+        Returns:
+            The created marker element.
+        """
+        if not cells:
+            return None
+        if len(cells) == 1:
+            cells[0].draw_arrows(seen)
+            return cells[0]
+        top, left, bottom, right = 10000, 10000, 0, 0
+        for cell in cells:
+            position = cell.position()
+            left = min(position.left, left)
+            top = min(position.top, top)
+            right = max(position.left + cell.outerWidth(), right)
+            bottom = max(position.top + cell.outerHeight(), bottom)
+        return (ltk.Div()
+            .addClass("marker")
+            .addClass(clazz)
+            .css("left", left)
+            .css("top", top)
+            .width(round(right - left - 4))
+            .height(round(bottom - top - 5))
+            .on("mousemove", ltk.proxy(lambda event: selection.remove_arrows()))
+            .appendTo(ltk.find(".sheet-grid"))
+        )
+
+    def adjust_arrows(self):
+        """
+        Adjusts the position of arrow lines on the sheet to account for scrolling.
+        """
+        ltk.find(".leader-line").appendTo(ltk.find("#sheet-scrollable"))
+        container = ltk.find("#sheet-container")
+        scroll_left = container.scrollLeft()
+        scroll_top = container.scrollTop()
+        for arrow_line in ltk.find_list(".leader-line"):
+            arrow_line \
+                .css("top", ltk.window.parseFloat(arrow_line.css("top")) + scroll_top - 49) \
+                .css("left", ltk.window.parseFloat(arrow_line.css("left")) + scroll_left)
+
+    def show_loading(self):
+        """
+        Shows a loading indicator on the cell if the worker version is set to WORKER_LOADING.
+        """
+        if state.WORKER_VERSION != constants.WORKER_LOADING:
+            return
+        text = self.text()
+        if not text.startswith(constants.ICON_HOUR_GLASS):
+            self.text(f"{constants.ICON_HOUR_GLASS} {text}")
+
+    def remove_loading(self):
+        """
+        Removes the loading indicator on the cell
+        """
+        self.text(self.text().replace(constants.ICON_HOUR_GLASS, ""))
+
     def __repr__(self):
         return f"cell[{self.model.key}]"
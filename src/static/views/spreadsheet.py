@@ -23,7 +23,10 @@ import html_maker
 import selection
 import state
 import editor
+import graph
+import viewport
 
+from views.cell import CellNode
 from views.cell import CellView
 
 completion_cache = {}
@@ -56,6 +59,7 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
         self.ai_scheduled = False
         self.clear()
         ltk.subscribe(constants.PUBSUB_SHEET_ID, ltk.TOPIC_WORKER_RESULT, self.handle_worker_result)
+        ltk.subscribe(constants.PUBSUB_SHEET_ID, constants.TOPIC_WORKER_RESULTS, self.handle_worker_results)
         ltk.subscribe(constants.PUBSUB_SHEET_ID, ltk.pubsub.TOPIC_WORKER_READY, self.worker_ready)
         ltk.subscribe(constants.PUBSUB_SHEET_ID, constants.TOPIC_API_SET_CELLS, self.handle_set_cells)
         self.cell_views = {}
@@ -64,6 +68,7 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
         self.selection_edited = False
         self.mousedown = False
         self.recording = False
+        self.viewport = viewport.Viewport(self.model)
         self.fill_cache()
         self.create_ui()
         self.setup_pubsub()
@@ -73,11 +78,34 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
         """
         Handle a request from the worker to set a collection of cells.
         """
-        with history.SingleEdit(f"Set {len(cells)} cells"):
-            with models.freeze():
-                for key, value in cells.items():
-                    cell = self.get_cell(key)
-                    cell.set(value)
+        if not cells:
+            return
+        edit = models.RangeEdit(f"Set {len(cells)} cells").set_values(self.model.cells, cells)
+        history.add(edit.apply(self.model))
+
+    def cells_changed(self, keys):
+        """
+        Updates the sheet after a range edit changed the given cells in the model.
+        The rendered cells are refreshed, and the changed formulas and the cells that
+        depend on changed cells are recalculated.
+
+        Args:
+            keys (list): The keys of the cells that changed.
+        """
+        cells = self.model.cells
+        formulas = []
+        dependents = set()
+        for key in keys:
+            self.graph.invalidate(key)
+            script = cells.get_script(key)
+            if script.startswith("="):
+                formulas.append(key)
+            else:
+                self.cache[key] = api.convert(script)
+            dependents.update(self.graph.get_dependents(key))
+        self.render()
+        self.recalculate(formulas + list(dependents))
+        self.reselect()
 
     def fill_cache(self):
         """
@@ -85,8 +113,9 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
         
         This cache is used by cells to provide input cell values to the worker.
         """
-        for model in self.model.cells.values():
-            self.cache[model.key] = api.convert(model.value)
+        cells = self.model.cells
+        for key in cells:
+            self.cache[key] = api.convert(cells.get_value(key))
 
     def model_changed(self, sheet, info):
         """
@@ -101,6 +130,7 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
                 - "height": The new height of the row.
                 - "column": The column that was changed.
                 - "width": The new width of the column.
+                - "keys": The cells changed by a range edit.
         
         This method updates the UI.
         """
@@ -120,6 +150,8 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
                     history.add(models.NameChanged("", new_name).apply(self.model))
             elif field_name == "style":
                 print("Change style", info)
+            elif field_name == "cells":
+                self.cells_changed(info["keys"])
             self.sheet_resized()
 
     def setup_window_listeners(self):
@@ -130,6 +162,66 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
         ltk.window.columnResized = ltk.proxy(lambda event: self.column_resized(event)) # pylint: disable=unnecessary-lambda
         ltk.window.rowResizing = ltk.proxy(lambda event: self.row_resizing(event)) # pylint: disable=unnecessary-lambda
         ltk.window.rowResized = ltk.proxy(lambda event: self.row_resized(event)) # pylint: disable=unnecessary-lambda
+        ltk.window.sheetMoved = ltk.proxy(lambda: self.sheet_moved()) # pylint: disable=unnecessary-lambda
+        ltk.window.extendSheet = ltk.proxy(
+            lambda column, row: self.extend_sheet(column, row) # pylint: disable=unnecessary-lambda
+        )
+
+    def sheet_moved(self):
+        """
+        This method is called when the sheet was scrolled. It schedules an update of the
+        rendered rows and columns, at most once per turn of the event loop.
+        """
+        ltk.schedule(self.update_viewport, "update viewport")
+
+    def update_viewport(self):
+        """
+        Renders the grid again when scrolling made rows or columns visible that are not rendered yet.
+        """
+        container = ltk.find("#sheet-container")
+        grid = ltk.find(".sheet-grid")
+        if not container.length or not grid.length:
+            return
+        left = constants.ROW_HEADER_WIDTH - ltk.window.parseFloat(grid.css("margin-left"))
+        top = constants.COLUMN_HEADER_HEIGHT - ltk.window.parseFloat(grid.css("margin-top"))
+        if self.viewport.update(left, top, container.width(), container.height()):
+            self.render()
+
+    def extend_sheet(self, column, row):
+        """
+        Grows the sheet to include the given column and row, for instance when cells are pasted.
+        
+        Args:
+            column (int): The column that should exist in the sheet.
+            row (int): The row that should exist in the sheet.
+        """
+        if self.viewport.extend(column, row):
+            self.update_viewport()
+
+    def render(self):
+        """
+        Renders the rows and columns in the window of the viewport, and binds the cell views
+        of the rendered cells to their new elements. Cells that are no longer rendered lose
+        their view, unless they are selected, but keep their node.
+        """
+        self.selection.detach()
+        ltk.find("#column-header").html(html_maker.make_column_labels(self.viewport))
+        ltk.find("#row-header").html(html_maker.make_row_labels(self.model, self.viewport))
+        ltk.find("#sheet-cells").html(html_maker.make_grid(self.model, self.viewport))
+        ltk.window.makeSheetResizable()
+        selected = [self.current, self.multi_selection.cell1, self.multi_selection.cell2]
+        for key, cell in list(self.cell_views.items()):
+            if cell.is_rendered():
+                cell.attach()
+            elif not cell in selected:
+                cell.detach()
+                del self.cell_views[key]
+        for key in self.viewport.get_keys():
+            if key in self.cell_nodes and not key in self.cell_views:
+                self.get_cell(key)
+        if self.current and self.current.is_rendered():
+            self.selection.appendTo(self.current.element)
+        self.multi_selection.draw()
 
     def sheet_resized(self):
         """
@@ -206,6 +298,22 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
         height = round(label.height())
         history.add(models.RowChanged(row, height).apply(self.model))
 
+    def get_node(self, key):
+        """
+        Get the CellNode instance for the given cell key, which evaluates the cell
+        without creating any DOM for it.
+        
+        Args:
+            key (str): The cell key, e.g. 'A2'.
+        
+        Returns:
+            CellNode: The CellNode instance for the given cell key.
+        """
+        if key not in self.cell_nodes:
+            assert api.is_cell_reference(key), f"Bad key, got '{key}', expected something like 'A2'"
+            self.cell_nodes[key] = CellNode(self, key, self.model.get_cell(key))
+        return self.cell_nodes[key]
+
     def get_cell(self, key):
         """
         Get the CellView instance for the given cell key.
@@ -216,10 +324,8 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
         Returns:
             CellView: The CellView instance for the given cell key.
         """
-        assert api.is_cell_reference(key), f"Bad key, got '{key}', expected something like 'A2'"
         if key not in self.cell_views:
-            cell_model = self.model.get_cell(key)
-            self.cell_views[key] = CellView(self, key, cell_model)
+            self.cell_views[key] = CellView(self, self.get_node(key))
         return self.cell_views[key]
 
     def clear(self):
@@ -227,10 +333,111 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
         Clears the state of the spreadsheet, resetting the cells, cache, and counts. Also sets the current cell to None.
         """
         self.cell_views = {}
+        self.cell_nodes = {}
         self.cache = {}
         self.counts = collections.defaultdict(int)
+        self.graph = graph.DependencyGraph()
         self.current = None
 
+    def recalculate(self, keys):
+        """
+        Recalculates the given cells and everything that depends on them.
+
+        Each affected cell runs once, after all of its inputs have been recalculated.
+        
+        Args:
+            keys (list): The keys of the cells that changed.
+        """
+        self.graph.mark_dirty(keys)
+        self.run_ready()
+
+    def run_ready(self):
+        """
+        Runs all cells that are waiting to be recalculated and whose inputs are up to date.
+
+        The inputs of all formulas that are not known yet, such as a pasted column, are
+        discovered with one message to the worker, so that those formulas become ready
+        together. Cells with known inputs are sent to the worker as one batch, which includes
+        dependents of cells in the same batch. The remaining cells run one by one.
+        """
+        unresolved = []
+        for key in self.graph.take_ready(lambda key: not self.get_node(key).can_batch()):
+            if self.get_node(key).needs_inputs():
+                unresolved.append(key)
+            else:
+                self.get_node(key).run()
+        self.resolve_inputs(unresolved)
+        batch = self.graph.take_batch(lambda key: self.get_node(key).can_batch())
+        if len(batch) > 1:
+            self.run_batch(batch)
+        elif batch:
+            self.get_node(batch[0]).run()
+
+    def resolve_inputs(self, keys):
+        """
+        Asks the worker to discover the inputs of the given formulas, in one message.
+
+        Args:
+            keys (list): The keys of the cells whose inputs are not known yet.
+        """
+        cells = []
+        for key in keys:
+            node = self.get_node(key)
+            if node.is_running() or "# no-worker" in node.model.script:
+                continue
+            node.start_running()
+            cells.append([key, node.model.script[1:]])
+        if cells:
+            ltk.publish(
+                "Application",
+                "Worker",
+                constants.TOPIC_WORKER_FIND_INPUTS,
+                { "cells": cells },
+            )
+        # results will arrive in handle_inputs
+
+    def run_batch(self, keys):
+        """
+        Sends an ordered list of cells to the worker to be evaluated in one call.
+
+        Args:
+            keys (list): The keys of the cells to run, each after its inputs.
+        """
+        cells = [self.get_node(key) for key in keys]
+        inputs = {}
+        for cell in cells:
+            self.counts[cell.model.key] += 1
+            cell.show_loading()
+            inputs.update(cell.get_input_cells())
+        for key in keys:
+            inputs.pop(key, None)
+        ltk.publish(
+            "Application",
+            "Worker",
+            constants.TOPIC_WORKER_RUN_BATCH,
+            {
+                "cells": [[cell.model.key, cell.model.script[1:]] for cell in cells],
+                "inputs": inputs,
+            },
+        )
+        # results will arrive in handle_worker_results
+
+    def cell_updated(self, key):
+        """
+        Called when a cell received a new value, to schedule its dependents.
+
+        If the cell was part of a recalculation, its dependents are already marked as dirty.
+        Otherwise, a new recalculation is started for them.
+
+        Args:
+            key (str): The key of the cell that was updated.
+        """
+        if self.graph.is_dirty(key):
+            self.graph.finish(key)
+        else:
+            self.graph.mark_dirty(self.graph.get_dependents(key))
+        self.run_ready()
+
     def copy(self, from_cell, to_cell):
         """
         Copies the contents from one cell to another.
@@ -254,13 +461,23 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
                 the cell key, a preview, and potentially a prompt.
         """
         key = result["key"]
-        cell: CellView = self.get_cell(key)
+        cell: CellNode = self.get_node(key)
         cell.handle_worker_result(result)
         if result.get("prompt"):
             self.add_completion_button(key, result["prompt"])
         self.reselect()
         preview.add(self, key, result["preview"])
 
+    def handle_worker_results(self, results):
+        """
+        Handles the results of a batch run in the worker, in the order the cells ran.
+        
+        Args:
+            results (list): A list of results, each like the ones for `handle_worker_result`.
+        """
+        for result in results:
+            self.handle_worker_result(result)
+
     def add_completion_button(self, key, prompt):
         """
         Adds a AI prompt completion button to the UI for the given cell key and prompt.
@@ -340,6 +557,7 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
         The user exited the page, so sync all pending changes.
         """
         self.save_screenshot()
+        history.flush_pending()
 
     def sync(self):
         """
@@ -401,10 +619,11 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
         """
         Returns a list of keys for cells in the spreadsheet model that contain a URL starting with "https:".
         """
+        cells = self.model.cells
         return [
             key
-            for key, cell in self.model.cells.items()
-            if cell.script.startswith("https:")
+            for key in cells
+            if str(cells.get_script(key)).startswith("https:")
         ]
 
     def find_urls(self):
@@ -479,7 +698,10 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
         This method dispatches navigation events to the appropriate handler based on the target element. 
         If the target is a "selection" element, it handles navigation within the selected cells. 
         If the target is a "main" element, it handles navigation within the main spreadsheet area.
+        Escape also cancels a paste that is in progress.
         """
+        if event.key == "Escape":
+            self.multi_selection.cancel_paste()
         target = ltk.find(event.target)
         if target.hasClass("selection"):
             self.navigate_selection(event)
@@ -544,8 +766,7 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
         if event.key == "Tab":
             column += -1 if event.shiftKey else 1
         elif event.key in ["Delete", "Backspace"]:
-            with models.freeze():
-                self.multi_selection.clear()
+            self.multi_selection.clear()
         elif event.key == "ArrowLeft":
             column = max(1, column - 1)
         elif event.key == "Home":
@@ -638,25 +859,26 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
 
     def show_loading(self):
         """
-        Marks all cells in the spreadsheet that have a formula (start with "=") as loading,
+        Marks all rendered cells in the spreadsheet that have a formula (start with "=") as loading,
         indicating that their values are being calculated.
         """
-        for key, cell in self.model.cells.items():
-            if cell.script.startswith("="):
+        cells = self.model.cells
+        for key in self.viewport.get_keys():
+            if key in cells and str(cells.get_script(key)).startswith("="):
                 self.get_cell(key).show_loading()
 
-    def start_running(self, cell: CellView):
+    def start_running(self, cell: CellNode):
         """
         Starts the cell's evaluation.
         """
-        if self.current is cell:
+        if cell.is_current():
             self.editor.start_running()
 
-    def stop_running(self, cell: CellView):
+    def stop_running(self, cell: CellNode):
         """
         Stops the cell's evaluation.
         """
-        if self.current is cell:
+        if cell.is_current():
             self.editor.stop_running()
 
     def worker_ready(self, data): # pylint: disable=unused-argument
@@ -665,9 +887,12 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
 
         It iterates through all the formula cells in the model and runs them.
         """
-        for key, cell in self.model.cells.items():
-            if cell.script.startswith("="):
-                self.get_cell(key).evaluate()
+        cells = self.model.cells
+        self.recalculate([
+            key
+            for key in cells
+            if str(cells.get_script(key)).startswith("=")
+        ])
         self.sync()
         if self.editor.get() == "Loading...":
             self.complete_prompt()
@@ -895,14 +1120,24 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
 
     def handle_inputs(self, data):
         """
-        Handles the inputs calculated by the worker for a cell in the spreadsheet.
+        Handles the inputs calculated by the worker for one or more cells in the spreadsheet.
+
+        The inputs of all cells are recorded in the dependency graph before any of them
+        are scheduled, so cells that were resolved together can run together as one batch.
+        Cells with dirty inputs remain in a "loading" state until those inputs are done.
         
         Args:
             self (Spreadsheet): The Spreadsheet instance.
-            data (dict): A dictionary containing the key of the cell and the input data.
+            data (dict): A dictionary with "cells", a list of dicts with the key of a cell and its inputs,
+                or a single such dict.
         """
-        cell = self.get_cell(data["key"])
-        cell.handle_inputs(data["inputs"])
+        inputs = {}
+        for result in data.get("cells", [data]):
+            self.get_node(result["key"]).running = False
+            inputs[result["key"]] = result["inputs"]
+        for key, cycle in self.graph.resolve(inputs).items():
+            self.get_node(key).report_cycle(cycle[:-1])
+        self.run_ready()
 
     def create_ui(self):  # pylint: disable=too-many-locals
         """
@@ -996,7 +1231,7 @@ class SpreadsheetView():     # pylint: disable=too-many-instance-attributes,too-
         ltk.inject_css(html_maker.make_css(self.model))
         left_panel = ltk.Div(
             ltk.Div(
-                ltk.window.jQuery(html_maker.make_html(self.model))
+                ltk.window.jQuery(html_maker.make_html(self.model, self.viewport))
             ).attr("id", "sheet-scrollable")
         ).attr("id", "sheet-container")
 
@@ -28,6 +28,8 @@ get = ltk.window.get
 cache = {}
 results = {}
 inputs_cache = {}
+code_cache = api.CodeCache()
+modules = {}
 pysheets = api.PySheets(None, cache)
 completion_cache = {}
 
@@ -196,28 +198,37 @@ def generate_completion(key, prompt):
     )
 
 
+def get_namespace():
+    """
+    Returns the namespace that scripts run in, which looks up names in the pyodide,
+    pyscript, and pysheets modules first, then in the results computed by this worker,
+    and then in the cache of values sent by the application.
+    """
+    if not modules:
+        modules["pyodide"] = pyodide
+        modules["pyscript"] = pyscript
+        modules["pysheets"] = sys.modules["pysheets"] = pysheets
+    return api.Namespace(modules, results, cache)
+
+
 def run_in_worker(script):
     """
     Executes a Python script in the worker context, with access to the global
     cache and results dictionaries, as well as the pyodide, pyscript, and pysheets modules.
     
     The script is first intercepted to ensure the last expression is returned
-    as the result. The script is then executed in the _globals environment,
-    which includes the cache and results dictionaries, as well as the pyodide,
-    pyscript, and pysheets modules. The result of the script execution is returned.
+    as the result, and compiled. The compiled code is cached, so unchanged scripts
+    are not parsed and compiled again. The code is then executed in a namespace
+    that looks up the pyodide, pyscript, and pysheets modules, and the values in the
+    results and cache dictionaries, only when the script refers to them.
+    The result of the script execution is returned.
     """
 
-    _globals = {}
-    _globals.update(cache)
-    _globals.update(results)
-    _globals["pyodide"] = pyodide
-    _globals["pyscript"] = pyscript
-    _globals["pysheets"] = sys.modules["pysheets"] = pysheets
+    _globals = get_namespace()
     _locals = _globals
     worker_patch.network_calls = []
     setattr(pysheets, "_inputs", cache)
-    script = api.intercept_last_expression(script)
-    exec(script, _globals, _locals) # pylint: disable=exec-used
+    exec(code_cache.get(script), _globals, _locals) # pylint: disable=exec-used
     return _locals["_"]
 
 
@@ -240,14 +251,19 @@ def format_exception():
     ])
 
 
-def handle_run(data): # pylint: disable=too-many-locals
+def run_cell(key, script, inputs): # pylint: disable=too-many-locals
     """
-    Executes a Python script in the worker context, with access to the global
-    cache and results dictionaries, as well as the pyodide, pyscript, and pysheets modules.
+    Executes the script for one cell in the worker context and describes the outcome.
+
+    Args:
+        key (str): The key of the cell.
+        script (str): The script of the cell, without the leading "=".
+        inputs (dict): The values of the inputs of the cell, used in error messages.
+
+    Returns:
+        dict: The result to publish to the UI for this cell.
     """
     start = time.time()
-    key, script, inputs = data
-    cache.update(inputs)
     try:
         result = run_in_worker(script)
     except Exception as e:  # pylint: disable=broad-except
@@ -272,25 +288,33 @@ def handle_run(data): # pylint: disable=too-many-locals
             error = str(formatting_error)
             lineno = script.count("\n") + 1
 
-        polyscript.xworker.sync.publish(
-            "Worker",
-            "Application",
-            ltk.pubsub.TOPIC_WORKER_RESULT,
-            json.dumps(
-                {
-                    "key": key,
-                    "value": None,
-                    "preview": "",
-                    "duration": time.time() - start,
-                    "lineno": lineno,
-                    "error": error,
-                    "network": worker_patch.network_calls,
-                    "traceback": stack,
-                }
-            ),
-        )
-        return
+        return {
+            "key": key,
+            "value": None,
+            "preview": "",
+            "duration": time.time() - start,
+            "lineno": lineno,
+            "error": error,
+            "network": worker_patch.network_calls,
+            "traceback": stack,
+        }
+
+    return report_result(key, script, result, start)
+
+
+def report_result(key, script, result, start):
+    """
+    Records the value of a cell in the worker and describes it for the UI.
+
+    Args:
+        key (str): The key of the cell.
+        script (str): The script of the cell, without the leading "=".
+        result (Any): The value computed for the cell.
+        start (float): The time the evaluation of the cell started.
 
+    Returns:
+        dict: The result to publish to the UI for this cell.
+    """
     try:
         kind = result.__class__.__name__
         if result.__class__.__name__ == "DataFrame":
@@ -302,25 +326,17 @@ def handle_run(data): # pylint: disable=too-many-locals
             kind = f"{kind} with {result.size:,} items"
         cache[key] = results[key] = result
     except Exception as error:  # pylint: disable=broad-exception-caught
-        polyscript.xworker.sync.publish(
-            "Worker",
-            "Application",
-            ltk.pubsub.TOPIC_WORKER_RESULT,
-            json.dumps(
-                {
-                    "key": key,
-                    "script": script,
-                    "value": None,
-                    "preview": "",
-                    "network": worker_patch.network_calls,
-                    "lineno": 1,
-                    "duration": time.time() - start,
-                    "error": f"Worker result error: {type(error)}:{error}",
-                    "traceback": traceback.format_exc(),
-                }
-            ),
-        )
-        return
+        return {
+            "key": key,
+            "script": script,
+            "value": None,
+            "preview": "",
+            "network": worker_patch.network_calls,
+            "lineno": 1,
+            "duration": time.time() - start,
+            "error": f"Worker result error: {type(error)}:{error}",
+            "traceback": traceback.format_exc(),
+        }
 
     try:
         columns = result.columns.values
@@ -338,44 +354,113 @@ def handle_run(data): # pylint: disable=too-many-locals
     try:
         preview = create_preview(result)
         base_kind = kind in ["int", "str", "float"]
-        polyscript.xworker.sync.publish(
-            "Worker",
-            "Application",
-            ltk.pubsub.TOPIC_WORKER_RESULT,
-            json.dumps(
-                {
-                    "key": key,
-                    "duration": time.time() - start,
-                    "script": script,
-                    "value": preview if base_kind else kind,
-                    "preview": "" if base_kind else preview,
-                    "prompt": prompt,
-                    "network": worker_patch.network_calls,
-                    "error": (
-                        preview
-                        if kind == "str" and preview.startswith("ERROR:")
-                        else None
-                    ),
-                }
+        return {
+            "key": key,
+            "duration": time.time() - start,
+            "script": script,
+            "value": preview if base_kind else kind,
+            "preview": "" if base_kind else preview,
+            "prompt": prompt,
+            "network": worker_patch.network_calls,
+            "error": (
+                preview
+                if kind == "str" and preview.startswith("ERROR:")
+                else None
             ),
-        )
+        }
     except Exception as e: # pylint: disable=broad-exception-caught
-        polyscript.xworker.sync(
-            "Worker",
-            "Application",
-            ltk.pubsub.TOPIC_WORKER_RESULT,
-            json.dumps(
-                {
-                    "key": key,
-                    "value": None,
-                    "script": script,
-                    "preview": "",
-                    "duration": time.time() - start,
-                    "error": f"Worker preview error: {type(e)}:{e}",
-                    "traceback": traceback.format_exc(),
-                }
-            ),
-        )
+        return {
+            "key": key,
+            "value": None,
+            "script": script,
+            "preview": "",
+            "duration": time.time() - start,
+            "lineno": 1,
+            "error": f"Worker preview error: {type(e)}:{e}",
+            "traceback": traceback.format_exc(),
+        }
+
+
+def handle_run(data):
+    """
+    Executes a Python script in the worker context, with access to the global
+    cache and results dictionaries, as well as the pyodide, pyscript, and pysheets modules.
+    """
+    key, script, inputs = data
+    cache.update(inputs)
+    polyscript.xworker.sync.publish(
+        "Worker",
+        "Application",
+        ltk.pubsub.TOPIC_WORKER_RESULT,
+        json.dumps(run_cell(key, script, inputs)),
+    )
+
+
+def handle_run_batch(data):
+    """
+    Executes the scripts for an ordered list of cells back-to-back and publishes all
+    results in one message.
+
+    The cells are sorted so that each cell comes after its inputs. Values for inputs
+    that are computed inside the batch are taken from the worker's own results,
+    while the external inputs are provided as one snapshot. Runs of formulas that
+    were copied across rows, such as `=B1*C1` to `=B1000*C1000`, are evaluated
+    as one NumPy operation.
+
+    Args:
+        data (dict): A dict with "cells", a list of [key, script] pairs, and "inputs",
+            a dict with the values of the cells outside the batch.
+    """
+    inputs = data["inputs"]
+    cache.update(inputs)
+    cells = data["cells"]
+    scripts = dict(cells)
+    runs = {
+        run["keys"][0]: run
+        for run in api.find_vector_runs(cells)
+    }
+    done = {}
+    for key, script in cells:
+        if key in done:
+            continue
+        if key in runs:
+            done.update(run_vector(runs[key], scripts))
+        if key not in done:
+            done[key] = run_cell(key, script, inputs)
+    polyscript.xworker.sync.publish(
+        "Worker",
+        "Application",
+        constants.TOPIC_WORKER_RESULTS,
+        json.dumps([done[key] for key, _ in cells]),
+    )
+    stats = code_cache.stats()
+    ltk.window.console.orig_log(
+        f"[Worker] Ran {len(cells):,} cells, code cache: {stats['hits']:,} hits, {stats['misses']:,} misses"
+    )
+
+
+def run_vector(run, scripts):
+    """
+    Evaluates a run of copied formulas as one vector operation.
+    Inputs are looked up in the same namespace as when running each cell separately.
+
+    Args:
+        run (dict): A run of formulas, as found by `api.find_vector_runs`.
+        scripts (dict): The scripts of the cells in the batch, by key.
+
+    Returns:
+        dict: The result for each cell in the run, or an empty dict when the run
+            cannot be vectorized and its cells need to run one by one.
+    """
+    start = time.time()
+    values = api.evaluate_vector_run(run, get_namespace())
+    if values is None:
+        return {}
+    worker_patch.network_calls = []
+    return {
+        key: report_result(key, scripts[key], value, start)
+        for key, value in zip(run["keys"], values)
+    }
 
 
 def handle_preview_import_web(data):
@@ -440,6 +525,23 @@ def handle_set_cells(cells):
         cache[key] = value
 
 
+def find_cell_inputs(key, script):
+    """
+    Finds the inputs of a cell, using the inputs cache for scripts that were seen before.
+
+    Returns:
+        dict: The key of the cell and its inputs, and an error when the script cannot be parsed.
+    """
+    inputs = inputs_cache.get(script, None)
+    try:
+        if inputs is None:
+            inputs = api.find_inputs(script)
+        inputs_cache[script] = inputs
+        return {"key": key, "inputs": inputs}
+    except Exception as e: # pylint: disable=broad-exception-caught
+        return {"key": key, "error": str(e), "inputs": []}
+
+
 def handle_request(sender, topic, request): # pylint: disable=unused-argument
     """
     Handles various requests received by the worker process, including:
@@ -453,36 +555,16 @@ def handle_request(sender, topic, request): # pylint: disable=unused-argument
         if topic == constants.TOPIC_WORKER_COMPLETE:
             generate_completion(data["key"], data["prompt"])
         elif topic == constants.TOPIC_WORKER_FIND_INPUTS:
-            key, script = data["key"], data["script"]
-            inputs = inputs_cache.get(script, None)
-            try:
-                if inputs is None:
-                    inputs = api.find_inputs(script)
-                inputs_cache[script] = inputs
-                polyscript.xworker.sync.publish(
-                    "Worker",
-                    "Application",
-                    constants.TOPIC_WORKER_INPUTS,
-                    json.dumps(
-                        {
-                            "key": key,
-                            "inputs": inputs,
-                        }
-                    ),
-                )
-            except Exception as e: # pylint: disable=broad-exception-caught
-                polyscript.xworker.sync.publish(
-                    "Worker",
-                    "Application",
-                    constants.TOPIC_WORKER_INPUTS,
-                    json.dumps(
-                        {
-                            "key": key,
-                            "error": str(e),
-                            "inputs": [],
-                        }
-                    ),
-                )
+            if "cells" in data:
+                result = {"cells": [find_cell_inputs(key, script) for key, script in data["cells"]]}
+            else:
+                result = find_cell_inputs(data["key"], data["script"])
+            polyscript.xworker.sync.publish(
+                "Worker",
+                "Application",
+                constants.TOPIC_WORKER_INPUTS,
+                json.dumps(result),
+            )
         elif topic == constants.TOPIC_WORKER_CODE_COMPLETE:
             try:
                 text, line, ch = data
@@ -497,6 +579,8 @@ def handle_request(sender, topic, request): # pylint: disable=unused-argument
                 pass
         elif topic == ltk.pubsub.TOPIC_WORKER_RUN:
             handle_run(data)
+        elif topic == constants.TOPIC_WORKER_RUN_BATCH:
+            handle_run_batch(data)
         elif topic == constants.TOPIC_API_SET_CELLS:
             handle_set_cells(data)
         elif topic == constants.TOPIC_WORKER_IMPORT_WEB:
@@ -517,6 +601,9 @@ polyscript.xworker.sync.handler = handle_request
 polyscript.xworker.sync.subscribe(
     "Worker", ltk.TOPIC_WORKER_RUN, "pyodide-worker"
 )
+polyscript.xworker.sync.subscribe(
+    "Worker", constants.TOPIC_WORKER_RUN_BATCH, "pyodide-worker"
+)
 polyscript.xworker.sync.subscribe(
     "Worker", constants.TOPIC_WORKER_COMPLETE, "pyodide-worker"
 )
@@ -170,6 +170,84 @@ def _load_with_trampoline(url):
 
 
 
+def load_all(urls):
+    """
+    Loads several URLs with as few requests to the server as possible, which fetches them concurrently.
+    Lists longer than `constants.LOAD_BATCH_MAX_URLS` are sent in several requests.
+    The contents are kept in the network cache, so that loading any of these URLs
+    with `urllib` or `pysheets.load_url` afterwards returns at once.
+    
+    Args:
+        urls (list): The URLs to load.
+    
+    Returns:
+        list: The contents of the URLs, in the same order.
+    
+    Raises:
+        IOError: If one or more of the URLs could not be loaded, or the server sent an unexpected response.
+    """
+    urls = list(urls)
+    contents = []
+    errors = []
+    for start in range(0, len(urls), constants.LOAD_BATCH_MAX_URLS):
+        batch = urls[start:start + constants.LOAD_BATCH_MAX_URLS]
+        for url, result in zip(batch, load_batch(batch)):
+            content = result.get("content", "")
+            status = result.get("status", 0)
+            network_calls.append((
+                "GET",
+                url,
+                status,
+                len(content),
+                result.get("error") or f"{content[:64]}{'...' if len(content) > 64 else ''}"
+            ))
+            if status != 200:
+                errors.append(f"{url}: {result.get('error') or status}")
+                continue
+            network_cache[f"/load?url={ltk.window.encodeURIComponent(url)}"] = time.time(), content
+            contents.append(content)
+    if errors:
+        raise IOError(f"Cannot load {', '.join(errors)}")
+    return contents
+
+
+def load_batch(urls):
+    """
+    Sends one request to the server to load at most `constants.LOAD_BATCH_MAX_URLS` URLs.
+
+    Returns:
+        list: A dict for each URL, in the same order, with its status and content, or an error.
+
+    Raises:
+        IOError: If the request failed, or the server sent an unexpected response.
+    """
+    xhr = ltk.window.XMLHttpRequest.new()
+    xhr.open("POST", "/load_batch", False)
+    xhr.setRequestHeader("Content-Type", "application/json")
+    xhr.send(json.dumps({constants.URLS: urls}))
+    if xhr.status != 200:
+        raise IOError(f"HTTP Error: {xhr.status} for /load_batch")
+    results = parse_batch(xhr.responseText, urls)
+    if results is None:
+        raise IOError(f"Unexpected response from /load_batch: {xhr.responseText[:64]}")
+    return results
+
+
+def parse_batch(text, urls):
+    """
+    Parses the response of `/load_batch`, returning None when it does not have one result per URL.
+    """
+    try:
+        results = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(results, list) or len(results) != len(urls):
+        return None
+    if not all(isinstance(result, dict) and result.get("url") == url for url, result in zip(urls, results)):
+        return None
+    return results
+
+
 class HTTPHandler(urllib.request.HTTPHandler):
     """ 
     A custom HTTP handler for urllib.request that uses the PyScript-based XMLHttpRequest
@@ -0,0 +1,235 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+An index of the static files served by PySheets, built once at startup.
+
+Each file gets an ETag that is a hash of its contents, so browsers can revalidate it
+with a conditional request, and receive "304 Not Modified" when it did not change.
+URLs that carry the hash as a version, such as `api.py?v=1a2b3c`, can be cached forever,
+as a new version of the file gets a new URL.
+
+Text files are sent compressed when the browser accepts it. Precompressed `.br` and `.gz`
+files next to the original are used when present. Otherwise, files are compressed with
+gzip, or brotli when it is installed, the first time they are asked for, and kept in memory.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+try:
+    import brotli # pylint: disable=import-error
+except ImportError:
+    brotli = None
+
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+VERSION = "v"
+MIN_COMPRESS_BYTES = 1024
+MAX_COMPRESS_BYTES = 8 * 1024 * 1024
+COMPRESSED_SUFFIXES = {".br": "br", ".gz": "gzip"}
+SKIPPED_FOLDERS = ["__pycache__"]
+COMPRESSIBLE_TYPES = [
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "application/wasm",
+    "image/svg+xml",
+    "image/x-icon",
+    "image/vnd.microsoft.icon",
+]
+
+mimetypes.add_type("text/x-python", ".py")
+mimetypes.add_type("application/javascript", ".mjs")
+
+
+def get_mimetype(path):
+    """
+    Returns the mimetype to send a file with, based on its name.
+    """
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def is_compressible(mimetype):
+    """
+    Returns whether files of the given mimetype get noticeably smaller when compressed.
+    """
+    return any(mimetype.startswith(prefix) for prefix in COMPRESSIBLE_TYPES)
+
+
+def compress(content, encoding):
+    """
+    Compresses content with the given encoding, "br" or "gzip".
+    """
+    if encoding == "br":
+        return brotli.compress(content)
+    return gzip.compress(content, mtime=0)
+
+
+def get_accepted_encodings(header):
+    """
+    Returns the content encodings the client accepts, from its `Accept-Encoding` header.
+    """
+    encodings = set()
+    for part in (header or "").split(","):
+        name, _, quality = part.strip().partition(";")
+        if name and quality.strip().replace(" ", "") not in ["q=0", "q=0.0", "q=0.00", "q=0.000"]:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def get_cache_control(asset, version):
+    """
+    Returns the `Cache-Control` header for an asset, which is cached forever when asked for
+    with the version of its current contents, and revalidated on every use otherwise.
+    """
+    return IMMUTABLE if version == asset.etag else REVALIDATE
+
+
+class Asset(): # pylint: disable=too-few-public-methods
+    """
+    A static file, with the hash of its contents and its compressed variants.
+    """
+    def __init__(self, path, content):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self.size = len(content)
+        self.etag = hashlib.sha256(content).hexdigest()[:16]
+        self.mimetype = get_mimetype(path)
+        self.files = {}
+        self.variants = {}
+        self.lock = threading.Lock()
+        self.compressible = is_compressible(self.mimetype) and MIN_COMPRESS_BYTES <= self.size <= MAX_COMPRESS_BYTES
+
+    def get_encoding(self, accepted):
+        """
+        Returns the best content encoding to send this file with, or None to send it as is.
+
+        Args:
+            accepted (set): The encodings the client accepts, from `get_accepted_encodings`.
+        """
+        for encoding in ["br", "gzip"]:
+            if encoding in accepted and (encoding in self.files or self.compressible and self.can_compress(encoding)):
+                return encoding
+        return None
+
+    @staticmethod
+    def can_compress(encoding):
+        """
+        Returns whether files can be compressed with the given encoding in this process.
+        """
+        return encoding == "gzip" or brotli is not None
+
+    def get_variant(self, encoding):
+        """
+        Returns the contents of this file in the given encoding, reading or compressing it the first time.
+        """
+        with self.lock:
+            if encoding not in self.variants:
+                if encoding in self.files:
+                    with open(self.files[encoding], "rb") as file:
+                        self.variants[encoding] = file.read()
+                else:
+                    with open(self.path, "rb") as file:
+                        self.variants[encoding] = compress(file.read(), encoding)
+            return self.variants[encoding]
+
+    def get_etag(self, encoding):
+        """
+        Returns the ETag of this file in the given encoding, as each encoding is a different representation.
+        """
+        return f"{self.etag}-{encoding}" if encoding else self.etag
+
+
+class AssetIndex():
+    """
+    The static files under a root folder, by their path relative to that folder.
+    When `names` is given, only the files with those relative paths are indexed.
+    """
+    def __init__(self, root, watch=False, names=None):
+        self.root = root
+        self.watch = watch
+        self.names = None if names is None else set(names)
+        self.assets = {}
+        self.lock = threading.Lock()
+        self.build()
+
+    def __len__(self):
+        return len(self.assets)
+
+    def build(self):
+        """
+        Walks the root folder and indexes every file in it.
+        """
+        assets = {}
+        compressed = []
+        for folder, folders, names in os.walk(self.root):
+            folders[:] = [name for name in folders if name not in SKIPPED_FOLDERS and not name.startswith(".")]
+            for name in names:
+                if name.startswith("."):
+                    continue
+                path = os.path.join(folder, name)
+                relative = os.path.relpath(path, self.root).replace(os.sep, "/")
+                suffix = os.path.splitext(name)[1]
+                original = relative[:-len(suffix)] if suffix in COMPRESSED_SUFFIXES else relative
+                if self.names is not None and original not in self.names:
+                    continue
+                if suffix in COMPRESSED_SUFFIXES:
+                    compressed.append((relative, path, suffix))
+                else:
+                    assets[relative] = self.create(path)
+        for relative, path, suffix in compressed:
+            original = relative[:-len(suffix)]
+            if original in assets:
+                assets[original].files[COMPRESSED_SUFFIXES[suffix]] = path
+            else:
+                assets[relative] = self.create(path)
+        with self.lock:
+            self.assets = assets
+
+    @staticmethod
+    def create(path):
+        """
+        Creates the asset for a file.
+        """
+        with open(path, "rb") as file:
+            return Asset(path, file.read())
+
+    def get(self, path):
+        """
+        Returns the asset for a path relative to the root folder, or None when there is no such file.
+        When watching for changes, an asset that changed on disk is indexed again.
+        """
+        with self.lock:
+            asset = self.assets.get(path)
+        if asset is not None and self.watch:
+            try:
+                if os.path.getmtime(asset.path) != asset.mtime:
+                    asset = self.create(asset.path)
+                    with self.lock:
+                        self.assets[path] = asset
+            except OSError:
+                return None
+        return asset
+
+    def find(self, path, folders):
+        """
+        Returns the first asset found for a path in one of the given folders, or None.
+        An empty folder name stands for the root folder.
+        """
+        for folder in folders:
+            asset = self.get(f"{folder}/{path}" if folder else path)
+            if asset is not None:
+                return asset
+        return None
+
+    def get_url(self, path):
+        """
+        Returns the URL of a file that includes the hash of its contents, so that it can be cached forever.
+        """
+        asset = self.get(path)
+        return f"{path}?{VERSION}={asset.etag}" if asset else path
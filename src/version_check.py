@@ -0,0 +1,99 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Finds the installed version of PySheets, and the latest version published on PyPI.
+
+The latest version is kept in memory, and refreshed in the background once it is older
+than `TTL` seconds, so asking for it never waits for PyPI, except for the very first request.
+"""
+
+import importlib.metadata
+import json
+import threading
+import time
+
+
+PACKAGE = "pysheets-app"
+PYPI_URL = f"https://pypi.org/pypi/{PACKAGE}/json"
+UNKNOWN = "0.0.0"
+TTL = 3600
+RETRY = 300
+FIRST_WAIT = 5
+
+
+def get_installed_version(package=PACKAGE):
+    """
+    Returns the installed version of a package, or "dev" when it is not installed, such as when running from a checkout.
+    """
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return "dev"
+
+
+def parse_pypi(content):
+    """
+    Returns the latest version of a package from its PyPI JSON metadata.
+    """
+    return json.loads(content)["info"]["version"]
+
+
+class LatestVersion():
+    """
+    The latest version of PySheets on PyPI, cached for `ttl` seconds.
+    After a failed check, the previous version is kept, and the check is retried after `retry` seconds.
+    """
+    def __init__(self, fetch, ttl=TTL, retry=RETRY, background=True):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.retry = retry
+        self.background = background
+        self.version = UNKNOWN
+        self.expires = 0
+        self.refreshing = False
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+
+    def get(self, now=None):
+        """
+        Returns the latest version from memory, and starts a refresh in the background when it is stale.
+        Only the call that starts the very first refresh waits for it, at most `FIRST_WAIT` seconds.
+        Other calls made meanwhile return `UNKNOWN` at once.
+
+        Args:
+            now (float, optional): The current time.
+
+        Returns:
+            str: The latest version, or `UNKNOWN` when it could not be found yet.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            start = now >= self.expires and not self.refreshing
+            if start:
+                self.refreshing = True
+        if start:
+            first = not self.ready.is_set()
+            if self.background:
+                threading.Thread(target=self.refresh, args=(now,), daemon=True).start()
+            else:
+                self.refresh(now)
+            if first:
+                self.ready.wait(FIRST_WAIT)
+        return self.version
+
+    def refresh(self, now):
+        """
+        Asks PyPI for the latest version, and keeps it until `now + ttl`.
+        """
+        try:
+            version = self.fetch()
+            with self.lock:
+                self.version = version
+                self.expires = now + self.ttl
+        except Exception: # pylint: disable=broad-except
+            with self.lock:
+                self.expires = now + self.retry
+        finally:
+            with self.lock:
+                self.refreshing = False
+            self.ready.set()
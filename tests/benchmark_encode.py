@@ -0,0 +1,127 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Compares the time it takes to encode the cells of a large sheet, with the original
+encoder, which wrote each `Cell` model field by field and scanned all cells twice
+for the extents, and with `CellStore.encode`.
+
+Run it from the root of the repository with `python tests/benchmark_encode.py`.
+"""
+
+import gc
+import json
+import sys
+import time
+
+sys.path.append(".")
+
+perf_counter = time.perf_counter
+
+from tests import mocks # pylint: disable=wrong-import-position,unused-import
+from static import constants # pylint: disable=wrong-import-position
+from static import models # pylint: disable=wrong-import-position
+
+
+ROWS = 20000
+COLUMNS = 3
+REPEAT = 15
+
+
+def create_cells():
+    """
+    Returns the stored fields of a sheet with numbers, text, styled cells, and formulas with values.
+    """
+    cells = {}
+    for row in range(1, ROWS + 1):
+        cells[f"A{row}"] = {"s": str(row)}
+        cells[f"B{row}"] = {"s": f"Item {row}", "style": {"color": "red"} if row % 10 == 0 else {}}
+        cells[f"C{row}"] = {"s": f"=A{row} * 2", "value": row * 2}
+    return cells
+
+
+def escape(value):
+    """
+    The original escape function.
+    """
+    if not isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def encode_original(cells, buffer):
+    """
+    The original encoder: each cell writes its fields with f-strings, and the extents are
+    found by building two lists over all cells.
+    """
+    buffer.append('"cells":{')
+    needs_comma = False
+    for cell in cells.values():
+        if not (cell.value or cell.script or cell.style):
+            continue
+        buffer.append(f"{',' if needs_comma else ''}{json.dumps(cell.key)}:")
+        buffer.append("{")
+        if cell.value not in ["", cell.script]:
+            buffer.append(f'"value":{escape(cell.value)},')
+        if cell.prompt:
+            buffer.append(f'"prompt":{escape(cell.prompt)},')
+        buffer.append(f'"key":"{cell.key}",')
+        styles = []
+        for prop, value in cell.style.items():
+            if value != constants.DEFAULT_STYLE.get(prop):
+                styles.append(f'"{prop}":{escape(value)}')
+        if styles:
+            buffer.append('"style":{')
+            buffer.append(f'{",".join(styles)}')
+            buffer.append('},')
+        buffer.append(f'"s":{escape(cell.script)}')
+        buffer.append("}")
+        needs_comma = True
+    buffer.append('},')
+    max([constants.DEFAULT_ROW_COUNT] + [cell.row for cell in cells.values()])
+    max([constants.DEFAULT_COLUMN_COUNT] + [cell.column for cell in cells.values()])
+
+
+def encode_store(store, buffer):
+    """
+    The current encoder, as called by `Sheet.encode_fields`.
+    """
+    buffer.append('"cells":{')
+    store.encode(buffer)
+    buffer.append('},')
+    store.get_extents()
+
+
+def measure(encode, cells):
+    """
+    Returns the median time in milliseconds to encode the cells into a string, without garbage collection.
+    """
+    times = []
+    gc.disable()
+    for _ in range(REPEAT):
+        start = perf_counter()
+        buffer = []
+        encode(cells, buffer)
+        "".join(buffer)
+        times.append((perf_counter() - start) * 1000)
+    gc.enable()
+    return sorted(times)[REPEAT // 2]
+
+
+def main():
+    """
+    Prints the encoding times for stored cells and for live `Cell` models.
+    """
+    stored = models.CellStore(create_cells())
+    live = models.CellStore(create_cells())
+    for key in list(live):
+        live[key] # pylint: disable=pointless-statement
+    original = {key: live[key] for key in live}
+    # the mocks send print to the PySheets console, so write to stdout directly
+    sys.stdout.write(f"{ROWS * COLUMNS:,} cells, median of {REPEAT} runs\n")
+    sys.stdout.write(f"original encoder, live Cell models: {measure(encode_original, original):7.1f} ms\n")
+    sys.stdout.write(f"CellStore.encode, stored cells:     {measure(encode_store, stored):7.1f} ms\n")
+    sys.stdout.write(f"CellStore.encode, live Cell models: {measure(encode_store, live):7.1f} ms\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -55,3 +55,72 @@ class TestLastExpression(unittest.TestCase):
         actual = api.intercept_last_expression(script)
         expected = "x = 1\ny = 2\n_ = z = 3"
         self.assertEqual(actual, expected)
+
+
+class TestCodeCache(unittest.TestCase):
+    """
+    Tests the `CodeCache` class from the `api` module, which caches compiled cell scripts.
+    """
+
+    def run_script(self, code_cache, script):
+        """
+        Runs a script using the cache and returns the value of its last expression.
+        """
+        env = {}
+        exec(code_cache.get(script), env) # pylint: disable=exec-used
+        return env["_"]
+
+    def test_hit(self):
+        """
+        Tests that running an unchanged script reuses the compiled code.
+        """
+        code_cache = api.CodeCache()
+        self.assertEqual(self.run_script(code_cache, "x = 1\nx + 1"), 2)
+        self.assertEqual(self.run_script(code_cache, "x = 1\nx + 1"), 2)
+        self.assertEqual(code_cache.stats(), {"size": 1, "hits": 1, "misses": 1})
+
+    def test_evict_least_recently_used(self):
+        """
+        Tests that the cache stays bounded and evicts the least recently used script.
+        """
+        code_cache = api.CodeCache(size=2)
+        code_cache.get("1")
+        code_cache.get("2")
+        code_cache.get("1")
+        code_cache.get("3")
+        self.assertEqual(list(code_cache.codes), ["1", "3"])
+
+    def test_syntax_error(self):
+        """
+        Tests that a script with a syntax error is not cached.
+        """
+        code_cache = api.CodeCache()
+        with self.assertRaises(SyntaxError):
+            code_cache.get("x = ")
+        self.assertEqual(code_cache.stats()["size"], 0)
+
+
+class TestNamespace(unittest.TestCase):
+    """
+    Tests the `Namespace` class from the `api` module, which provides lazy globals for cell scripts.
+    """
+
+    def test_lookup_order(self):
+        """
+        Tests that names are looked up in the scopes in order.
+        """
+        namespace = api.Namespace({"A1": 1}, {"A1": 2, "B1": 3})
+        self.assertEqual(namespace["A1"], 1)
+        self.assertEqual(namespace["B1"], 3)
+        with self.assertRaises(KeyError):
+            namespace["C1"] # pylint: disable=pointless-statement
+
+    def test_exec(self):
+        """
+        Tests that scripts, including their functions, see the scopes and builtins.
+        """
+        cells = {"A1": 5}
+        namespace = api.Namespace(cells)
+        exec("def f():\n    return A1 + 1\n_ = [f() for _ in range(len('ab'))]", namespace) # pylint: disable=exec-used
+        self.assertEqual(namespace["_"], [6, 6])
+        self.assertNotIn("f", cells)
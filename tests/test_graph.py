@@ -0,0 +1,254 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+This module contains unit tests for the `graph.DependencyGraph` class, which
+tracks dependencies between cells and schedules their recalculation.
+"""
+
+import sys
+import unittest
+
+sys.path.append("..")
+
+from tests import mocks # pylint: disable=wrong-import-position,unused-import
+from static import graph # pylint: disable=wrong-import-position
+
+
+class TestDependencyGraph(unittest.TestCase):
+    """
+    Tests the edges, ordering, and scheduling of the `graph.DependencyGraph` class.
+    """
+
+    def setUp(self):
+        """
+        Creates a diamond: A1 feeds B1 and C1, which both feed D1.
+        """
+        self.graph = graph.DependencyGraph()
+        self.graph.set_inputs("B1", ["A1"])
+        self.graph.set_inputs("C1", ["A1"])
+        self.graph.set_inputs("D1", ["B1", "C1"])
+
+    def run_all(self):
+        """
+        Runs the recalculation to completion and returns the keys in the order they ran.
+        """
+        ran = []
+        ready = self.graph.take_ready()
+        while ready:
+            for key in ready:
+                ran.append(key)
+                self.graph.finish(key)
+            ready = self.graph.take_ready()
+        return ran
+
+    def test_reverse_edges(self):
+        """
+        Tests that dependents are recorded for each input.
+        """
+        self.assertEqual(self.graph.get_dependents("A1"), {"B1", "C1"})
+        self.assertEqual(self.graph.get_dependents("B1"), {"D1"})
+
+    def test_incremental_update(self):
+        """
+        Tests that changing the inputs of a cell removes stale reverse edges.
+        """
+        self.graph.set_inputs("D1", ["C1", "E1"])
+        self.assertEqual(self.graph.get_dependents("B1"), set())
+        self.assertEqual(self.graph.get_dependents("E1"), {"D1"})
+
+    def test_invalidate(self):
+        """
+        Tests that invalidating a cell forgets its inputs but keeps its dependents.
+        """
+        self.graph.invalidate("B1")
+        self.assertFalse(self.graph.is_resolved("B1"))
+        self.assertEqual(self.graph.get_dependents("A1"), {"C1"})
+        self.assertEqual(self.graph.get_dependents("B1"), {"D1"})
+
+    def test_sort(self):
+        """
+        Tests that cells are sorted with inputs before dependents.
+        """
+        order = self.graph.sort(["D1", "C1", "B1", "A1"])
+        self.assertEqual(order[0], "A1")
+        self.assertEqual(order[-1], "D1")
+
+    def test_runs_once(self):
+        """
+        Tests that each dirty cell in a diamond runs exactly once, in topological order.
+        """
+        self.graph.mark_dirty(["A1"])
+        ran = self.run_all()
+        self.assertEqual(sorted(ran), ["A1", "B1", "C1", "D1"])
+        self.assertEqual(ran[0], "A1")
+        self.assertEqual(ran[-1], "D1")
+        self.assertFalse(self.graph.dirty)
+
+    def test_waits_for_dirty_inputs(self):
+        """
+        Tests that a dependent does not run while one of its inputs is still running.
+        """
+        self.graph.mark_dirty(["A1"])
+        self.assertEqual(self.graph.take_ready(), ["A1"])
+        self.assertEqual(self.graph.take_ready(), [])
+        self.graph.finish("A1")
+        self.assertEqual(self.graph.take_ready(), ["B1", "C1"])
+        self.graph.finish("B1")
+        self.assertEqual(self.graph.take_ready(), [])
+        self.graph.finish("C1")
+        self.assertEqual(self.graph.take_ready(), ["D1"])
+
+    def test_rerun(self):
+        """
+        Tests that a cell marked dirty while running is run again after it finishes.
+        """
+        self.graph.mark_dirty(["A1"])
+        self.graph.take_ready()
+        self.graph.mark_dirty(["A1"])
+        self.graph.finish("A1")
+        self.assertEqual(self.graph.take_ready(), ["A1"])
+
+    def test_cycle(self):
+        """
+        Tests that an edge closing a cycle is reported and not recorded.
+        """
+        cycle = self.graph.set_inputs("A1", ["D1"])
+        self.assertEqual(cycle[0], "A1")
+        self.assertEqual(cycle[-1], "A1")
+        self.assertIn("D1", cycle)
+        self.assertFalse(self.graph.get_inputs("A1"))
+        self.graph.mark_dirty(["A1"])
+        self.assertEqual(len(self.run_all()), 4)
+
+    def test_self_reference(self):
+        """
+        Tests that a cell referring to itself is reported as a cycle.
+        """
+        self.assertEqual(self.graph.set_inputs("E1", ["E1"]), ["E1", "E1"])
+
+    def test_take_batch(self):
+        """
+        Tests that a batch contains the whole dirty subgraph in topological order.
+        """
+        self.graph.mark_dirty(["A1"])
+        batch = self.graph.take_batch(lambda key: True)
+        self.assertEqual(batch, ["A1", "B1", "C1", "D1"])
+        self.assertEqual(self.graph.take_ready(), [])
+
+    def test_take_batch_excluded(self):
+        """
+        Tests that dependents of a cell that cannot be batched stay behind.
+        """
+        self.graph.mark_dirty(["A1"])
+        batch = self.graph.take_batch(lambda key: key != "B1")
+        self.assertEqual(batch, ["A1", "C1"])
+        self.assertEqual(self.graph.take_ready(), [])
+        self.graph.finish("A1")
+        self.assertEqual(self.graph.take_ready(), ["B1"])
+
+    def test_take_ready_accept(self):
+        """
+        Tests that only accepted cells are taken, and that unresolved running cells are reported.
+        """
+        self.graph.mark_dirty(["E1"])
+        self.graph.mark_dirty(["A1"])
+        self.assertEqual(self.graph.take_ready(lambda key: key == "E1"), ["E1"])
+        self.assertTrue(self.graph.is_resolving())
+        self.graph.set_inputs("E1", [])
+        self.assertFalse(self.graph.is_resolving())
+
+    def test_range_dependents(self):
+        """
+        Tests that a range input is one edge, found through any key inside the range.
+        """
+        self.graph.set_inputs("E1", ["A1:D5000"])
+        self.assertEqual(self.graph.get_dependents("C4000"), {"E1"})
+        self.assertEqual(self.graph.get_dependents("B1"), {"D1", "E1"})
+        self.assertEqual(self.graph.get_dependents("E4000"), set())
+        self.graph.invalidate("E1")
+        self.assertEqual(self.graph.ranges, {})
+
+    def test_range_order(self):
+        """
+        Tests that a cell reading a range waits for the dirty cells inside the range.
+        """
+        self.graph.set_inputs("E1", ["A1:D1"])
+        self.graph.mark_dirty(["A1"])
+        ran = self.run_all()
+        self.assertEqual(ran[-1], "E1")
+        self.assertEqual(len(ran), 5)
+
+    def test_range_cycle(self):
+        """
+        Tests that a range containing a dependent of the cell is reported as a cycle.
+        """
+        cycle = self.graph.set_inputs("A1", ["C1:D2"])
+        self.assertEqual(cycle[0], "A1")
+        self.assertEqual(cycle[-1], "A1")
+        self.assertFalse(self.graph.get_inputs("A1"))
+
+    def test_ready_counts(self):
+        """
+        Tests that the number of dirty inputs is kept per cell, and drops as inputs finish.
+        """
+        self.graph.mark_dirty(["A1"])
+        self.assertEqual(self.graph.counts, {"B1": 1, "C1": 1, "D1": 2})
+        self.assertEqual(self.graph.ready, {"A1"})
+        self.graph.finish(self.graph.take_ready()[0])
+        self.assertEqual(self.graph.counts, {"D1": 2})
+        self.assertEqual(self.graph.ready, {"B1", "C1"})
+        self.graph.set_inputs("D1", ["B1"])
+        self.assertEqual(self.graph.counts, {"D1": 1})
+
+    def test_long_chain(self):
+        """
+        Tests that a long chain of dirty cells runs in order, one cell at a time.
+        """
+        keys = [f"A{row}" for row in range(1, 5001)]
+        for input_key, key in zip(keys, keys[1:]):
+            self.graph.set_inputs(key, [input_key])
+        self.graph.mark_dirty(["A1"])
+        ran = self.run_all()
+        self.assertEqual(ran[:3], ["A1", "A2", "B1"])
+        self.assertEqual([key for key in ran if key in keys[1:]], keys[1:])
+        self.assertFalse(self.graph.counts)
+
+    def test_range_columns(self):
+        """
+        Tests that ranges are indexed by the columns they cover, and removed from the index with their last edge.
+        """
+        self.graph.set_inputs("E1", ["B1:C10"])
+        self.graph.set_inputs("E2", ["B1:C10"])
+        self.assertEqual(self.graph.range_columns, {2: {"B1:C10"}, 3: {"B1:C10"}})
+        self.assertEqual(self.graph.get_dependents("C10"), {"E1", "E2"})
+        self.assertEqual(self.graph.get_dependents("C11"), set())
+        self.graph.invalidate("E1")
+        self.graph.invalidate("E2")
+        self.assertEqual(self.graph.range_columns, {})
+
+    def test_batch_not_starved(self):
+        """
+        Tests that a cell waiting for its inputs only holds back batches that feed the same cells.
+        """
+        self.graph.set_inputs("F1", ["E1", "G1"])
+        self.graph.mark_dirty(["E1", "A1"])
+        self.assertEqual(self.graph.take_ready(lambda key: key == "E1"), ["E1"])
+        self.assertEqual(self.graph.take_batch(lambda key: key != "E1"), ["A1", "B1", "C1", "D1"])
+        self.graph.mark_dirty(["G1"])
+        self.assertEqual(self.graph.take_batch(lambda key: key != "E1"), [])
+        self.graph.set_inputs("E1", [])
+        self.assertEqual(self.graph.take_batch(lambda key: key != "E1"), ["G1"])
+
+    def test_pasted_column(self):
+        """
+        Tests that a pasted column of formulas, whose inputs are discovered together, runs as one batch.
+        """
+        keys = [f"E{row}" for row in range(1, 21)]
+        self.graph.mark_dirty(keys)
+        unresolved = self.graph.take_ready(lambda key: not self.graph.is_resolved(key))
+        self.assertEqual(sorted(unresolved), sorted(keys))
+        self.assertEqual(self.graph.take_batch(self.graph.is_resolved), [])
+        cycles = self.graph.resolve({key: [f"B{key[1:]}", f"C{key[1:]}"] for key in unresolved})
+        self.assertEqual(cycles, {})
+        self.assertEqual(self.graph.take_ready(lambda key: not self.graph.is_resolved(key)), [])
+        self.assertEqual(self.graph.take_batch(self.graph.is_resolved), sorted(keys))
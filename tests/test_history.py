@@ -142,3 +142,143 @@ class TestHistoryAdd(unittest.TestCase):
         edit = models.CellValueChanged("A1", "old", "new")
         history.add(edit)
         mock_schedule_flush.assert_called_once()
+
+
+class TestHistoryBudget(unittest.TestCase):
+    """
+    Tests that the history stays within its memory budget by spilling old edits to storage.
+    Edits are created with the `models` module used by `history`, as it checks their types.
+    """
+
+    def setUp(self):
+        history.clear()
+        history.flush = unittest.mock.MagicMock()
+        self.stored = {}
+        self.sheet = history.models.Sheet(uid="budget")
+        patches = [
+            unittest.mock.patch.object(history.state, "SHEET", self.sheet),
+            unittest.mock.patch.object(history.storage, "spill_edit", self.spill_edit),
+            unittest.mock.patch.object(history.storage, "load_edit", self.load_edit),
+            unittest.mock.patch.object(history.storage, "clear_history", lambda uid: self.stored.clear()),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(history.set_budget, constants.HISTORY_MEMORY_BUDGET)
+        self.addCleanup(history.clear)
+
+    def spill_edit(self, uid, seq, data):
+        """
+        Stores a spilled edit in memory, instead of IndexedDB.
+        """
+        self.stored[(uid, seq)] = data
+
+    def load_edit(self, uid, seq, onsuccess):
+        """
+        Loads a spilled edit from memory, instead of IndexedDB.
+        """
+        onsuccess(self.stored.pop((uid, seq), None))
+
+    def test_not_undoable(self):
+        """
+        Tests that edits that cannot be undone are not kept.
+        """
+        with unittest.mock.patch.object(history.timeline, "add_edit") as add_edit:
+            history.add(history.models.SelectionChanged("A1"))
+            history.add(history.models.ScreenshotChanged("data:"))
+        add_edit.assert_not_called()
+        self.assertEqual(history.history, [])
+        self.assertEqual(history.memory, 0)
+
+    def test_resize(self):
+        """
+        Tests that an edit filled after it was added, such as a paste, is measured again.
+        """
+        keys = [f"A{row}" for row in range(1, 101)]
+        edit = history.models.RangeEdit("Paste 100 cells").capture(self.sheet.cells, keys)
+        history.add(edit)
+        empty = history.memory
+        for key in keys:
+            edit.set(key, f"pasted {key}", {"color": "red"})
+        history.resize(edit)
+        self.assertGreater(history.memory, empty)
+        self.assertEqual(history.memory, history.get_size(edit))
+
+    def test_clear_spills(self):
+        """
+        Tests that spilling starts over after the history is cleared, such as when another sheet is loaded.
+        """
+        history.set_budget(1)
+        for n in range(3):
+            history.add(history.models.CellScriptChanged("A1", str(n), str(n + 1)))
+        self.assertEqual(len(self.stored), 2)
+        history.clear()
+        self.stored[("budget", 99)] = "stale"
+        for n in range(2):
+            history.add(history.models.CellScriptChanged("A1", str(n), str(n + 1)))
+        self.assertEqual(list(self.stored), [("budget", 1)])
+
+    def test_spill_and_undo(self):
+        """
+        Tests that old edits are spilled when over budget, and are undone in order after being loaded again.
+        """
+        history.set_budget(1)
+        for n in range(5):
+            edit = history.models.CellScriptChanged("A1", str(n), str(n + 1))
+            history.add(edit.apply(self.sheet))
+        self.assertEqual(len(history.history), 1)
+        self.assertEqual(len(self.stored), 4)
+        for n in reversed(range(5)):
+            history.undo(self.sheet)
+            self.assertEqual(self.sheet.cells["A1"].script, str(n))
+        self.assertEqual(self.stored, {})
+
+    def test_spill_group(self):
+        """
+        Tests that a spilled group of edits is undone as one, in reverse order.
+        """
+        with history.SingleEdit("two edits"):
+            history.add(history.models.CellScriptChanged("A1", "", "1").apply(self.sheet))
+            history.add(history.models.CellScriptChanged("A1", "1", "2").apply(self.sheet))
+        history.add(history.models.RowChanged(3, 40).apply(self.sheet))
+        history.set_budget(1)
+        self.assertEqual(len(self.stored), 1)
+        history.undo(self.sheet)
+        self.assertEqual(self.sheet.rows["3"], constants.DEFAULT_ROW_HEIGHT)
+        self.assertEqual(self.sheet.cells["A1"].script, "2")
+        history.undo(self.sheet)
+        self.assertEqual(self.sheet.cells["A1"].script, "")
+
+
+class TestAutosave(unittest.TestCase):
+    """
+    Tests the delay before changes are saved.
+    """
+
+    def tearDown(self):
+        history.save_cost = 0
+
+    def test_minimum_delay(self):
+        """
+        Tests that cheap saves of small sheets still wait a little, so bursts of edits are saved once.
+        """
+        self.assertEqual(history.get_flush_delay(10, 0), constants.AUTOSAVE_MIN_DELAY)
+
+    def test_adaptive_delay(self):
+        """
+        Tests that expensive saves and large sheets are saved less often, up to a maximum delay.
+        """
+        history.save_cost = 0.2
+        self.assertEqual(history.get_flush_delay(0, 0), 0.2 * constants.AUTOSAVE_COST_FACTOR)
+        self.assertGreater(history.get_flush_delay(50000, 0), history.get_flush_delay(0, 0))
+        history.save_cost = 10
+        self.assertEqual(history.get_flush_delay(0, 0), constants.AUTOSAVE_MAX_DELAY)
+
+    def test_staleness(self):
+        """
+        Tests that changes are saved right away when they have been unsaved for too long.
+        """
+        history.save_cost = 10
+        elapsed = constants.AUTOSAVE_MAX_STALENESS - 1
+        self.assertEqual(history.get_flush_delay(0, elapsed), 1)
+        self.assertEqual(history.get_flush_delay(0, constants.AUTOSAVE_MAX_STALENESS + 5), 0)
@@ -94,13 +94,26 @@ class TestInputs(unittest.TestCase):
         """
         Detect cell reference ranges.
         """
-        self.check("print('C1:C2')", ["C1", "C2"])
+        self.check("print('C1:C2')", ["C1:C2"])
 
     def test_function_range_aa(self):
         """
         Detect cell reference ranges in the AA column.
         """
-        self.check("print('AA1:AB4')", ["AB3", "AB1", "AA4", "AA3", "AA1", "AA2", "AB2", "AB4"])
+        self.check("print('AA1:AB4')", ["AA1:AB4"])
+
+    def test_function_range_normalized(self):
+        """
+        Ranges are normalized to start at the top-left cell.
+        """
+        self.check("print('B4 : A1')", ["A1:B4"])
+
+    def test_inputs_not_shared(self):
+        """
+        Inputs found in one script do not leak into the inputs of the next one.
+        """
+        self.check("C1", ["C1"])
+        self.check("C2", ["C2"])
 
     def mock_worker(self):
         """
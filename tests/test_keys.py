@@ -46,3 +46,47 @@ class TestKeys(unittest.TestCase):
         self.assertEqual(api.get_column_name(2), "B")
         self.assertEqual(api.get_column_name(27), "AA")
         self.assertEqual(api.get_column_name(28), "AB")
+
+
+class TestCellRange(unittest.TestCase):
+    """
+    Tests the `CellRange` class and the `get_input_values` function in the static.api module.
+    """
+
+    def test_contains(self):
+        """
+        Tests that membership is tested without listing the keys in the range.
+        """
+        cells = api.CellRange("A1:Z5000")
+        self.assertEqual(len(cells), 26 * 5000)
+        self.assertIn("M2500", cells)
+        self.assertNotIn("AA1", cells)
+        self.assertNotIn("A5001", cells)
+
+    def test_normalize(self):
+        """
+        Tests that a range is normalized to start at the top-left cell.
+        """
+        cells = api.CellRange("B3 : A1")
+        self.assertEqual(str(cells), "A1:B3")
+        self.assertEqual(list(cells), ["A1", "A2", "A3", "B1", "B2", "B3"])
+        self.assertEqual(cells.corners(), ["A1", "B3"])
+
+    def test_input_values(self):
+        """
+        Tests that single keys default to 0, while ranges only send cells with a value.
+        """
+        values = {"A1": 1, "B2": 2, "C3": 3}
+        self.assertEqual(api.get_input_values(["C3", "D4"], values), {"C3": 3, "D4": 0})
+        self.assertEqual(api.get_input_values(["A1:B1000"], values), {"A1": 1, "B2": 2})
+        self.assertEqual(api.get_input_values(["A1:B2"], values), {"A1": 1, "B2": 2})
+
+    def test_sheet_data(self):
+        """
+        Tests that empty cells in a sheet selection are read as 0, as range inputs omit them.
+        """
+        values = api.get_input_values(["A1:B3"], {"A1": "x", "B1": "y", "A2": 1, "B3": 2})
+        self.assertEqual(api.get_sheet_data(values, "A1:B3"), {"x": [1, 0], "y": [0, 2]})
+        self.assertEqual(api.get_sheet_data(values, "A2:A3", headers=False), {"col-1": [1, 0]})
+        with self.assertRaises(ValueError):
+            api.get_sheet_data(values, "A1")
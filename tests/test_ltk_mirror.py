@@ -0,0 +1,95 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Tests the local mirror of the LTK files.
+"""
+
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append("src")
+
+from tests import mocks # pylint: disable=wrong-import-position,unused-import
+import ltk_mirror # pylint: disable=wrong-import-position
+
+
+class TestLTKMirror(unittest.TestCase):
+    """
+    Tests filling, pinning, and refreshing the mirror.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory() # pylint: disable=consider-using-with
+        self.mirror = os.path.join(self.folder.name, "ltk")
+        self.urls = []
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def get(self, url):
+        """
+        Pretends to download a URL, returning the URL itself as the contents.
+        """
+        self.urls.append(url)
+        return url.encode("utf-8")
+
+    def read(self, name):
+        """
+        Returns the contents of a file in the mirror.
+        """
+        with open(os.path.join(self.mirror, name), "rb") as file:
+            return file.read()
+
+    def test_pinned(self):
+        """
+        Tests that a pinned version is downloaded once, and again when the pin changes.
+        """
+        manifest = ltk_mirror.ensure(self.mirror, "v1", self.get)
+        self.assertEqual(manifest["ref"], "v1")
+        self.assertEqual(len(self.urls), len(ltk_mirror.LTK_FILES))
+        self.assertEqual(self.read("ltk.js"), ltk_mirror.get_url("v1", "ltk.js").encode("utf-8"))
+        ltk_mirror.ensure(self.mirror, "v1", self.get)
+        ltk_mirror.ensure(self.mirror, None, self.get)
+        self.assertEqual(len(self.urls), len(ltk_mirror.LTK_FILES))
+        ltk_mirror.ensure(self.mirror, "v2", self.get)
+        self.assertEqual(ltk_mirror.read_manifest(self.mirror)["ref"], "v2")
+        self.assertEqual(sorted(os.listdir(self.mirror)), sorted(ltk_mirror.LTK_FILES + [ltk_mirror.MANIFEST]))
+
+    def test_failed_download(self):
+        """
+        Tests that the mirror is unchanged when downloading one of the files fails.
+        """
+        ltk_mirror.ensure(self.mirror, "v1", self.get)
+
+        def fail(url):
+            if url.endswith("ltk.css"):
+                raise IOError("offline")
+            return b"new"
+
+        with self.assertRaises(IOError):
+            ltk_mirror.download(self.mirror, "v2", fail)
+        self.assertEqual(ltk_mirror.read_manifest(self.mirror)["ref"], "v1")
+        self.assertNotEqual(self.read("ltk.js"), b"new")
+
+    @unittest.skipUnless(importlib.util.find_spec("ltk"), "pyscript-ltk is not installed")
+    def test_package(self):
+        """
+        Tests that an empty mirror is filled from the installed package, without downloading.
+        """
+        manifest = ltk_mirror.ensure(self.mirror, None, self.get)
+        self.assertTrue(manifest["source"].startswith(ltk_mirror.LTK_PACKAGE))
+        self.assertTrue(ltk_mirror.is_complete(self.mirror))
+        self.assertEqual(self.urls, [])
+
+    def test_has_version(self):
+        """
+        Tests that a mirror at another version than the pinned one is not used.
+        """
+        self.assertFalse(ltk_mirror.has_version(self.mirror, None))
+        ltk_mirror.ensure(self.mirror, "v1", self.get)
+        self.assertTrue(ltk_mirror.has_version(self.mirror, None))
+        self.assertTrue(ltk_mirror.has_version(self.mirror, "v1"))
+        self.assertFalse(ltk_mirror.has_version(self.mirror, "v2"))
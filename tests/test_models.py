@@ -12,7 +12,9 @@ import unittest.mock
 sys.path.append("..")
 
 from tests import mocks # pylint: disable=wrong-import-position,unused-import
+from static import api # pylint: disable=wrong-import-position
 from static import history # pylint: disable=wrong-import-position
+from static import constants # pylint: disable=wrong-import-position
 from static import models # pylint: disable=wrong-import-position
 
 
@@ -310,3 +312,266 @@ class TestEdits(unittest.TestCase):
         self.assertEqual(a1.script, "World")
         history.undo(sheet)
         self.assertEqual(a1.script, "Hello")
+
+    def test_range_edit(self):
+        """
+        Tests that a `RangeEdit` applies and undoes the cells it touched, and notifies the sheet once.
+        """
+        sheet = models.Sheet()
+        sheet.get_cell("A1").script = "1"
+        sheet.get_cell("B2").style = {"color": "red"}
+        notifications = []
+        sheet.listen(lambda sheet, info: notifications.append(info))
+        edit = models.RangeEdit().capture(sheet.cells, ["A1", "B1", "B2"])
+        edit.set("A1", "=B1 + 1", {})
+        edit.set("B1", "5", {"color": "blue"})
+        self.assertEqual(edit.changes["A1"], ["1", "", None, "=B1 + 1", "", None])
+        self.assertEqual(edit.describe(), "A1:B2: change 3 cells")
+        edit.apply(sheet)
+        self.assertEqual(sheet.cells.get_script("A1"), "=B1 + 1")
+        self.assertEqual(sheet.cells.get_value("B1"), "5")
+        self.assertEqual(sheet.cells.get_style("B2"), {"color": "red"})
+        self.assertNotIn("A2", sheet.cells)
+        self.assertEqual(notifications, [{"name": "cells", "keys": ["A1", "B1"]}])
+        edit.undo(sheet)
+        self.assertEqual(sheet.cells.get_script("A1"), "1")
+        self.assertEqual(sheet.cells.get_style("B2"), {"color": "red"})
+        self.assertEqual(sheet.cells.get_script("B1"), "")
+        self.assertEqual(sheet.cells.get_style("B1"), {})
+
+    def test_range_edit_sparse(self):
+        """
+        Tests that a `RangeEdit` only stores the cells it touched, and keeps copies of their styles.
+        """
+        sheet = models.Sheet()
+        sheet.get_cell("A1").style = {"color": "red"}
+        edit = models.RangeEdit().set_values(sheet.cells, {"A1": 1, "ZZ100000": "x"})
+        self.assertEqual(edit.get_keys(), ["A1", "ZZ100000"])
+        self.assertEqual(edit.get_range(), "A1:ZZ100000")
+        sheet.get_cell("A1").style["color"] = "blue"
+        self.assertEqual(edit.changes["A1"][2], {"color": "red"})
+        edit.undo(sheet)
+        self.assertEqual(sheet.cells.get_style("A1"), {"color": "red"})
+
+    def test_import_csv(self):
+        """
+        Tests that importing CSV content sets all its cells with one message, recorded as one `RangeEdit`.
+        """
+        pysheets = api.PySheets(None, {})
+        with unittest.mock.patch.object(api.polyscript, "xworker") as xworker:
+            summary = pysheets._import_csv_content("a,b\n1,2\n3,4", "B2") # pylint: disable=protected-access
+        self.assertEqual(summary, "[6 cells]")
+        xworker.sync.publish.assert_called_once()
+        values = json.loads(xworker.sync.publish.call_args.args[3])
+        sheet = models.Sheet()
+        notifications = []
+        sheet.listen(lambda sheet, info: notifications.append(info))
+        history.add(models.RangeEdit(f"Set {len(values)} cells").set_values(sheet.cells, values).apply(sheet))
+        self.assertEqual(sheet.cells.get_script("C4"), "4")
+        self.assertEqual(len(notifications), 1)
+        history.undo(sheet)
+        self.assertEqual([key for key in values if sheet.cells.get_script(key)], [])
+
+
+class TestCellStore(unittest.TestCase):
+    """
+    Tests the `models.CellStore` class, which stores the cells of a sheet.
+    """
+
+    def setUp(self):
+        """
+        Decodes a sheet with a formula, a computed value, and a styled cell.
+        """
+        sheet = models.Sheet()
+        sheet.get_cell("A1").script = "=B1 + 1"
+        sheet.get_cell("A1").value = 3
+        sheet.get_cell("B1").script = "2"
+        sheet.get_cell("C5").style = {"color": "red"}
+        self.sheet = models.decode(models.encode(sheet))
+
+    def test_lazy(self):
+        """
+        Tests that decoded cells are read without creating `Cell` models.
+        """
+        cells = self.sheet.cells
+        self.assertEqual(len(cells), 3)
+        self.assertEqual(cells.get_script("A1"), "=B1 + 1")
+        self.assertEqual(cells.get_value("A1"), 3)
+        self.assertEqual(cells.get_style("C5"), {"color": "red"})
+        self.assertEqual(cells.get_script("D1"), "")
+        self.assertEqual(cells.models, {})
+
+    def test_materialize(self):
+        """
+        Tests that a `Cell` model is created once, on first access, with all fields.
+        """
+        cell = self.sheet.get_cell("A1")
+        self.assertIs(self.sheet.cells["A1"], cell)
+        self.assertEqual(cell.script, "=B1 + 1")
+        self.assertEqual(cell.value, 3)
+        self.assertEqual(cell.column, 1)
+        self.assertNotIn("A1", self.sheet.cells.scripts)
+        self.assertEqual(sorted(self.sheet.cells), ["A1", "B1", "C5"])
+
+    def test_round_trip(self):
+        """
+        Tests that mixed stored and live cells encode the same as live cells only.
+        """
+        self.sheet.get_cell("B1").script = "5"
+        sheet = models.decode(models.encode(self.sheet))
+        self.assertEqual(sheet.cells.get_script("B1"), "5")
+        self.assertEqual(sheet.cells.get_value("A1"), 3)
+        self.assertEqual(sheet.row_count, self.sheet.row_count)
+
+    def test_delete(self):
+        """
+        Tests that cells can be removed, whether or not their model was created.
+        """
+        del self.sheet.cells["B1"]
+        self.sheet.get_cell("A1")
+        del self.sheet.cells["A1"]
+        self.assertEqual(list(self.sheet.cells), ["C5"])
+        with self.assertRaises(KeyError):
+            del self.sheet.cells["A1"]
+
+    def test_extents(self):
+        """
+        Tests that the extents grow with new cells and shrink when an edge cell is removed.
+        """
+        cells = self.sheet.cells
+        self.assertEqual(cells.get_extents(), (3, 5))
+        self.sheet.get_cell("AA40")
+        self.assertEqual(cells.get_extents(), (27, 40))
+        del cells["AA40"]
+        self.assertEqual(cells.get_extents(), (3, 5))
+        models.encode(self.sheet)
+        self.assertEqual(self.sheet.row_count, constants.DEFAULT_ROW_COUNT)
+
+    def test_update(self):
+        """
+        Tests that bulk updates write stored cells without creating models, and update existing models.
+        """
+        cells = self.sheet.cells
+        cells.update("B1", "7", {"color": "blue"})
+        cells.update("D9", "=B1 * 2", {})
+        self.assertEqual(cells.models, {})
+        self.assertEqual(cells.get_value("B1"), "7")
+        self.assertEqual(cells.get_style("B1"), {"color": "blue"})
+        self.assertEqual(cells.get_value("D9"), "")
+        self.assertEqual(cells.get_extents(), (4, 9))
+        cell = self.sheet.get_cell("A1")
+        cells.update("A1", "hello", {})
+        self.assertEqual((cell.script, cell.value), ("hello", "hello"))
+        self.assertEqual(cells.changed, {"A1", "B1", "D9"})
+
+    def test_encode_same_as_cell(self):
+        """
+        Tests that stored cells encode to the same fields as their `Cell` models.
+        """
+        buffer = []
+        self.sheet.cells.encode(buffer)
+        stored = json.loads("{" + "".join(buffer) + "}")
+        for key in list(self.sheet.cells):
+            self.sheet.get_cell(key)
+        buffer = []
+        self.sheet.cells.encode(buffer)
+        self.assertEqual(json.loads("{" + "".join(buffer) + "}"), stored)
+
+
+    def test_encode_escaping(self):
+        """
+        Tests that the fields of stored cells are escaped, and decode to the same cells.
+        """
+        cells = models.CellStore()
+        cells.update("A1", "123", {})
+        cells.update("A2", 'say "hi"\n\\', {"color": "red\tblue"})
+        cells.update("A3", "=A1 * 2", {}, 246)
+        cells.update("A4", "caf\u00e9 \u00b2", {})
+        buffer = []
+        cells.encode(buffer)
+        decoded = models.CellStore(json.loads("{" + "".join(buffer) + "}"))
+        for key in cells:
+            self.assertEqual(decoded.get_script(key), cells.get_script(key))
+            self.assertEqual(decoded.get_style(key), cells.get_style(key))
+        self.assertEqual(decoded.get_value("A3"), 246)
+
+class TestSheetDelta(unittest.TestCase):
+    """
+    Tests collecting the changes to a sheet with `Sheet.get_changes` and replaying them with `SheetDelta`.
+    """
+
+    def setUp(self):
+        """
+        Creates a sheet and a copy of it, as saved in a snapshot.
+        """
+        self.sheet = models.Sheet(uid="abc")
+        self.sheet.get_cell("A1").script = "1"
+        self.sheet.get_preview("B1", html="<b>B1</b>")
+        self.snapshot = models.encode(self.sheet)
+        self.sheet.clear_changes()
+
+    def replay(self, *deltas):
+        """
+        Loads the snapshot and applies the encoded deltas to it.
+        """
+        sheet = models.decode(self.snapshot)
+        for delta in deltas:
+            models.decode(delta).apply(sheet)
+        return sheet
+
+    def test_no_changes(self):
+        """
+        Tests that an unchanged sheet has no changes.
+        """
+        self.assertIsNone(self.sheet.get_changes())
+
+    def test_cell_changes(self):
+        """
+        Tests that only the changed cells are recorded, including changes while notifications are frozen.
+        """
+        with models.freeze():
+            self.sheet.get_cell("A2").script = "=A1 + 1"
+        self.sheet.get_cell("A2").value = 2
+        changes = self.sheet.get_changes()
+        self.assertEqual(list(changes.cells), ["A2"])
+        self.assertLess(len(models.encode(changes)), 200)
+        self.assertIsNone(self.sheet.get_changes())
+        sheet = self.replay(models.encode(changes))
+        self.assertEqual(sheet.cells.get_script("A2"), "=A1 + 1")
+        self.assertEqual(sheet.cells.get_value("A2"), 2)
+
+    def test_removed(self):
+        """
+        Tests that removed cells and previews are replayed as removed.
+        """
+        del self.sheet.cells["A1"]
+        del self.sheet.previews["B1"]
+        sheet = self.replay(models.encode(self.sheet.get_changes()))
+        self.assertNotIn("A1", sheet.cells)
+        self.assertNotIn("B1", sheet.previews)
+
+    def test_sheet_fields(self):
+        """
+        Tests that changes to the name, column widths, and previews are replayed in order.
+        """
+        self.sheet.name = "Budget"
+        self.sheet.set_column_width("2", 120)
+        first = models.encode(self.sheet.get_changes())
+        self.sheet.previews["B1"].left = 40
+        self.sheet.name = "Budget 2025"
+        sheet = self.replay(first, models.encode(self.sheet.get_changes()))
+        self.assertEqual(sheet.name, "Budget 2025")
+        self.assertEqual(sheet.columns, {"2": 120})
+        self.assertEqual(sheet.previews["B1"].left, 40)
+        self.assertEqual(sheet.previews["B1"].html, "<b>B1</b>")
+
+    def test_metadata(self):
+        """
+        Tests that the metadata of a sheet holds its name and number of cells, but no cells.
+        """
+        self.sheet.name = "Budget"
+        metadata = self.sheet.get_metadata()
+        self.assertEqual(metadata["uid"], self.sheet.uid)
+        self.assertEqual(metadata["name"], "Budget")
+        self.assertEqual(metadata["cell_count"], len(self.sheet.cells))
+        self.assertNotIn("cells", metadata)
@@ -0,0 +1,91 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Tests the `ProxyCache` class, which caches the responses of the `/load` proxy.
+"""
+
+import sys
+import unittest
+
+sys.path.append("src")
+
+from tests import mocks # pylint: disable=wrong-import-position,unused-import
+import proxy_cache # pylint: disable=wrong-import-position
+
+
+class TestProxyCache(unittest.TestCase):
+    """
+    Tests freshness, revalidation, and eviction of cached responses.
+    The current time is passed explicitly, as `time` is mocked for the browser modules.
+    """
+
+    def setUp(self):
+        self.cache = proxy_cache.ProxyCache(max_bytes=10, max_entry_bytes=6)
+
+    def test_key(self):
+        """
+        Tests that requests with a different method, body, or credentials get a different key.
+        """
+        key = proxy_cache.make_key("GET", "https://a.com")
+        self.assertEqual(key, proxy_cache.make_key("get", "https://a.com", "", ""))
+        self.assertNotEqual(key, proxy_cache.make_key("POST", "https://a.com"))
+        self.assertNotEqual(key, proxy_cache.make_key("GET", "https://a.com", authorization="Bearer x"))
+        self.assertNotEqual(
+            proxy_cache.make_key("POST", "https://a.com", '{"q": 1}'),
+            proxy_cache.make_key("POST", "https://a.com", '{"q": 2}'),
+        )
+
+    def test_freshness(self):
+        """
+        Tests that responses are fresh for as long as their headers say.
+        """
+        entry = self.cache.store("a", 200, b"abc", {"Cache-Control": "public, max-age=30"}, now=100)
+        self.assertTrue(entry.is_fresh(129))
+        self.assertFalse(entry.is_fresh(130))
+        entry = self.cache.store("b", 200, b"abc", {}, now=100)
+        self.assertTrue(entry.is_fresh(100 + proxy_cache.DEFAULT_TTL - 1))
+
+    def test_not_cached(self):
+        """
+        Tests that failures, large responses, and responses that must not be stored are not cached.
+        """
+        self.assertIsNone(self.cache.store("a", 500, b"error", {}, now=0))
+        self.assertIsNone(self.cache.store("b", 200, b"1234567", {}, now=0))
+        self.assertIsNone(self.cache.store("c", 200, b"abc", {"Cache-Control": "no-store"}, now=0))
+        self.assertIsNone(self.cache.store("d", 200, b"abc", {"Cache-Control": "no-cache"}, now=0))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_cacheable(self):
+        """
+        Tests that responses that will not be cached are recognized from their status and headers alone.
+        """
+        self.assertTrue(self.cache.is_cacheable(200, {}, now=0))
+        self.assertTrue(self.cache.is_cacheable(200, {"Content-Length": "6"}, 6, now=0))
+        self.assertFalse(self.cache.is_cacheable(404, {}, now=0))
+        self.assertFalse(self.cache.is_cacheable(200, {"Cache-Control": "no-store"}, now=0))
+        self.assertFalse(self.cache.is_cacheable(200, {}, 7, now=0))
+        self.assertFalse(self.cache.is_cacheable(200, {"Cache-Control": "no-cache"}, now=0))
+        self.assertTrue(self.cache.is_cacheable(200, {"Cache-Control": "no-cache", "ETag": '"v1"'}, now=0))
+
+    def test_revalidate(self):
+        """
+        Tests that a stale response with an ETag is kept, and becomes fresh again after a 304.
+        """
+        headers = {"Cache-Control": "no-cache", "ETag": '"v1"'}
+        entry = self.cache.store("a", 200, b"abc", headers, now=100)
+        self.assertFalse(entry.is_fresh(100))
+        self.assertEqual(entry.get_validators(), {"If-None-Match": '"v1"'})
+        self.cache.revalidated("a", {"Cache-Control": "max-age=10"}, now=200)
+        self.assertTrue(self.cache.get("a").is_fresh(205))
+
+    def test_lru(self):
+        """
+        Tests that the least recently used responses are evicted when the cache is full.
+        """
+        self.cache.store("a", 200, b"aaaa", {}, now=0)
+        self.cache.store("b", 200, b"bbbb", {}, now=0)
+        self.cache.get("a")
+        self.cache.store("c", 200, b"cccc", {}, now=0)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a").body, b"aaaa")
+        self.assertEqual(self.cache.size, 8)
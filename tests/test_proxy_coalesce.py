@@ -0,0 +1,49 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Tests the `Coalescer` class, which lets identical `/load` requests share one upstream fetch.
+"""
+
+import sys
+import threading
+import unittest
+
+sys.path.append("src")
+
+from tests import mocks # pylint: disable=wrong-import-position,unused-import
+import proxy_coalesce # pylint: disable=wrong-import-position
+
+
+class TestCoalescer(unittest.TestCase):
+    """
+    Tests leading, waiting for, and finishing flights.
+    """
+
+    def setUp(self):
+        self.flights = proxy_coalesce.Coalescer()
+
+    def test_start(self):
+        """
+        Tests that only the first request for a key leads, until its flight is finished.
+        """
+        self.assertTrue(self.flights.start("a"))
+        self.assertFalse(self.flights.start("a"))
+        self.assertTrue(self.flights.start("b"))
+        self.flights.finish("a")
+        self.flights.finish("a")
+        self.assertEqual(len(self.flights), 1)
+        self.assertTrue(self.flights.start("a"))
+
+    def test_wait(self):
+        """
+        Tests that waiting requests wake up when the flight finishes, and do not wait without a flight.
+        """
+        self.assertTrue(self.flights.wait("a", timeout=0))
+        self.flights.start("a")
+        self.assertFalse(self.flights.wait("a", timeout=0))
+        finished = []
+        waiter = threading.Thread(target=lambda: finished.append(self.flights.wait("a", timeout=10)))
+        waiter.start()
+        self.flights.finish("a")
+        waiter.join()
+        self.assertEqual(finished, [True])
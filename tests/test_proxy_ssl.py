@@ -0,0 +1,57 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Tests `proxy_ssl.send`, which retries a request without verification only when the certificate cannot be verified.
+"""
+
+import sys
+import unittest
+
+sys.path.append("src")
+
+from tests import mocks # pylint: disable=wrong-import-position,unused-import
+import proxy_ssl # pylint: disable=wrong-import-position
+
+
+class SSLError(Exception):
+    """
+    Stands in for `requests.exceptions.SSLError`, as `requests` is mocked.
+    """
+
+
+class TestSend(unittest.TestCase):
+    """
+    Tests when a request is sent again without verification.
+    """
+
+    def test_verified(self):
+        """
+        Tests that a request that succeeds is sent once, with verification.
+        """
+        request = unittest.mock.MagicMock(return_value="response")
+        failed = unittest.mock.MagicMock()
+        self.assertEqual(proxy_ssl.send(request, SSLError, failed), "response")
+        request.assert_called_once_with(verify=True)
+        failed.assert_not_called()
+
+    def test_ssl_error(self):
+        """
+        Tests that a request is sent again without verification when the certificate cannot be verified.
+        """
+        error = SSLError("certificate verify failed")
+        request = unittest.mock.MagicMock(side_effect=[error, "response"])
+        failed = unittest.mock.MagicMock()
+        self.assertEqual(proxy_ssl.send(request, SSLError, failed), "response")
+        self.assertEqual(request.call_args_list, [unittest.mock.call(verify=True), unittest.mock.call(verify=False)])
+        failed.assert_called_once_with(error)
+
+    def test_other_error(self):
+        """
+        Tests that other failures, such as a timeout, are raised without sending the request again.
+        """
+        request = unittest.mock.MagicMock(side_effect=TimeoutError("read timed out"))
+        failed = unittest.mock.MagicMock()
+        with self.assertRaises(TimeoutError):
+            proxy_ssl.send(request, SSLError, failed)
+        request.assert_called_once_with(verify=True)
+        failed.assert_not_called()
@@ -0,0 +1,75 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Tests the helpers that stream the bodies of responses of the `/load` proxy.
+"""
+
+import base64
+import sys
+import unittest
+
+sys.path.append("src")
+
+from tests import mocks # pylint: disable=wrong-import-position,unused-import
+import proxy_stream # pylint: disable=wrong-import-position
+
+
+class TestProxyStream(unittest.TestCase):
+    """
+    Tests encoding, limiting, and collecting streams of chunks.
+    """
+
+    def test_encode_base64(self):
+        """
+        Tests that encoding chunks gives the same result as encoding the whole body, for any chunk sizes.
+        """
+        body = bytes(range(256)) * 3
+        for size in [1, 2, 3, 4, 7, 64, 1000]:
+            chunks = [body[n:n + size] for n in range(0, len(body), size)]
+            encoded = b"".join(proxy_stream.encode_base64(chunks))
+            self.assertEqual(encoded, base64.b64encode(body))
+
+    def test_limit(self):
+        """
+        Tests that a stream is stopped once it grows beyond its maximum size.
+        """
+        self.assertEqual(list(proxy_stream.limit([b"ab", b"cd"], 4)), [b"ab", b"cd"])
+        with self.assertRaises(proxy_stream.TooLarge):
+            list(proxy_stream.limit([b"ab", b"cd", b"e"], 4))
+
+    def test_relay(self):
+        """
+        Tests that a stream that grows too large fails, instead of ending as if it were complete.
+        """
+        bodies = []
+        errors = []
+        stream = proxy_stream.relay([b"ab", b"cd"], 4, 4, bodies.append, errors.append)
+        self.assertEqual(list(stream), [b"ab", b"cd"])
+        self.assertEqual((bodies, errors), ([b"abcd"], []))
+        received = []
+        with self.assertRaises(proxy_stream.TooLarge):
+            for chunk in proxy_stream.relay([b"ab", b"cd", b"e", b"f"], 4, 3, bodies.append, errors.append):
+                received.append(chunk)
+        self.assertEqual(received, [b"ab", b"cd"])
+        self.assertEqual(bodies, [b"abcd", None])
+        self.assertEqual(len(errors), 1)
+
+    def test_collect(self):
+        """
+        Tests that small bodies are collected while they are streamed, and large bodies are not.
+        """
+        bodies = []
+        self.assertEqual(list(proxy_stream.collect([b"ab", b"cd"], 4, bodies.append)), [b"ab", b"cd"])
+        list(proxy_stream.collect([b"ab", b"cd", b"e"], 4, bodies.append))
+        self.assertEqual(bodies, [b"abcd", None])
+
+    def test_collect_too_large(self):
+        """
+        Tests that a body that grows too large is given up on at once, before the stream ends.
+        """
+        bodies = []
+        stream = proxy_stream.collect([b"ab", b"cd", b"e", b"f"], 3, bodies.append)
+        self.assertEqual([next(stream), next(stream)], [b"ab", b"cd"])
+        self.assertEqual(bodies, [None])
+        self.assertEqual(list(stream), [b"e", b"f"])
+        self.assertEqual(bodies, [None])
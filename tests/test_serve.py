@@ -0,0 +1,52 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Tests the options of the `pysheets` console script.
+"""
+
+import sys
+import unittest
+
+sys.path.append("src")
+
+from tests import mocks # pylint: disable=wrong-import-position,unused-import
+import serve # pylint: disable=wrong-import-position
+
+
+class TestServe(unittest.TestCase):
+    """
+    Tests parsing the command line options and turning them into server settings.
+    """
+
+    def test_defaults(self):
+        """
+        Tests that the server listens on the local machine when no options are given.
+        """
+        options = serve.parse_options([], {})
+        self.assertEqual(options.host, serve.DEFAULT_HOST)
+        self.assertEqual(options.port, serve.DEFAULT_PORT)
+        self.assertEqual(options.workers, serve.DEFAULT_WORKERS)
+        self.assertFalse(options.debug)
+        self.assertEqual(serve.get_url(options), "http://127.0.0.1:8081")
+
+    def test_environment(self):
+        """
+        Tests that environment variables provide defaults, and that arguments override them.
+        """
+        environ = {"PYSHEETS_HOST": "0.0.0.0", "PYSHEETS_PORT": "9000", "PYSHEETS_DEBUG": "true"}
+        options = serve.parse_options(["--port", "9001"], environ)
+        self.assertEqual(options.host, "0.0.0.0")
+        self.assertEqual(options.port, 9001)
+        self.assertTrue(options.debug)
+        self.assertEqual(serve.get_url(options), "http://127.0.0.1:9001")
+
+    def test_gunicorn_options(self):
+        """
+        Tests that gunicorn runs threaded workers on the chosen address.
+        """
+        options = serve.parse_options(["--host", "::1", "--workers", "3", "--threads", "4"], {})
+        settings = serve.get_gunicorn_options(options)
+        self.assertEqual(settings["bind"], "[::1]:8081")
+        self.assertEqual(settings["workers"], 3)
+        self.assertEqual(settings["threads"], 4)
+        self.assertEqual(settings["worker_class"], "gthread")
@@ -0,0 +1,96 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Tests the `AssetIndex` class, which indexes the static files served by PySheets.
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append("src")
+
+from tests import mocks # pylint: disable=wrong-import-position,unused-import
+import static_assets # pylint: disable=wrong-import-position
+
+
+class TestAssetIndex(unittest.TestCase):
+    """
+    Tests indexing, versioning, and compressing static files.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory() # pylint: disable=consider-using-with
+        self.root = self.folder.name
+        self.write("api.py", b"x = 1\n" * 1000)
+        self.write("icons/logo.png", b"png")
+        self.write("logo.png", b"other png")
+        self.write("__pycache__/api.pyc", b"pyc")
+        self.write("lib/big.js", b"var x;\n" * 1000)
+        self.write("lib/big.js.gz", b"precompressed")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def write(self, path, content):
+        """
+        Writes a file in the temporary static folder.
+        """
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(content)
+
+    def test_index(self):
+        """
+        Tests that files are indexed by their relative path, and looked up in folders in order.
+        """
+        assets = static_assets.AssetIndex(self.root)
+        self.assertEqual(len(assets), 4)
+        self.assertIsNone(assets.get("__pycache__/api.pyc"))
+        self.assertIsNone(assets.get("lib/big.js.gz"))
+        self.assertEqual(assets.find("logo.png", ["icons", ""]).size, 3)
+        self.assertEqual(assets.find("api.py", ["icons", ""]).mimetype, "text/x-python")
+        self.assertIsNone(assets.find("missing.py", ["icons", ""]))
+
+    def test_names(self):
+        """
+        Tests that only the given files are indexed, with their precompressed variants.
+        """
+        assets = static_assets.AssetIndex(self.root, names=["api.py", "lib/big.js"])
+        self.assertEqual(len(assets), 2)
+        self.assertIsNone(assets.get("logo.png"))
+        self.assertIn("gzip", assets.get("lib/big.js").files)
+        self.assertEqual(len(static_assets.AssetIndex(self.root, names=[])), 0)
+
+    def test_version(self):
+        """
+        Tests that versioned URLs change with the contents, and are cached forever.
+        """
+        assets = static_assets.AssetIndex(self.root, watch=True)
+        asset = assets.get("api.py")
+        self.assertEqual(assets.get_url("api.py"), f"api.py?v={asset.etag}")
+        self.assertEqual(assets.get_url("missing.py"), "missing.py")
+        self.assertEqual(static_assets.get_cache_control(asset, asset.etag), static_assets.IMMUTABLE)
+        self.assertEqual(static_assets.get_cache_control(asset, None), static_assets.REVALIDATE)
+        self.write("api.py", b"x = 2\n")
+        os.utime(os.path.join(self.root, "api.py"), (0, 0))
+        self.assertNotEqual(assets.get("api.py").etag, asset.etag)
+
+    def test_compression(self):
+        """
+        Tests that precompressed files are preferred, and other text files are compressed when asked for.
+        """
+        assets = static_assets.AssetIndex(self.root)
+        accepted = static_assets.get_accepted_encodings("gzip, deflate, br;q=0")
+        self.assertEqual(accepted, {"gzip", "deflate"})
+        script = assets.get("lib/big.js")
+        self.assertEqual(script.get_encoding(accepted), "gzip")
+        self.assertEqual(script.get_variant("gzip"), b"precompressed")
+        self.assertEqual(script.get_etag("gzip"), f"{script.etag}-gzip")
+        api = assets.get("api.py")
+        self.assertEqual(gzip.decompress(api.get_variant("gzip")), b"x = 1\n" * 1000)
+        self.assertIsNone(api.get_encoding(set()))
+        self.assertIsNone(assets.get("logo.png").get_encoding(accepted))
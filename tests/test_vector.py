@@ -0,0 +1,142 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Tests the functions in the `api` module that evaluate runs of copied formulas
+as one vector operation.
+"""
+
+import sys
+import unittest
+
+sys.path.append("src")
+
+from tests import mocks # pylint: disable=wrong-import-position,unused-import
+from static import api # pylint: disable=wrong-import-position
+
+try:
+    import numpy # pylint: disable=unused-import
+except ImportError:
+    numpy = None
+
+
+def fill_down(script, rows, column="D"):
+    """
+    Returns the [key, script] pairs for a formula copied down a column, with `{n}` as the row.
+    """
+    return [[f"{column}{row}", script.format(n=row)] for row in range(1, rows + 1)]
+
+
+class TestVectorTemplate(unittest.TestCase):
+    """
+    Tests the detection of copied formulas with `get_vector_template` and `find_vector_runs`.
+    """
+
+    def test_same_template(self):
+        """
+        Tests that a formula copied to another row has the same template.
+        """
+        template1 = api.get_vector_template("D1", "B1 * C1 + 1")
+        template2 = api.get_vector_template("D2", "B2 * C2 + 1")
+        self.assertEqual(template1[0], template2[0])
+        self.assertEqual(template2[2], {"_m2_0": "B2", "_m1_0": "C2"})
+
+    def test_not_arithmetic(self):
+        """
+        Tests that formulas other than arithmetic on cells and numbers have no template.
+        """
+        self.assertIsNone(api.get_vector_template("D1", "len(B1)"))
+        self.assertIsNone(api.get_vector_template("D1", "B1 ** 2"))
+        self.assertIsNone(api.get_vector_template("D1", "B1 + 'x'"))
+        self.assertIsNone(api.get_vector_template("D1", "x = B1\nx"))
+        self.assertIsNone(api.get_vector_template("D1", "1 + 2"))
+
+    def test_find_run(self):
+        """
+        Tests that a column of copied formulas is found as one run.
+        """
+        runs = api.find_vector_runs(fill_down("B{n} * C{n}", 10))
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(runs[0]["keys"], [f"D{row}" for row in range(1, 11)])
+        self.assertEqual(runs[0]["inputs"]["_m2_0"], [f"B{row}" for row in range(1, 11)])
+
+    def test_short_run(self):
+        """
+        Tests that runs shorter than the minimum are not vectorized.
+        """
+        self.assertEqual(api.find_vector_runs(fill_down("B{n} * C{n}", 3)), [])
+
+    def test_running_total(self):
+        """
+        Tests that a run in which formulas depend on each other is not vectorized.
+        """
+        cells = [["D1", "B1"]] + [[f"D{row}", f"D{row - 1} + B{row}"] for row in range(2, 12)]
+        self.assertEqual(api.find_vector_runs(cells), [])
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestVectorEvaluate(unittest.TestCase):
+    """
+    Tests that `evaluate_vector_run` matches evaluating each formula separately.
+    """
+
+    def evaluate(self, script, values):
+        """
+        Evaluates a formula copied down for all values, separately and as a vector.
+        """
+        cells = fill_down(script, len(values["B"]))
+        cache = {
+            f"{column}{row}": value
+            for column, column_values in values.items()
+            for row, value in enumerate(column_values, 1)
+        }
+        run = api.find_vector_runs(cells)[0]
+        expected = [eval(script, dict(cache)) for _, script in cells] # pylint: disable=eval-used
+        return api.evaluate_vector_run(run, cache), expected
+
+    def test_int(self):
+        """
+        Tests that integer arithmetic produces integers.
+        """
+        actual, expected = self.evaluate("B{n} * C{n} - 3 // C{n} + B{n} % 4", {
+            "B": list(range(-5, 5)),
+            "C": list(range(1, 11)),
+        })
+        self.assertEqual(actual, expected)
+        self.assertTrue(all(isinstance(value, int) for value in actual))
+
+    def test_float(self):
+        """
+        Tests that divisions produce floats.
+        """
+        actual, expected = self.evaluate("-B{n} / C{n} + 0.5", {
+            "B": list(range(10)),
+            "C": [1.5 * row for row in range(1, 11)],
+        })
+        self.assertEqual(actual, expected)
+        self.assertTrue(all(isinstance(value, float) for value in actual))
+
+    def test_fallback(self):
+        """
+        Tests that runs that would not match separate evaluation are not vectorized.
+        """
+        cells = fill_down("B{n} // C{n}", 10)
+        run = api.find_vector_runs(cells)[0]
+        values = {f"B{row}": row for row in range(1, 11)}
+        self.assertIsNone(api.evaluate_vector_run(run, dict(values, **{f"C{row}": 0 for row in range(1, 11)})))
+        self.assertIsNone(api.evaluate_vector_run(run, dict(values, **{f"C{row}": "x" for row in range(1, 11)})))
+        self.assertIsNone(api.evaluate_vector_run(run, values))
+        big = dict(values, **{f"C{row}": 1 for row in range(1, 11)}, B1=2 ** 60)
+        self.assertIsNone(api.evaluate_vector_run(run, big))
+
+    def test_namespace(self):
+        """
+        Tests that inputs are looked up like separate evaluation, with results before the cache.
+        """
+        cells = fill_down("B{n} * 2 + C{n}", 10)
+        run = api.find_vector_runs(cells)[0]
+        results = {f"B{row}": row * 10 for row in range(1, 11)}
+        cache = dict({f"B{row}": -row for row in range(1, 11)}, **{f"C{row}": row for row in range(1, 11)})
+        actual = api.evaluate_vector_run(run, api.Namespace(results, cache))
+        expected = [eval(script, {}, api.Namespace(results, cache)) for _, script in cells] # pylint: disable=eval-used
+        self.assertEqual(actual, expected)
+        self.assertEqual(actual[0], 21)
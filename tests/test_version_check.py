@@ -0,0 +1,91 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Tests finding the installed and latest versions of PySheets.
+"""
+
+import sys
+import threading
+import unittest
+import unittest.mock
+
+sys.path.append("src")
+
+from tests import mocks # pylint: disable=wrong-import-position,unused-import
+import version_check # pylint: disable=wrong-import-position
+
+
+class TestLatestVersion(unittest.TestCase):
+    """
+    Tests caching the latest version. Refreshes run inline, and the current time is passed explicitly.
+    """
+
+    def setUp(self):
+        self.versions = ["1.0.0", "1.1.0"]
+        self.calls = 0
+
+    def fetch(self):
+        """
+        Pretends to ask PyPI for the latest version, failing when there are no more versions.
+        """
+        self.calls += 1
+        if not self.versions:
+            raise IOError("offline")
+        return self.versions.pop(0)
+
+    def test_ttl(self):
+        """
+        Tests that the latest version is fetched once, and again when it is older than the TTL.
+        """
+        latest = version_check.LatestVersion(self.fetch, ttl=100, background=False)
+        self.assertEqual(latest.get(now=0), "1.0.0")
+        self.assertEqual(latest.get(now=99), "1.0.0")
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(latest.get(now=100), "1.1.0")
+        self.assertEqual(self.calls, 2)
+
+    def test_failure(self):
+        """
+        Tests that a failed check keeps the previous version, and is retried later.
+        """
+        self.versions = []
+        latest = version_check.LatestVersion(self.fetch, ttl=100, retry=10, background=False)
+        self.assertEqual(latest.get(now=0), version_check.UNKNOWN)
+        self.assertEqual(latest.get(now=5), version_check.UNKNOWN)
+        self.assertEqual(self.calls, 1)
+        self.versions = ["2.0.0"]
+        self.assertEqual(latest.get(now=10), "2.0.0")
+
+    def test_first_wait(self):
+        """
+        Tests that only the call that starts the first refresh waits for it, while other calls return at once.
+        """
+        started = threading.Event()
+        gate = threading.Event()
+
+        def fetch():
+            started.set()
+            gate.wait(10)
+            return "1.0.0"
+
+        latest = version_check.LatestVersion(fetch)
+        results = []
+        first = threading.Thread(target=lambda: results.append(latest.get(now=0)))
+        with unittest.mock.patch.object(version_check, "FIRST_WAIT", 10):
+            first.start()
+            started.wait(1)
+            other = threading.Thread(target=lambda: results.append(latest.get(now=0)))
+            other.start()
+            other.join(1)
+            self.assertFalse(other.is_alive())
+            self.assertEqual(results, [version_check.UNKNOWN])
+            gate.set()
+            first.join(1)
+        self.assertEqual(results, [version_check.UNKNOWN, "1.0.0"])
+
+    def test_versions(self):
+        """
+        Tests reading the version from PyPI metadata, and the version of a package that is not installed.
+        """
+        self.assertEqual(version_check.parse_pypi('{"info": {"version": "0.5.8"}}'), "0.5.8")
+        self.assertEqual(version_check.get_installed_version("no-such-package-for-pysheets"), "dev")
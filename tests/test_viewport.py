@@ -0,0 +1,106 @@
+"""
+CopyRight (c) 2024 - Chris Laffra - All Rights Reserved.
+
+Tests the `Viewport` class, which decides which rows and columns of a sheet are rendered.
+"""
+
+import sys
+import unittest
+
+sys.path.append("src")
+
+from tests import mocks # pylint: disable=wrong-import-position,unused-import
+from static import constants # pylint: disable=wrong-import-position
+from static import html_maker # pylint: disable=wrong-import-position
+from static import models # pylint: disable=wrong-import-position
+from static import viewport # pylint: disable=wrong-import-position
+
+WIDTH = constants.DEFAULT_COLUMN_WIDTH + constants.CELL_PADDING_AND_BORDER
+HEIGHT = constants.DEFAULT_ROW_HEIGHT + constants.CELL_PADDING_AND_BORDER
+
+
+class TestViewport(unittest.TestCase):
+    """
+    Tests the sizes and the window of a `Viewport`.
+    """
+
+    def setUp(self):
+        self.sheet = models.Sheet(column_count=100, row_count=50000)
+        self.view = viewport.Viewport(self.sheet, overscan_columns=2, overscan_rows=10)
+
+    def test_offsets(self):
+        """
+        Tests the position of columns and rows, with and without custom sizes.
+        """
+        self.assertEqual(self.view.get_column_left(1), 0)
+        self.assertEqual(self.view.get_column_left(3), 2 * WIDTH)
+        self.assertEqual(self.view.get_row_top(11), 10 * HEIGHT)
+        self.sheet.columns["2"] = 100
+        self.sheet.rows[5] = 40
+        self.assertEqual(self.view.get_column_left(3), 2 * WIDTH + 100 - constants.DEFAULT_COLUMN_WIDTH)
+        self.assertEqual(self.view.get_column_width(2), 100 + constants.CELL_PADDING_AND_BORDER)
+        self.assertEqual(self.view.get_row_top(5), 4 * HEIGHT)
+        self.assertEqual(self.view.get_row_top(6), 5 * HEIGHT + 40 - constants.DEFAULT_ROW_HEIGHT)
+        self.assertEqual(self.view.get_height(), self.view.get_row_top(50001))
+
+    def test_initial_window(self):
+        """
+        Tests that a new viewport renders a screen of cells, not the entire sheet.
+        """
+        self.assertEqual((self.view.first_column, self.view.first_row), (1, 1))
+        self.assertLess(self.view.last_column, 100)
+        self.assertLess(self.view.last_row, 200)
+        self.assertIn((1, 1), self.view)
+        self.assertNotIn((1, 50000), self.view)
+
+    def test_small_scroll(self):
+        """
+        Tests that scrolling within the overscan margin does not move the window.
+        """
+        self.view.update(0, 0, 4 * WIDTH, 20 * HEIGHT)
+        self.assertFalse(self.view.update(0, 5 * HEIGHT, 4 * WIDTH, 20 * HEIGHT))
+
+    def test_large_scroll(self):
+        """
+        Tests that scrolling far down moves the window to the visible rows plus the overscan.
+        """
+        self.assertTrue(self.view.update(0, 10000 * HEIGHT, 4 * WIDTH, 20 * HEIGHT))
+        self.assertEqual(self.view.first_row, 10001 - 10)
+        self.assertEqual(self.view.last_row, 10021 + 10)
+        self.assertIn((1, 10010), self.view)
+        self.assertNotIn((1, 1), self.view)
+
+    def test_extend(self):
+        """
+        Tests that growing the sheet clears the window, so it is computed again.
+        """
+        self.assertFalse(self.view.extend(10, 10))
+        self.assertTrue(self.view.extend(10, 60000))
+        self.assertEqual(self.view.row_count, 60000)
+        self.assertTrue(self.view.update(0, 59990 * HEIGHT, 4 * WIDTH, 20 * HEIGHT))
+        self.assertEqual(self.view.last_row, 60000)
+
+    def test_html(self):
+        """
+        Tests that only the cells in the window are rendered, with spacers of the right size.
+        """
+        self.view.update(0, 10000 * HEIGHT, 4 * WIDTH, 20 * HEIGHT)
+        html = html_maker.make_html(self.sheet, self.view)
+        rows = self.view.last_row - self.view.first_row + 1
+        columns = self.view.last_column - self.view.first_column + 1
+        self.assertEqual(html.count('class="cell '), rows * columns)
+        self.assertIn(f'id="A{self.view.first_row}"', html)
+        self.assertNotIn('id="A1"', html)
+        self.assertIn(f"height:{self.view.get_row_top(self.view.first_row)}px", html)
+
+    def test_keys(self):
+        """
+        Tests that the keys of the window are the keys of the rendered cells.
+        """
+        self.view.update(0, 100 * HEIGHT, 4 * WIDTH, 20 * HEIGHT)
+        keys = list(self.view.get_keys())
+        rows = self.view.last_row - self.view.first_row + 1
+        columns = self.view.last_column - self.view.first_column + 1
+        self.assertEqual(len(keys), rows * columns)
+        self.assertEqual(keys[0], f"A{self.view.first_row}")
+        self.assertNotIn("A1", keys)